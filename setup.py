@@ -8,12 +8,14 @@ setup(
         "pandas>=2.0.0",
         "kagglehub[pandas-datasets]>=0.3.8",
         "openpyxl>=3.1.2",
-        "matplotlib>=3.5.0",
-        "seaborn>=0.11.2",
         "numpy>=1.20.0",
         "lxml>=4.9.0",  # Para procesamiento de XML
         "html5lib>=1.1" # Para procesamiento de HTML
     ],
+    extras_require={
+        "columnar": ["pyarrow>=10.0.0"],  # Almacenamiento intermedio Parquet entre etapas
+        "test": ["pytest>=7.0"],  # Pruebas de tests/
+    },
     author="Jean Carlos Páez Ramírez y Juliana Maria Peña Suarez",
     author_email="",
     asignatura="Infraestructura y arquitectura para Big Data",
@@ -0,0 +1,74 @@
+import os
+import sqlite3
+import schemas
+import sqlite_writer
+import id_codec
+
+# Perfil de las tablas para los reportes de auditoría calculado en SQLite, sin cargar las tablas en
+# pandas: registros, nulos por columna, mínimo/máximo y, opcionalmente, valores distintos en una sola
+# consulta (una pasada) por tabla. Los valores distintos multiplican el costo de la consulta (SQLite
+# ordena cada columna), así que solo se calculan con BIGDATA_AUDIT_DISTINCT=1.
+AUDIT_DISTINCT = os.environ.get('BIGDATA_AUDIT_DISTINCT', '0') == '1'
+
+def table_profile(conn, table, distinct=AUDIT_DISTINCT):
+    """
+    Devuelve el número de registros, el total de nulos y, por columna, los nulos, los valores
+    distintos (None si `distinct` es falso) y el mínimo y el máximo de la tabla, con una sola consulta.
+    """
+    quoted_table = schemas.quote_identifier(table)
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({quoted_table})")]
+    aggregates = ["COUNT(*)"]
+    for column in columns:
+        quoted = schemas.quote_identifier(column)
+        aggregates.append(f"SUM({quoted} IS NULL)")
+        aggregates.append(f"COUNT(DISTINCT {quoted})" if distinct else "NULL")
+        aggregates.append(f"MIN({quoted})")
+        aggregates.append(f"MAX({quoted})")
+    values = conn.execute(f"SELECT {', '.join(aggregates)} FROM {quoted_table}").fetchone()
+
+    column_profiles = {}
+    for position, column in enumerate(columns):
+        nulls, distinct_values, minimum, maximum = values[1 + 4 * position:5 + 4 * position]
+        column_profiles[column] = {'nulls': nulls or 0, 'distinct': distinct_values,
+                                   'min': minimum, 'max': maximum}
+    return {
+        'table': table,
+        'rows': values[0],
+        'null_values': sum(profile['nulls'] for profile in column_profiles.values()),
+        'columns': column_profiles,
+    }
+
+def database_profile(db_path, tables=None, distinct=AUDIT_DISTINCT):
+    """
+    Calcula el perfil de las tablas indicadas (todas las de datos si `tables` es None) de una base de datos.
+    Si la base de datos tiene identificadores codificados (`id_codec.py`), el mínimo y el máximo de esas
+    columnas se muestran con el identificador original.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        if tables is None:
+            tables = sqlite_writer.list_tables(conn)
+        profiles = {table: table_profile(conn, table, distinct) for table in tables}
+        dictionary = id_codec.read_dictionary(conn)
+    finally:
+        conn.close()
+    for profile in profiles.values():
+        for column, column_profile in profile['columns'].items():
+            if dictionary and column in dictionary and isinstance(column_profile['min'], int):
+                column_profile['min'] = id_codec.decode_value(dictionary, column, column_profile['min'])
+                column_profile['max'] = id_codec.decode_value(dictionary, column, column_profile['max'])
+    return profiles
+
+def describe_columns(profile):
+    """
+    Describe en una línea por columna los nulos, valores distintos y rango de una tabla.
+    """
+    lines = []
+    for column, column_profile in profile['columns'].items():
+        parts = [f"{column_profile['nulls']} nulos"]
+        if column_profile['distinct'] is not None:
+            parts.append(f"{column_profile['distinct']} distintos")
+        if column_profile['min'] is not None:
+            parts.append(f"mín. {column_profile['min']}, máx. {column_profile['max']}")
+        lines.append(f"{column}: {', '.join(parts)}")
+    return lines
@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+import pandas as pd
+import synthetic_data
+
+# Benchmark reproducible del pipeline: genera datos sintéticos con el esquema Olist a distintas escalas,
+# ejecuta las etapas (cada una en su propio proceso, en un directorio de trabajo temporal) y guarda el
+# rendimiento, la latencia y la memoria de cada etapa en un JSON que se puede comparar entre commits.
+# Las variables BIGDATA_* del entorno se pasan a las etapas, así que sirven para comparar configuraciones.
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+STAGES = ['ingestion', 'cleaning', 'enrichment']
+STAGE_SCRIPTS = {'ingestion': 'ingestion.py', 'cleaning': 'cleaning.py', 'enrichment': 'enrichment.py'}
+RESULTS_PATH = 'src/static/benchmark/benchmark_results.json'
+
+# Benchmark de arranque (--startup): tiempo de importación de cada punto de entrada en un proceso nuevo,
+# medido con `python -X importtime`, para que las importaciones pesadas no vuelvan a los caminos frecuentes
+STARTUP_MODULES = ['ingestion', 'cleaning', 'enrichment', 'pipeline']
+STARTUP_RESULTS_PATH = 'src/static/benchmark/startup_results.json'
+
+def _git_commit():
+    """
+    Devuelve el commit actual del repositorio, o None si no se puede obtener.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SRC_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _directory_size(path):
+    """
+    Devuelve el tamaño total en bytes de los archivos de un directorio.
+    """
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+def run_stage(stage, workdir, dataset_path):
+    """
+    Ejecuta una etapa del pipeline en un proceso nuevo con `workdir` como directorio de trabajo
+    y devuelve su tiempo total (incluido el arranque del proceso) y las métricas que registró la etapa.
+    """
+    env = dict(os.environ, BIGDATA_DATASET_PATH=dataset_path)
+    start_time = time.perf_counter()
+    completed = subprocess.run([sys.executable, os.path.join(SRC_DIR, STAGE_SCRIPTS[stage])], cwd=workdir,
+                               env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start_time
+    if completed.returncode != 0:
+        raise RuntimeError(f"La etapa '{stage}' falló:\n{completed.stdout[-2000:]}\n{completed.stderr[-2000:]}")
+
+    with open(os.path.join(workdir, 'src', 'static', 'auditoria', f"{stage}_metrics.json"), encoding='utf-8') as f:
+        stage_metrics = json.load(f)
+    return {
+        'process_seconds': round(elapsed, 6),
+        'wall_seconds': stage_metrics['wall_seconds'],
+        'cpu_seconds': stage_metrics['cpu_seconds'],
+        'peak_rss_bytes': stage_metrics['peak_rss_bytes'],
+        # Las cinco secciones que más tiempo ocupan en la etapa
+        'top_sections': dict(list(stage_metrics['summary'].items())[:5]),
+    }
+
+def _parse_importtime(output):
+    """
+    Lee la salida de `python -X importtime` y devuelve, por módulo, su tiempo propio y acumulado en
+    segundos y su nivel de anidamiento (0 para el módulo importado directamente).
+    """
+    imports = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # Encabezado
+        imports[name.strip()] = {
+            'self_seconds': int(self_us) / 1e6,
+            'cumulative_seconds': int(cumulative_us) / 1e6,
+            'level': (len(name) - len(name.lstrip()) - 1) // 2,
+        }
+    return imports
+
+def measure_startup(module, repeat=1):
+    """
+    Importa un punto de entrada del pipeline en un proceso nuevo `repeat` veces y devuelve la repetición
+    más rápida: el tiempo total del proceso, el tiempo de importación del módulo y las importaciones
+    directas que más tardan.
+    """
+    runs = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"], cwd=SRC_DIR,
+                                   capture_output=True, text=True)
+        elapsed = time.perf_counter() - start_time
+        if completed.returncode != 0:
+            raise RuntimeError(f"No se pudo importar '{module}':\n{completed.stderr[-2000:]}")
+        imports = _parse_importtime(completed.stderr)
+        direct = sorted((name for name, values in imports.items() if values['level'] == 1),
+                        key=lambda name: imports[name]['cumulative_seconds'], reverse=True)
+        runs.append({
+            'process_seconds': round(elapsed, 6),
+            'import_seconds': imports[module]['cumulative_seconds'],
+            'top_imports': {name: imports[name]['cumulative_seconds'] for name in direct[:8]},
+        })
+    best = min(runs, key=lambda run: run['import_seconds'])
+    best['runs_import_seconds'] = [run['import_seconds'] for run in runs]
+    return best
+
+def run_benchmark(scale, stages=STAGES, repeat=1, seed=42, keep=False):
+    """
+    Genera el dataset sintético a la escala indicada y ejecuta las etapas pedidas `repeat` veces.
+    Las etapas anteriores a la primera pedida se ejecutan una vez como preparación, sin medirse.
+    De cada etapa se guarda la repetición más rápida y los tiempos de todas.
+    """
+    workdir = tempfile.mkdtemp(prefix=f"bigdata_benchmark_{scale}_")
+    dataset_path = os.path.join(workdir, 'data')
+    try:
+        print(f"Generando datos sintéticos (escala {scale})...")
+        row_counts = synthetic_data.generate_dataset(dataset_path, scale, seed)
+        input_rows = sum(row_counts.values())
+        input_bytes = _directory_size(dataset_path)
+
+        first_stage = min(STAGES.index(stage) for stage in stages)
+        for stage in STAGES[:first_stage]:
+            print(f"  - Preparando etapa previa: {stage}")
+            run_stage(stage, workdir, dataset_path)
+
+        results = {}
+        for stage in STAGES[first_stage:STAGES.index(stages[-1]) + 1]:
+            runs = []
+            for _ in range(repeat if stage in stages else 1):
+                runs.append(run_stage(stage, workdir, dataset_path))
+            if stage not in stages:
+                continue
+            best = min(runs, key=lambda run: run['wall_seconds'])
+            best['runs_wall_seconds'] = [run['wall_seconds'] for run in runs]
+            best['rows_per_second'] = round(input_rows / best['wall_seconds'], 1) if best['wall_seconds'] else None
+            best['mb_per_second'] = round(input_bytes / 1024 / 1024 / best['wall_seconds'], 3) \
+                if best['wall_seconds'] else None
+            results[stage] = best
+            print(f"  - {stage}: {best['wall_seconds']:.2f} s, {best['rows_per_second']} filas/s, "
+                  f"memoria máxima {(best['peak_rss_bytes'] or 0) / 1024 / 1024:.0f} MB")
+
+        return {
+            'scale': scale,
+            'input_rows': input_rows,
+            'input_bytes': input_bytes,
+            'row_counts': row_counts,
+            'stages': results,
+            'end_to_end_seconds': round(sum(result['process_seconds'] for result in results.values()), 6),
+            'workdir': workdir if keep else None,
+        }
+    finally:
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline con datos sintéticos del esquema Olist.")
+    parser.add_argument('--scales', default='0.1',
+                        help="Escalas separadas por comas (1 = tamaño del dataset original), por ejemplo 0.1,1,10")
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help="Etapas a medir, separadas por comas (por defecto todas)")
+    parser.add_argument('--repeat', type=int, default=1, help="Repeticiones de cada etapa")
+    parser.add_argument('--seed', type=int, default=42, help="Semilla del generador de datos")
+    parser.add_argument('--output', default=None,
+                        help=f"Archivo JSON de resultados (por defecto {RESULTS_PATH}, o {STARTUP_RESULTS_PATH} con --startup)")
+    parser.add_argument('--keep', action='store_true', help="Conservar los directorios de trabajo")
+    parser.add_argument('--startup', action='store_true',
+                        help="Medir solo el tiempo de arranque (importación) de cada punto de entrada")
+    args = parser.parse_args()
+    output = args.output or (STARTUP_RESULTS_PATH if args.startup else RESULTS_PATH)
+
+    stages = [stage for stage in STAGES if stage in args.stages.split(',')]
+    if not stages:
+        parser.error(f"Etapas válidas: {', '.join(STAGES)}")
+
+    report = {
+        'commit': _git_commit(),
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'settings': {key: value for key, value in sorted(os.environ.items()) if key.startswith('BIGDATA_')},
+    }
+    if args.startup:
+        report['startup'] = {}
+        for module in STARTUP_MODULES:
+            report['startup'][module] = measure_startup(module, args.repeat)
+            print(f"  - {module}: importación en {report['startup'][module]['import_seconds']:.3f} s")
+    else:
+        report['results'] = []
+        for scale in (float(value) for value in args.scales.split(',')):
+            report['results'].append(run_benchmark(scale, stages, args.repeat, args.seed, args.keep))
+
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultados del benchmark guardados en: {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import os
+import json
+import sqlite3
+from collections.abc import Mapping
+import pandas as pd
+import schemas
+import columnar
+import metrics
+import sqlite_writer
+import id_codec
+
+# Catálogo perezoso de las tablas de una base de datos SQLite: cada tabla se lee la primera vez que se
+# usa y solo con las columnas pedidas; si después se piden más columnas, solo se leen las que faltan.
+# Se lee de la copia columnar de la etapa si existe (BIGDATA_COLUMNAR=1) y, si no, de SQLite.
+# Con BIGDATA_TABLE_CACHE=1 (requiere pyarrow) las columnas leídas de SQLite se guardan en archivos
+# Arrow que las ejecuciones siguientes abren con memoria mapeada, mientras la base de datos no cambie.
+CACHE_DIR = 'src/static/cache'
+CACHE_ENABLED = os.environ.get('BIGDATA_TABLE_CACHE', '0') == '1'
+
+class TableCatalog(Mapping):
+    """
+    Acceso perezoso a las tablas de `db_path` como un diccionario de DataFrames. `catalog[tabla]`
+    devuelve la tabla completa y `catalog.table(tabla, columnas)` solo las columnas indicadas.
+    `stage` es la etapa de la copia columnar ('cleaned', ...) y el nombre del directorio de la caché.
+    Con `frames` el catálogo se crea con las tablas en memoria de la etapa anterior (pipeline.py) sin
+    abrir la base de datos, que puede estar escribiéndose aún en segundo plano: `pending` es el Future
+    de esa escritura y `wait` espera a que termine.
+    `id_dictionary` es el diccionario de los identificadores codificados (`id_codec.py`), o None: las
+    columnas de códigos leídas de SQLite se devuelven con los identificadores originales.
+    """
+
+    def __init__(self, db_path, stage, use_cache=CACHE_ENABLED, frames=None, pending=None):
+        self.db_path = db_path
+        self.stage = stage
+        self.pending = pending
+        self._frames = {}
+        if frames is not None:
+            self._columns = {table: list(df.columns) for table, df in frames.items()}
+            self._frames = dict(frames)
+            self.id_dictionary = id_codec.frames_dictionary(frames) or None
+            use_cache = False
+        else:
+            conn = sqlite3.connect(db_path)
+            try:
+                self._columns = {
+                    table: [row[1] for row in conn.execute(f"PRAGMA table_info({schemas.quote_identifier(table)})")]
+                    for table in sqlite_writer.list_tables(conn)
+                }
+                self.id_dictionary = id_codec.read_dictionary(conn)
+            finally:
+                conn.close()
+        self._use_columnar = columnar.is_enabled()
+        self._cache_dir = None
+        if use_cache and not self._use_columnar:
+            if columnar.pyarrow() is None:
+                print("BIGDATA_TABLE_CACHE=1 pero pyarrow no está instalado; se leerá siempre de SQLite.")
+            else:
+                self._cache_dir = os.path.join(CACHE_DIR, stage)
+                self._validate_cache()
+
+    def __getitem__(self, table):
+        return self.table(table)
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+    def columns(self, table):
+        """
+        Devuelve los nombres de las columnas de una tabla sin leerla.
+        """
+        return list(self._columns[table])
+
+    def wait(self):
+        """
+        Espera a que termine la escritura en segundo plano de la base de datos (si la hay) y devuelve
+        su ruta. Propaga el error si la escritura falló.
+        """
+        if self.pending is not None:
+            self.pending.result()
+        return self.db_path
+
+    def add(self, table, df):
+        """
+        Registra una tabla ya cargada en memoria (por ejemplo, la que entrega la etapa anterior).
+        """
+        self._columns[table] = list(df.columns)
+        self._frames[table] = df
+
+    def table(self, table, columns=None):
+        """
+        Devuelve la tabla con las columnas indicadas (todas si `columns` es None), leyendo solo las
+        columnas que aún no se han cargado.
+        """
+        if table not in self._columns:
+            raise KeyError(table)
+        columns = self.columns(table) if columns is None else list(columns)
+        loaded = self._frames.get(table)
+        missing = [column for column in columns if loaded is None or column not in loaded.columns]
+        if missing:
+            with metrics.measure('load_table_columns', table=table) as record:
+                new_columns = self._read(table, missing)
+                record['rows'] = len(new_columns)
+            loaded = new_columns if loaded is None else pd.concat([loaded, new_columns], axis=1)
+            self._frames[table] = loaded
+            print(f"Tabla {table} cargada: {len(loaded)} registros ({len(missing)} de "
+                  f"{len(self._columns[table])} columnas)")
+        return loaded[columns]
+
+    def _read(self, table, columns):
+        if self._use_columnar and columnar.exists(self.stage, table):
+            return columnar.read_table(self.stage, table, columns=columns)
+        cached = self._read_cache(table) if self._cache_dir is not None else None
+        cached_columns = [column for column in columns if cached is not None and column in cached.column_names]
+        sqlite_columns = [column for column in columns if column not in cached_columns]
+        parts = []
+        if cached_columns:
+            parts.append(cached.select(cached_columns).to_pandas())
+        if sqlite_columns:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                select = ", ".join(schemas.quote_identifier(column) for column in sqlite_columns)
+                df = pd.read_sql_query(f"SELECT {select} FROM {schemas.quote_identifier(table)}", conn)
+            finally:
+                conn.close()
+            df = schemas.apply_schema(df, table)
+            if self._cache_dir is not None:
+                self._write_cache(table, df)
+            parts.append(df)
+        df = parts[0][columns] if len(parts) == 1 else pd.concat(parts, axis=1)[columns]
+        # La caché guarda los códigos de los identificadores; se decodifican al entregar la tabla
+        return id_codec.decode(df, self.id_dictionary) if self.id_dictionary else df
+
+    def _cache_path(self, table):
+        return os.path.join(self._cache_dir, f"{table}.arrow")
+
+    def _validate_cache(self):
+        """
+        Vacía la caché si la base de datos cambió desde que se creó (tamaño o fecha de modificación).
+        """
+        os.makedirs(self._cache_dir, exist_ok=True)
+        manifest_path = os.path.join(self._cache_dir, 'cache_manifest.json')
+        source = {'db_path': self.db_path, 'size': os.path.getsize(self.db_path),
+                  'mtime': os.path.getmtime(self.db_path)}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                if json.load(f) == source:
+                    return
+        for name in os.listdir(self._cache_dir):
+            if name.endswith('.arrow'):
+                os.remove(os.path.join(self._cache_dir, name))
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(source, f)
+
+    def _read_cache(self, table):
+        """
+        Abre el archivo Arrow de la tabla con memoria mapeada (las columnas no se copian a memoria
+        hasta que se usan). Devuelve None si no existe.
+        """
+        path = self._cache_path(table)
+        if not os.path.exists(path):
+            return None
+        pa = columnar.pyarrow()
+        return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+    def _write_cache(self, table, df):
+        """
+        Añade las columnas leídas de SQLite al archivo Arrow de la tabla.
+        """
+        pa = columnar.pyarrow()
+        new_table = pa.Table.from_pandas(df, preserve_index=False)
+        cached = self._read_cache(table)
+        if cached is not None:
+            for column in cached.column_names:
+                if column not in new_table.column_names:
+                    new_table = new_table.append_column(cached.field(column), cached.column(column))
+        tmp_path = self._cache_path(table) + '.tmp'
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, new_table.schema) as writer:
+                writer.write_table(new_table)
+        os.replace(tmp_path, self._cache_path(table))
@@ -1,10 +1,34 @@
 import os
+import functools
 import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
+import schemas
+import columnar
+import sketches
+import dedup
+import metrics
+import sqlite_writer
+import audit
+import catalog
+import id_codec
+
+# Limpieza por bloques (BIGDATA_CLEANING_CHUNKED=1): las tablas se procesan en bloques de CHUNK_SIZE filas
+# en lugar de cargarse completas en memoria
+CHUNKED = os.environ.get('BIGDATA_CLEANING_CHUNKED', '0') == '1'
+CHUNK_SIZE = int(os.environ.get('BIGDATA_CHUNK_SIZE', 100000))
+# Estadísticas aproximadas (BIGDATA_CLEANING_SKETCHES=1, implica la limpieza por bloques): el perfil de
+# columnas y las medianas de imputación se obtienen con sketches en la misma pasada del análisis
+SKETCHES = os.environ.get('BIGDATA_CLEANING_SKETCHES', '0') == '1'
+# Limpieza en paralelo: número de procesos (BIGDATA_WORKERS, 1 = secuencial, 0 = todos los núcleos).
+# Cada proceso analiza y limpia tablas completas; las tablas de más de BIGDATA_CLEANING_PARTITION_ROWS
+# filas se reparten además en particiones de filas que se cargan y se analizan en procesos distintos.
+WORKERS = int(os.environ.get('BIGDATA_WORKERS', 1))
+PARTITION_ROWS = int(os.environ.get('BIGDATA_CLEANING_PARTITION_ROWS', 500000))
+
+INGESTION_DB_PATH = 'src/static/db/ingestion.db'
 
 def clean_previous_files():
     """
@@ -28,7 +52,7 @@ def connect_to_database():
     Conecta con la base de datos SQLite generada en la Actividad 1.
     """
     print("Conectando a la base de datos...")
-    db_path = 'src/static/db/ingestion.db'
+    db_path = INGESTION_DB_PATH
     if not os.path.exists(db_path):
         raise FileNotFoundError(f"No se encontró la base de datos en {db_path}")
 
@@ -40,37 +64,572 @@ def get_table_names(conn):
     """
     Obtiene los nombres de todas las tablas en la base de datos.
     """
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tables = [table[0] for table in cursor.fetchall()]
-    return tables
+    return sqlite_writer.list_tables(conn)
+
+def load_table(conn, table, columns=None, datetime_stats=None):
+    """
+    Carga una tabla de la ingesta. Si existe su copia columnar (Parquet) se lee de ahí, solo con las
+    columnas pedidas y con los tipos ya conservados; si no, se lee de SQLite y se aplica el registro de esquemas
+    (acumulando en `datetime_stats` las estadísticas de conversión de las fechas).
+    Con BIGDATA_ID_ENCODING=1 los identificadores se codifican con el diccionario compartido (`id_codec.py`).
+    """
+    if columnar.is_enabled() and columnar.exists('ingestion', table):
+        df = columnar.read_table('ingestion', table, columns=columns)
+    else:
+        select = ", ".join(schemas.quote_identifier(column) for column in columns) if columns else "*"
+        df = pd.read_sql_query(f"SELECT {select} FROM {schemas.quote_identifier(table)} ORDER BY rowid", conn)
+        df = schemas.apply_schema(df, table, datetime_stats)
+    if id_codec.ENABLED:
+        df = id_codec.encode(df, id_codec.source_dictionary(INGESTION_DB_PATH))
+    return df
+
+def analyze_table(conn, table):
+    """
+    Carga una tabla de la ingesta y reúne sus estadísticas de calidad: filas, valores nulos, filas
+    duplicadas (con su máscara) y tipos de datos. Devuelve el resultado del análisis de la tabla,
+    con el DataFrame para procesarlo después.
+    """
+    datetime_stats = {}
+    with metrics.measure('load_table', table=table) as record:
+        df = load_table(conn, table, datetime_stats=datetime_stats)
+        record['rows'] = len(df)
+
+    # Estadísticas básicas
+    total_rows = len(df)
+    null_values = df.isnull().sum().sum()
+    with metrics.measure('find_duplicates', table=table, rows=total_rows):
+        duplicated_mask, dedup_stats = dedup.find_duplicates(df)
+
+    return {
+        'total_rows': total_rows,
+        'null_values': null_values,
+        'duplicated_rows': dedup_stats['duplicates'],
+        'data_types': df.dtypes.to_dict(),
+        'duplicated_mask': duplicated_mask,
+        'dedup': [dedup.describe(dedup_stats, 'de filas')],
+        'datetime_stats': datetime_stats,
+        'dataframe': df  # Guardamos el DataFrame para procesamiento posterior
+    }
 
+def _print_analysis(data):
+    print(f"  - Filas totales: {data['total_rows']}")
+    print(f"  - Valores nulos: {data['null_values']}")
+    print(f"  - Filas duplicadas: {data['duplicated_rows']}")
+
+@metrics.timed
 def exploratory_analysis(conn, tables):
     """
     Realiza un análisis exploratorio de los datos para identificar problemas de calidad.
+    Cada tabla se carga con los tipos del registro de esquemas (categorías, enteros y fechas),
+    desde su copia columnar si el almacenamiento columnar está activado.
     """
     print("Realizando análisis exploratorio...")
     analysis_results = {}
 
     for table in tables:
         print(f"Analizando tabla: {table}")
-        df = pd.read_sql_query(f"SELECT * FROM '{table}'", conn)
+        analysis_results[table] = analyze_table(conn, table)
+        _print_analysis(analysis_results[table])
+
+    return analysis_results
+
+def plan_imputation(data_types, null_counts, median_of):
+    """
+    Decide la estrategia de imputación de cada columna con valores nulos según su tipo de dato.
+    `median_of(column)` devuelve la mediana de una columna numérica, calculada sobre el DataFrame
+    completo o a partir de las estadísticas reunidas en streaming.
+    Devuelve el valor de relleno de cada columna y la descripción de las operaciones.
+    """
+    fill_values = {}
+    operations = []
+    for column, dtype in data_types.items():
+        null_count = null_counts[column]
+        if null_count > 0:
+            # Estrategia según el tipo de dato
+            if pd.api.types.is_numeric_dtype(dtype):
+                # Para datos numéricos, usar la mediana
+                median_value = median_of(column)
+                fill_values[column] = median_value
+                operations.append(f"Se imputaron {null_count} valores nulos en '{column}' con la mediana ({median_value})")
+            elif pd.api.types.is_datetime64_dtype(dtype):
+                # Las fechas nulas corresponden a eventos que aún no ocurren (por ejemplo, órdenes
+                # sin entregar), así que se conservan como NaT en lugar de imputarlas
+                operations.append(f"Se conservaron {null_count} valores nulos en '{column}' (fecha no registrada)")
+            else:
+                # Para strings y otros tipos, usar 'DESCONOCIDO'
+                fill_values[column] = 'DESCONOCIDO'
+                operations.append(f"Se imputaron {null_count} valores nulos en '{column}' con 'DESCONOCIDO'")
+    return fill_values, operations
+
+def apply_imputation(df, fill_values):
+    """
+    Rellena los valores nulos de cada columna con el valor decidido en `plan_imputation`.
+    """
+    for column, value in fill_values.items():
+        if isinstance(df[column].dtype, pd.CategoricalDtype) and value not in df[column].cat.categories:
+            df[column] = df[column].cat.add_categories(value)
+        elif pd.api.types.is_integer_dtype(df[column].dtype) and not float(value).is_integer():
+            # La mediana de una columna entera puede no ser entera (por ejemplo, 2.5)
+            df[column] = df[column].astype('float64')
+        df[column] = df[column].fillna(value)
+    return df
+
+def _add_distinct_hashes(distinct, df, columns):
+    """
+    Añade a `distinct` ({columna: array}) las huellas de 64 bits de los valores distintos no nulos de las
+    columnas indicadas de un bloque. Cada array se mantiene ordenado y sin repetidos, así que al terminar
+    su longitud es el número de valores distintos de la columna en toda la tabla (los conteos de cada
+    bloque no se pueden sumar, porque un mismo valor aparece en varios bloques).
+    """
+    for column in columns:
+        hashes = pd.util.hash_array(pd.unique(df[column].dropna().to_numpy(dtype=object)))
+        distinct[column] = np.union1d(distinct[column], hashes) if column in distinct else np.unique(hashes)
+
+def _set_distinct_counts(datetime_stats, distinct):
+    """
+    Sustituye los valores distintos de las estadísticas de fechas de una tabla procesada por bloques
+    por los de toda la tabla (ver `_add_distinct_hashes`).
+    """
+    for column, hashes in distinct.items():
+        if column in datetime_stats:
+            datetime_stats[column]['unique'] = len(hashes)
+
+def convert_date_columns(df, table=None, datetime_stats=None, distinct=None):
+    """
+    Convierte a datetime las columnas de texto cuyo nombre indica una fecha, con el formato del registro
+    de esquemas o, si la columna no está registrada, con el formato deducido de su primer valor.
+    Cada valor distinto se interpreta una sola vez (ver `schemas.to_datetime_cached`).
+    Si `df` es un bloque de la tabla, `distinct` acumula las huellas de sus valores distintos.
+    Devuelve la descripción de las operaciones realizadas.
+    """
+    operations = []
+    date_columns = [col for col in df.columns if 'date' in col.lower() or 'time' in col.lower()]
+    for col in date_columns:
+        # Columnas de texto: dtype object o, con pandas 3, el dtype str (las categóricas no se convierten)
+        if pd.api.types.is_object_dtype(df[col].dtype) or pd.api.types.is_string_dtype(df[col].dtype):
+            if distinct is not None:
+                _add_distinct_hashes(distinct, df, [col])
+            try:
+                date_format = schemas.datetime_format(table, col) if table else None
+                df[col] = schemas.to_datetime_cached(df[col], date_format or schemas.guess_format(df[col]),
+                                                     datetime_stats)
+                operations.append(f"Se convirtió la columna '{col}' a tipo datetime")
+            except (ValueError, TypeError):
+                operations.append(f"No se pudo convertir la columna '{col}' a tipo datetime")
+    return operations
+
+def apply_table_transformations(df, table):
+    """
+    Aplica las transformaciones específicas de cada tabla. Devuelve la descripción de las operaciones.
+    """
+    operations = []
+    if table == 'olist_order_items_dataset':
+        # Normalizar precios (por ejemplo, convertir a dólares si están en otra moneda)
+        if 'price' in df.columns:
+            df['price_normalized'] = df['price'] / 5.0  # Ejemplo: conversión a USD (asumiendo BRL)
+            operations.append("Se normalizó la columna 'price' creando 'price_normalized'")
+
+    elif table == 'olist_products_dataset':
+        # Estandarizar nombres de categorías
+        if 'product_category_name' in df.columns:
+            df['product_category_name'] = df['product_category_name'].str.lower().str.replace('_', ' ')
+            operations.append("Se estandarizaron los nombres de categorías de productos")
+
+    elif table == 'olist_order_reviews_dataset':
+        # Categorizar las puntuaciones de reseñas
+        if 'review_score' in df.columns:
+            bins = [0, 2, 3, 5]
+            labels = ['Negativa', 'Neutral', 'Positiva']
+            df['review_sentiment'] = pd.cut(df['review_score'], bins=bins, labels=labels)
+            operations.append("Se categorizaron las puntuaciones de reseñas en sentimientos")
+    return operations
+
+def clean_table(table, data):
+    """
+    Limpia una tabla a partir del resultado de su análisis: elimina duplicados (y claves primarias
+    repetidas), imputa los valores nulos, convierte las fechas y aplica las transformaciones de la tabla.
+    Devuelve la tabla limpia y la descripción de las operaciones realizadas.
+    """
+    df = data['dataframe'].copy()
+    operations = []
+
+    # 1. Eliminar duplicados (con la máscara de huellas calculada en el análisis)
+    with metrics.measure('drop_duplicates', table=table, rows=len(df)):
+        initial_rows = len(df)
+        df = df[~data['duplicated_mask']]
+        duplicates_removed = initial_rows - len(df)
+        if duplicates_removed > 0:
+            operations.append(f"Se eliminaron {duplicates_removed} filas duplicadas")
+
+        # Garantizar que la clave primaria registrada sea única en la tabla limpia
+        key = schemas.primary_key(table, df.columns)
+        data['primary_key'] = key
+        data['key_duplicated_rows'] = 0
+        if key:
+            rows_before_key = len(df)
+            # Huellas de la clave ya calculadas por particiones (ver `combine_partitions`)
+            key_hashes = data.get('key_hashes')
+            if key_hashes is not None:
+                key_hashes = key_hashes[~data['duplicated_mask']]
+            key_duplicated, key_stats = dedup.find_duplicates(df, subset=key, hashes=key_hashes)
+            data['dedup'].append(dedup.describe(key_stats, f"por clave ({', '.join(key)})"))
+            df = df[~key_duplicated]
+            key_duplicates_removed = rows_before_key - len(df)
+            data['key_duplicated_rows'] = key_duplicates_removed
+            if key_duplicates_removed > 0:
+                operations.append(f"Se eliminaron {key_duplicates_removed} filas con clave primaria "
+                                  f"({', '.join(key)}) repetida")
+
+    # 2. Manejo de valores nulos
+    with metrics.measure('impute_nulls', table=table, rows=len(df)):
+        null_counts_before = df.isnull().sum()
+        fill_values, imputation_operations = plan_imputation(
+            df.dtypes.to_dict(), null_counts_before, lambda column: df[column].median()
+        )
+        apply_imputation(df, fill_values)
+        operations.extend(imputation_operations)
+
+    # 3. Corrección de tipos de datos
+    with metrics.measure('convert_and_transform', table=table, rows=len(df)):
+        # Convertir columnas de fechas a datetime si tienen el formato adecuado
+        operations.extend(convert_date_columns(df, table, data['datetime_stats']))
+
+        # 4. Transformaciones adicionales específicas según la tabla
+        operations.extend(apply_table_transformations(df, table))
+
+    return df, operations
+
+@metrics.timed
+def clean_data(analysis_results):
+    """
+    Limpia y transforma los datos según los problemas identificados.
+    """
+    print("Iniciando proceso de limpieza de datos...")
+    cleaned_results = {}
+    cleaning_operations = {}
+
+    for table, data in analysis_results.items():
+        print(f"Limpiando tabla: {table}")
+        cleaned_results[table], cleaning_operations[table] = clean_table(table, data)
+        print(f"  - Operaciones realizadas: {len(cleaning_operations[table])}")
+
+    return cleaned_results, cleaning_operations
+
+def _worker_records(records):
+    """
+    Añade a la etapa en curso las mediciones hechas en un proceso de trabajo.
+    """
+    for record in records:
+        metrics.record(**record)
+
+def audit_entry(data):
+    """
+    Devuelve el resultado del análisis de una tabla sin el DataFrame original, la máscara de duplicados
+    ni las huellas, que no necesita el reporte de auditoría.
+    """
+    return {key: value for key, value in data.items()
+            if key not in ('dataframe', 'duplicated_mask', 'key_hashes')}
+
+def _clean_table_task(table):
+    """
+    Tarea de un proceso de trabajo: analiza y limpia una tabla completa. Devuelve el resultado del
+    análisis (sin el DataFrame original), la tabla limpia, las operaciones y las mediciones de la tarea.
+    """
+    metrics.start_stage('cleaning', profile='')
+    conn = sqlite3.connect(INGESTION_DB_PATH)
+    try:
+        data = analyze_table(conn, table)
+        df, operations = clean_table(table, data)
+    finally:
+        conn.close()
+        stage = metrics.detach_stage()
+    return audit_entry(data), df, operations, stage.records
+
+def load_partition(conn, table, first_rowid, last_rowid, datetime_stats=None):
+    """
+    Carga de SQLite las filas con rowid entre `first_rowid` y `last_rowid` de una tabla de la ingesta,
+    en orden de rowid como la lectura completa, y les aplica el registro de esquemas. Devuelve también los
+    valores distintos de cada columna de fecha, con los que se combinan exactamente los conteos de valores
+    distintos.
+    """
+    df = pd.read_sql_query(
+        f"SELECT * FROM {schemas.quote_identifier(table)} WHERE rowid BETWEEN ? AND ? ORDER BY rowid",
+        conn, params=(first_rowid, last_rowid))
+    datetime_values = {column: pd.unique(df[column].dropna())
+                       for column in schemas.get_schema(table)['datetimes'] if column in df.columns}
+    df = schemas.apply_schema(df, table, datetime_stats)
+    if id_codec.ENABLED:
+        df = id_codec.encode(df, id_codec.source_dictionary(INGESTION_DB_PATH))
+    return df, datetime_values
+
+def _analyze_partition_task(table, first_rowid, last_rowid):
+    """
+    Tarea de un proceso de trabajo: carga una partición de filas de una tabla y calcula sus estadísticas
+    parciales (valores nulos, fechas convertidas y huellas de cada fila y de su clave primaria).
+    """
+    metrics.start_stage('cleaning', profile='')
+    conn = sqlite3.connect(INGESTION_DB_PATH)
+    try:
+        datetime_stats = {}
+        with metrics.measure('load_partition', table=table) as record:
+            df, datetime_values = load_partition(conn, table, first_rowid, last_rowid, datetime_stats)
+            record['rows'] = len(df)
+        with metrics.measure('partition_fingerprints', table=table, rows=len(df)):
+            key = schemas.primary_key(table, df.columns)
+            row_hashes = dedup.fingerprint(df)[:, 0]
+            key_hashes = dedup.fingerprint(df, key)[:, 0] if key else None
+    finally:
+        conn.close()
+        stage = metrics.detach_stage()
+    return {
+        'dataframe': df,
+        'null_values': df.isnull().sum().sum(),
+        'datetime_stats': datetime_stats,
+        'datetime_values': datetime_values,
+        'row_hashes': row_hashes,
+        'key_hashes': key_hashes,
+        'records': stage.records,
+    }
+
+def _concat_partitions(frames):
+    """
+    Une las particiones de una tabla en el orden original. Las columnas categóricas de particiones con
+    categorías distintas se unen con las categorías ordenadas, como al convertir la tabla completa.
+    """
+    df = pd.concat(frames, ignore_index=True)
+    for column in frames[0].columns:
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype) and \
+                not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = pd.api.types.union_categoricals([frame[column] for frame in frames],
+                                                         sort_categories=True)
+    return df
+
+def combine_partitions(table, parts):
+    """
+    Combina las estadísticas parciales de las particiones de una tabla en el mismo resultado que
+    `analyze_table` sobre la tabla completa: los nulos y las conversiones de fechas se suman, los valores
+    distintos de las fechas se cuentan sobre la unión de las particiones y los duplicados se buscan con
+    las huellas de todas las filas (verificando las colisiones con los valores).
+    """
+    df = _concat_partitions([part['dataframe'] for part in parts])
+    datetime_stats = {}
+    for part in parts:
+        for column, part_stats in part['datetime_stats'].items():
+            column_stats = datetime_stats.setdefault(column, {'format': part_stats['format'], 'values': 0,
+                                                              'unique': 0, 'coerced': 0, 'seconds': 0.0})
+            for field in ('values', 'coerced', 'seconds'):
+                column_stats[field] += part_stats[field]
+    for column, column_stats in datetime_stats.items():
+        column_stats['unique'] = len(pd.unique(np.concatenate([part['datetime_values'][column] for part in parts])))
+
+    with metrics.measure('find_duplicates', table=table, rows=len(df)):
+        duplicated_mask, dedup_stats = dedup.find_duplicates(
+            df, hashes=np.concatenate([part['row_hashes'] for part in parts]))
+    key_hashes = None
+    if parts[0]['key_hashes'] is not None:
+        key_hashes = np.concatenate([part['key_hashes'] for part in parts])
+
+    return {
+        'total_rows': len(df),
+        'null_values': sum(part['null_values'] for part in parts),
+        'duplicated_rows': dedup_stats['duplicates'],
+        'data_types': df.dtypes.to_dict(),
+        'duplicated_mask': duplicated_mask,
+        'dedup': [dedup.describe(dedup_stats, 'de filas')],
+        'datetime_stats': datetime_stats,
+        'dataframe': df,
+        'key_hashes': key_hashes,
+    }
+
+def _partition_ranges(conn, table, partition_rows):
+    """
+    Devuelve las particiones de filas (primer rowid, último rowid) de una tabla, o una lista vacía si la
+    tabla se procesa completa: cuando cabe en una partición, cuando no está en el registro de esquemas o
+    cuando se lee de la copia columnar (Parquet ya es columnar y sus categorías conservan el orden de la
+    tabla completa). Los límites se toman en una sola pasada por los rowid, así que cada partición se lee
+    por rango del índice de la tabla, sin recorrer las filas de las particiones anteriores.
+    """
+    if (columnar.is_enabled() and columnar.exists('ingestion', table)) or schemas.get_schema(table) is None:
+        return []
+    table_name = schemas.quote_identifier(table)
+    starts = [row[0] for row in conn.execute(
+        f"SELECT row_id FROM (SELECT rowid AS row_id, ROW_NUMBER() OVER (ORDER BY rowid) AS position "
+        f"FROM {table_name}) WHERE (position - 1) % ? = 0", (partition_rows,)
+    )]
+    if len(starts) <= 1:
+        return []
+    last_rowid = conn.execute(f"SELECT MAX(rowid) FROM {table_name}").fetchone()[0]
+    return list(zip(starts, [start - 1 for start in starts[1:]] + [last_rowid]))
+
+@metrics.timed
+def clean_data_parallel(conn, tables, workers=WORKERS, partition_rows=PARTITION_ROWS):
+    """
+    Análisis exploratorio y limpieza de las tablas en un grupo de procesos. Las tablas se reparten entre
+    los procesos; las que superan `partition_rows` filas se cargan y analizan por particiones de filas en
+    varios procesos, y se limpian en este proceso tras combinar sus estadísticas parciales.
+    Devuelve los resultados del análisis (sin los DataFrames originales), las tablas limpias y las
+    operaciones de cada tabla, iguales a los de `exploratory_analysis` seguido de `clean_data`.
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    partitions = {table: _partition_ranges(conn, table, partition_rows) for table in tables}
+    print(f"Analizando y limpiando {len(tables)} tablas con {workers} procesos en paralelo...")
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Primero las particiones, para que las tablas pequeñas se procesen mientras se combinan
+        partition_futures = {
+            table: [executor.submit(_analyze_partition_task, table, first_rowid, last_rowid)
+                    for first_rowid, last_rowid in ranges]
+            for table, ranges in partitions.items() if ranges
+        }
+        table_futures = {table: executor.submit(_clean_table_task, table)
+                         for table in tables if not partitions[table]}
+
+        for table, futures in partition_futures.items():
+            parts = [future.result() for future in futures]
+            for part in parts:
+                _worker_records(part['records'])
+            data = combine_partitions(table, parts)
+            df, operations = clean_table(table, data)
+            results[table] = (audit_entry(data), df, operations)
+            print(f"Tabla limpia: {table} ({len(parts)} particiones)")
+            _print_analysis(data)
+            print(f"  - Operaciones realizadas: {len(operations)}")
+
+        for table, future in table_futures.items():
+            data, df, operations, records = future.result()
+            _worker_records(records)
+            results[table] = (data, df, operations)
+            print(f"Tabla limpia: {table}")
+            _print_analysis(data)
+            print(f"  - Operaciones realizadas: {len(operations)}")
+
+    analysis_results = {table: results[table][0] for table in tables}
+    cleaned_results = {table: results[table][1] for table in tables}
+    cleaning_operations = {table: results[table][2] for table in tables}
+    return analysis_results, cleaned_results, cleaning_operations
+
+def iter_table_chunks(conn, table, chunk_size=CHUNK_SIZE, columns=None, datetime_stats=None, distinct=None):
+    """
+    Recorre una tabla de la ingesta por bloques de `chunk_size` filas, con los tipos del registro de esquemas.
+    Si existe su copia columnar se lee de ahí; si no, de SQLite. El orden de las filas es siempre el mismo.
+    Con `distinct` se acumulan las huellas de los valores distintos de las fechas antes de convertirlas
+    (ver `_add_distinct_hashes`).
+    """
+    if columnar.is_enabled() and columnar.exists('ingestion', table):
+        yield from columnar.iter_table('ingestion', table, chunk_size, columns=columns)
+        return
+    select = ", ".join(schemas.quote_identifier(column) for column in columns) if columns else "*"
+    # Orden explícito: cada pasada (incluida la que solo lee las columnas numéricas, que SQLite podría
+    # resolver con un índice) recorre las filas en el mismo orden que la máscara de filas conservadas
+    query = f"SELECT {select} FROM {schemas.quote_identifier(table)} ORDER BY rowid"
+    schema = schemas.get_schema(table)
+    for chunk in pd.read_sql_query(query, conn, chunksize=chunk_size):
+        if distinct is not None and schema is not None:
+            _add_distinct_hashes(distinct, chunk, [column for column in schema['datetimes'] if column in chunk.columns])
+        yield schemas.apply_schema(chunk, table, datetime_stats)
+
+def _median_from_counts(value_counts):
+    """
+    Calcula la mediana exacta a partir de la frecuencia de cada valor, igual que `Series.median()`.
+    """
+    if value_counts is None or value_counts.empty:
+        return float('nan')
+    value_counts = value_counts.sort_index()
+    cumulative = value_counts.cumsum().to_numpy()
+    values = value_counts.index.to_numpy(dtype='float64')
+    total = cumulative[-1]
+    lower = values[np.searchsorted(cumulative, (total - 1) // 2, side='right')]
+    upper = values[np.searchsorted(cumulative, total // 2, side='right')]
+    return float((lower + upper) / 2)
+
+def _create_column_sketches(dtype):
+    """
+    Crea los sketches de perfil de una columna: valores distintos y más frecuentes y, si es numérica,
+    sus cuantiles.
+    """
+    return {
+        'distinct': sketches.hyperloglog_for_error(),
+        'frequent': sketches.frequent_items_for_error(),
+        'quantiles': sketches.tdigest_for_error() if pd.api.types.is_numeric_dtype(dtype) else None,
+    }
+
+@metrics.timed
+def exploratory_analysis_chunked(conn, tables, chunk_size=CHUNK_SIZE, use_sketches=SKETCHES):
+    """
+    Versión por bloques del análisis exploratorio para tablas que no caben en memoria.
+    En una sola pasada por tabla cuenta filas y nulos por columna y calcula la huella de 128 bits de cada
+    fila y de su clave primaria (ver `dedup.py`). Con las huellas se marca qué filas se conservan
+    (primera aparición de cada fila y de cada clave), sin guardar los DataFrames.
+    Con `use_sketches` se actualizan además, en la misma pasada, los sketches de cada columna
+    (ver `sketches.py`), que sirven para el perfil del reporte y para las medianas de imputación.
+    """
+    print("Realizando análisis exploratorio por bloques...")
+    analysis_results = {}
+
+    for table in tables:
+        print(f"Analizando tabla: {table}")
+        total_rows = 0
+        data_types = None
+        column_nulls = None
+        key = []
+        row_deduplicator = dedup.StreamingDeduplicator()
+        key_deduplicator = None
+        column_sketches = None
+        datetime_stats = {}
+        datetime_distinct = {}
 
-        # Estadísticas básicas
-        total_rows = len(df)
-        null_values = df.isnull().sum().sum()
-        duplicated_rows = df.duplicated().sum()
+        with metrics.measure('scan_table', table=table) as record:
+            for chunk in iter_table_chunks(conn, table, chunk_size, datetime_stats=datetime_stats,
+                                           distinct=datetime_distinct):
+                if data_types is None:
+                    data_types = chunk.dtypes.to_dict()
+                    column_nulls = pd.Series(0, index=chunk.columns, dtype='int64')
+                    key = schemas.primary_key(table, chunk.columns)
+                    if key:
+                        key_deduplicator = dedup.StreamingDeduplicator(subset=key)
+                    if use_sketches:
+                        column_sketches = {column: _create_column_sketches(dtype) for column, dtype in data_types.items()}
+                total_rows += len(chunk)
+                column_nulls += chunk.isnull().sum()
+                row_deduplicator.add(chunk)
+                if key_deduplicator is not None:
+                    key_deduplicator.add(chunk)
+                if column_sketches is not None:
+                    for column, sketch in column_sketches.items():
+                        sketch['distinct'].update(chunk[column])
+                        sketch['frequent'].update(chunk[column])
+                        if sketch['quantiles'] is not None:
+                            sketch['quantiles'].update(chunk[column])
+            record['rows'] = total_rows
+        _set_distinct_counts(datetime_stats, datetime_distinct)
 
-        # Tipos de datos
-        data_types = df.dtypes.to_dict()
+        with metrics.measure('resolve_duplicates', table=table, rows=total_rows):
+            duplicated, dedup_stats = row_deduplicator.finish()
+            dedup_lines = [dedup.describe(dedup_stats, 'de filas')]
+            keep_mask = ~duplicated
+            key_duplicated_rows = 0
+            if key_deduplicator is not None:
+                key_duplicated, key_stats = key_deduplicator.finish(keep=keep_mask)
+                dedup_lines.append(dedup.describe(key_stats, f"por clave ({', '.join(key)})"))
+                key_duplicated_rows = key_stats['duplicates']
+                keep_mask &= ~key_duplicated
 
-        # Almacenar resultados
+        null_values = int(column_nulls.sum()) if column_nulls is not None else 0
+        duplicated_rows = int(duplicated.sum())
         analysis_results[table] = {
             'total_rows': total_rows,
             'null_values': null_values,
             'duplicated_rows': duplicated_rows,
-            'data_types': data_types,
-            'dataframe': df  # Guardamos el DataFrame para procesamiento posterior
+            'data_types': data_types or {},
+            'column_nulls': column_nulls,
+            'primary_key': key,
+            'key_duplicated_rows': key_duplicated_rows,
+            'keep_mask': keep_mask,
+            'dedup': dedup_lines,
+            'datetime_stats': datetime_stats,
+            'sketches': column_sketches,
         }
 
         print(f"  - Filas totales: {total_rows}")
@@ -79,89 +638,142 @@ def exploratory_analysis(conn, tables):
 
     return analysis_results
 
-def clean_data(analysis_results):
+@metrics.timed
+def clean_data_chunked(conn, analysis_results, chunk_size=CHUNK_SIZE):
     """
-    Limpia y transforma los datos según los problemas identificados.
+    Versión por bloques de la limpieza: la memoria depende del tamaño del bloque y no del de la tabla.
+    Para cada tabla, una pasada previa sobre las columnas numéricas con nulos (solo las filas que se
+    conservan) cuenta la frecuencia de sus valores para obtener las medianas exactas; si el análisis
+    trae sketches, las medianas se estiman con su t-digest y esa pasada se omite. Después cada bloque
+    se deduplica con la máscara del análisis, se imputa, se transforma y se escribe directamente en
+    cleaned_data.db. Aplica las mismas operaciones que `clean_data`.
+    Devuelve las operaciones realizadas, una muestra de cada tabla y la ruta de la base de datos generada.
     """
-    print("Iniciando proceso de limpieza de datos...")
-    cleaned_results = {}
+    print("Iniciando proceso de limpieza de datos por bloques...")
+    os.makedirs('src/static/db', exist_ok=True)
+    db_path = 'src/static/db/cleaned_data.db'
+    if os.path.exists(db_path):
+        print(f"Eliminando base de datos existente en {db_path}...")
+        os.remove(db_path)
+    out_conn = sqlite_writer.connect(db_path)
+    use_columnar = columnar.is_enabled()
+    if use_columnar:
+        columnar.remove_stage('cleaned')
+
     cleaning_operations = {}
+    cleaned_samples = {}
 
     for table, data in analysis_results.items():
         print(f"Limpiando tabla: {table}")
-        df = data['dataframe'].copy()
         operations = []
+        keep_mask = data['keep_mask']
 
-        # 1. Eliminar duplicados
-        initial_rows = len(df)
-        df = df.drop_duplicates()
-        duplicates_removed = initial_rows - len(df)
-        if duplicates_removed > 0:
-            operations.append(f"Se eliminaron {duplicates_removed} filas duplicadas")
+        # 1. Eliminar duplicados (filas y claves primarias repetidas, según los hashes del análisis)
+        if data['duplicated_rows'] > 0:
+            operations.append(f"Se eliminaron {data['duplicated_rows']} filas duplicadas")
+        if data['key_duplicated_rows'] > 0:
+            operations.append(f"Se eliminaron {data['key_duplicated_rows']} filas con clave primaria "
+                              f"({', '.join(data['primary_key'])}) repetida")
 
-        # 2. Manejo de valores nulos
-        null_counts_before = df.isnull().sum()
+        # 2. Manejo de valores nulos: medianas sobre las filas conservadas (o estimadas con sketches)
+        null_columns = [column for column, count in data['column_nulls'].items() if count > 0] \
+            if data['column_nulls'] is not None else []
+        numeric_columns = [column for column in null_columns
+                           if pd.api.types.is_numeric_dtype(data['data_types'][column])]
+        if data.get('sketches'):
+            def median_of(column):
+                return data['sketches'][column]['quantiles'].quantile(0.5)
+        else:
+            value_counts = {}
+            if numeric_columns:
+                with metrics.measure('median_pass', table=table, rows=int(keep_mask.sum())):
+                    offset = 0
+                    for chunk in iter_table_chunks(conn, table, chunk_size, columns=numeric_columns):
+                        rows_in_chunk = len(chunk)
+                        chunk = chunk[keep_mask[offset:offset + rows_in_chunk]]
+                        offset += rows_in_chunk
+                        for column in numeric_columns:
+                            counts = chunk[column].value_counts()
+                            value_counts[column] = counts if column not in value_counts \
+                                else value_counts[column].add(counts, fill_value=0)
 
-        # Para cada columna con valores nulos, aplicar una estrategia de imputación
-        for column in df.columns:
-            null_count = null_counts_before[column]
-            if null_count > 0:
-                # Estrategia según el tipo de dato
-                if pd.api.types.is_numeric_dtype(df[column]):
-                    # Para datos numéricos, usar la mediana
-                    median_value = df[column].median()
-                    df[column] = df[column].fillna(median_value)
-                    operations.append(f"Se imputaron {null_count} valores nulos en '{column}' con la mediana ({median_value})")
-                elif pd.api.types.is_datetime64_dtype(df[column]):
-                    # Para fechas, usar la fecha más frecuente
-                    mode_value = df[column].mode()[0]
-                    df[column] = df[column].fillna(mode_value)
-                    operations.append(f"Se imputaron {null_count} valores nulos en '{column}' con la moda")
-                else:
-                    # Para strings y otros tipos, usar 'DESCONOCIDO'
-                    df[column] = df[column].fillna('DESCONOCIDO')
-                    operations.append(f"Se imputaron {null_count} valores nulos en '{column}' con 'DESCONOCIDO'")
-
-        # 3. Corrección de tipos de datos
-        # Convertir columnas de fechas a datetime si tienen el formato adecuado
-        date_columns = [col for col in df.columns if 'date' in col.lower() or 'time' in col.lower()]
-        for col in date_columns:
-            if not pd.api.types.is_datetime64_dtype(df[col]) and df[col].dtype == 'object':
-                try:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
-                    operations.append(f"Se convirtió la columna '{col}' a tipo datetime")
-                except:
-                    operations.append(f"No se pudo convertir la columna '{col}' a tipo datetime")
+            def median_of(column):
+                return _median_from_counts(value_counts.get(column))
+        fill_values, _ = plan_imputation(data['data_types'], data['column_nulls'], median_of)
 
-        # 4. Transformaciones adicionales específicas según la tabla
-        if table == 'olist_order_items_dataset':
-            # Normalizar precios (por ejemplo, convertir a dólares si están en otra moneda)
-            if 'price' in df.columns:
-                df['price_normalized'] = df['price'] / 5.0  # Ejemplo: conversión a USD (asumiendo BRL)
-                operations.append("Se normalizó la columna 'price' creando 'price_normalized'")
-
-        elif table == 'olist_products_dataset':
-            # Estandarizar nombres de categorías
-            if 'product_category_name' in df.columns:
-                df['product_category_name'] = df['product_category_name'].str.lower().str.replace('_', ' ')
-                operations.append("Se estandarizaron los nombres de categorías de productos")
-
-        elif table == 'olist_order_reviews_dataset':
-            # Categorizar las puntuaciones de reseñas
-            if 'review_score' in df.columns:
-                bins = [0, 2, 3, 5]
-                labels = ['Negativa', 'Neutral', 'Positiva']
-                df['review_sentiment'] = pd.cut(df['review_score'], bins=bins, labels=labels)
-                operations.append("Se categorizaron las puntuaciones de reseñas en sentimientos")
-
-        # Guardar resultados
-        cleaned_results[table] = df
-        cleaning_operations[table] = operations
+        # 3 y 4. Imputar, convertir tipos y transformar cada bloque, escribiéndolo en la base de datos
+        clean_table_name = f"clean_{table}"
+        columnar_writer = columnar.TableWriter('cleaned', clean_table_name) if use_columnar else None
+        table_operations = []
+        first_chunk = True
+        null_counts = pd.Series(0, index=list(data['data_types']), dtype='int64')
+        total_rows = 0
+        offset = 0
+        date_distinct = {}
+        db_size = sqlite_writer.database_bytes(out_conn)
+        with metrics.measure('clean_and_write_chunks', table=table) as record:
+            with sqlite_writer.transaction(out_conn):
+                for chunk in iter_table_chunks(conn, table, chunk_size):
+                    rows_in_chunk = len(chunk)
+                    chunk = chunk[keep_mask[offset:offset + rows_in_chunk]].reset_index(drop=True)
+                    offset += rows_in_chunk
+                    if null_columns:
+                        null_counts[null_columns] += chunk[null_columns].isnull().sum()
+                    apply_imputation(chunk, fill_values)
+                    chunk_operations = convert_date_columns(chunk, table, data['datetime_stats'], date_distinct)
+                    chunk_operations += apply_table_transformations(chunk, table)
+                    if first_chunk:
+                        first_chunk = False
+                        table_operations = chunk_operations
+                        sqlite_writer.create_table(out_conn, clean_table_name, chunk,
+                                                   schemas.primary_key(table, chunk.columns))
+                    sqlite_writer.insert_dataframe(out_conn, clean_table_name, chunk)
+                    if columnar_writer is not None:
+                        columnar_writer.write(chunk)
+                    total_rows += len(chunk)
+            record.update(rows=total_rows, bytes_written=sqlite_writer.database_bytes(out_conn) - db_size)
+        _set_distinct_counts(data['datetime_stats'], date_distinct)
+        if columnar_writer is not None:
+            columnar_writer.close()
+
+        # Las operaciones de imputación se describen con los nulos contados en las filas conservadas
+        _, imputation_operations = plan_imputation(data['data_types'], null_counts, median_of)
+        operations.extend(imputation_operations)
+        operations.extend(table_operations)
+        if data.get('sketches'):
+            data['approximations'] = [
+                f"Mediana de '{column}' estimada con {data['sketches'][column]['quantiles'].describe()}"
+                for column in numeric_columns if null_counts[column] > 0
+            ]
 
+        cleaning_operations[table] = operations
+        cleaned_samples[table] = pd.read_sql_query(
+            f"SELECT * FROM {schemas.quote_identifier(clean_table_name)} ORDER BY RANDOM() LIMIT 100", out_conn
+        )
         print(f"  - Operaciones realizadas: {len(operations)}")
 
-    return cleaned_results, cleaning_operations
+    with metrics.measure('finish_database'):
+        sqlite_writer.finish(out_conn, [f"clean_{table}" for table in analysis_results])
+    out_conn.close()
+    print(f"Base de datos con datos limpios generada en: {db_path}")
+    return cleaning_operations, cleaned_samples, db_path
 
+@metrics.timed
+def summarize_cleaned(db_path, tables):
+    """
+    Resume cada tabla limpia (registros, valores nulos y perfil de columnas) para el reporte de auditoría
+    con una consulta SQL de agregados por tabla sobre cleaned_data.db (`audit.table_profile`),
+    sin volver a cargar las tablas en memoria.
+    """
+    profiles = audit.database_profile(db_path, [f"clean_{table}" for table in tables])
+    return {
+        table: {'total_rows': profiles[f"clean_{table}"]['rows'],
+                'null_values': profiles[f"clean_{table}"]['null_values'],
+                'profile': profiles[f"clean_{table}"]}
+        for table in tables
+    }
+
+@metrics.timed
 def export_cleaned_data(cleaned_results):
     """
     Exporta los datos limpios a un archivo Excel o CSV.
@@ -193,9 +805,11 @@ def export_cleaned_data(cleaned_results):
     else:
         print("No se pudo generar el archivo de datos limpios.")
 
-def generate_audit_report(analysis_results, cleaned_results, cleaning_operations):
+@metrics.timed
+def generate_audit_report(analysis_results, cleaned_summary, cleaning_operations):
     """
     Genera un archivo de auditoría que documenta las operaciones realizadas.
+    `cleaned_summary` contiene los registros, valores nulos y perfil de cada tabla limpia (ver `summarize_cleaned`).
     """
     print("Generando reporte de auditoría...")
     os.makedirs('src/static/auditoria', exist_ok=True)
@@ -205,9 +819,9 @@ def generate_audit_report(analysis_results, cleaned_results, cleaning_operations
 
     # Resumen general
     total_initial_records = sum(data['total_rows'] for data in analysis_results.values())
-    total_final_records = sum(len(df) for df in cleaned_results.values())
+    total_final_records = sum(data['total_rows'] for data in cleaned_summary.values())
     total_nulls_before = sum(data['null_values'] for data in analysis_results.values())
-    total_nulls_after = sum(df.isnull().sum().sum() for df in cleaned_results.values())
+    total_nulls_after = sum(data['null_values'] for data in cleaned_summary.values())
 
     audit_lines.append(f"RESUMEN GENERAL:")
     audit_lines.append(f"- Registros antes de la limpieza: {total_initial_records}")
@@ -215,26 +829,67 @@ def generate_audit_report(analysis_results, cleaned_results, cleaning_operations
     audit_lines.append(f"- Valores nulos antes de la limpieza: {total_nulls_before}")
     audit_lines.append(f"- Valores nulos después de la limpieza: {total_nulls_after}")
     audit_lines.append(f"- Registros eliminados: {total_initial_records - total_final_records}")
+    audit_lines.append(f"- Filas con clave primaria repetida eliminadas: "
+                       f"{sum(data.get('key_duplicated_rows', 0) for data in analysis_results.values())}")
     audit_lines.append(f"- Valores nulos tratados: {total_nulls_before - total_nulls_after}")
     audit_lines.append("")
 
+    # Estadísticas aproximadas (solo con BIGDATA_CLEANING_SKETCHES=1)
+    if any(data.get('sketches') for data in analysis_results.values()):
+        audit_lines.append("APROXIMACIONES UTILIZADAS:")
+        audit_lines.append(f"- Error relativo objetivo de los sketches: {sketches.SKETCH_ERROR:.2%} (BIGDATA_SKETCH_ERROR)")
+        audit_lines.append(f"- Medianas de imputación: t-digest (compresión {sketches.tdigest_for_error().compression})"
+                           ", estimadas sobre todas las filas leídas, antes de eliminar duplicados")
+        audit_lines.append(f"- Valores distintos por columna: {sketches.hyperloglog_for_error().describe()}")
+        audit_lines.append(f"- Valores más frecuentes por columna: Misra-Gries con "
+                           f"{sketches.frequent_items_for_error().capacity} contadores")
+        audit_lines.append("- Los conteos de filas, nulos y duplicados son exactos")
+        audit_lines.append("")
+
     # Detalle por tabla
     audit_lines.append("DETALLE POR TABLA:")
     for table in analysis_results.keys():
         initial_data = analysis_results[table]
-        final_data = cleaned_results[table]
+        final_data = cleaned_summary[table]
         operations = cleaning_operations[table]
 
         audit_lines.append(f"\nTabla: {table}")
         audit_lines.append(f"- Registros antes: {initial_data['total_rows']}")
-        audit_lines.append(f"- Registros después: {len(final_data)}")
+        audit_lines.append(f"- Registros después: {final_data['total_rows']}")
         audit_lines.append(f"- Valores nulos antes: {initial_data['null_values']}")
-        audit_lines.append(f"- Valores nulos después: {final_data.isnull().sum().sum()}")
+        audit_lines.append(f"- Valores nulos después: {final_data['null_values']}")
+        audit_lines.append(f"- Filas duplicadas eliminadas: {initial_data['duplicated_rows']}")
+        if initial_data.get('primary_key'):
+            audit_lines.append(f"- Filas con clave primaria ({', '.join(initial_data['primary_key'])}) repetida "
+                               f"eliminadas: {initial_data['key_duplicated_rows']}")
 
         audit_lines.append("\nOperaciones realizadas:")
         for op in operations:
             audit_lines.append(f"  * {op}")
 
+        if final_data.get('profile'):
+            audit_lines.append("\nPerfil de la tabla limpia:")
+            for line in audit.describe_columns(final_data['profile']):
+                audit_lines.append(f"  * {line}")
+
+        audit_lines.append("\nDetección de duplicados:")
+        for line in initial_data.get('dedup', []):
+            audit_lines.append(f"  * {line}")
+
+        if initial_data.get('datetime_stats'):
+            audit_lines.append("\nConversión de fechas:")
+            for column, column_stats in initial_data['datetime_stats'].items():
+                audit_lines.append(f"  * {schemas.describe_datetime_stats(column, column_stats)}")
+
+        if initial_data.get('sketches'):
+            audit_lines.append("\nPerfil aproximado de columnas:")
+            for column, column_sketches in initial_data['sketches'].items():
+                top_values = ", ".join(f"{value} ({count})" for value, count in column_sketches['frequent'].top(3))
+                audit_lines.append(f"  * {column}: ~{column_sketches['distinct'].count()} valores distintos; "
+                                   f"más frecuentes: {top_values or '-'}")
+            for approximation in initial_data.get('approximations', []):
+                audit_lines.append(f"  * {approximation}")
+
     # Escribir el reporte
     audit_text = "\n".join(audit_lines)
     audit_path = 'src/static/auditoria/cleaning_report.txt'
@@ -244,9 +899,12 @@ def generate_audit_report(analysis_results, cleaned_results, cleaning_operations
     print(f"Archivo de auditoría generado en: {audit_path}")
     return audit_path
 
+@metrics.timed
 def save_cleaned_data_to_db(cleaned_results):
     """
     Guarda los datos limpios en una nueva base de datos SQLite.
+    Cada tabla se crea con los tipos SQLite de sus columnas y la clave primaria del registro de esquemas.
+    Si los identificadores están codificados, se guardan sus códigos y la tabla del diccionario.
     """
     print("Guardando datos limpios en base de datos...")
     os.makedirs('src/static/db', exist_ok=True)
@@ -257,20 +915,90 @@ def save_cleaned_data_to_db(cleaned_results):
         print(f"Eliminando base de datos existente en {db_path}...")
         os.remove(db_path)
 
-    # Crear nueva conexión
-    conn = sqlite3.connect(db_path)
+    # Crear nueva conexión con la configuración de carga masiva
+    conn = sqlite_writer.connect(db_path)
+
+    # Diccionario de los identificadores codificados (vacío si no se codificaron)
+    id_dictionary = id_codec.frames_dictionary(cleaned_results)
+    if id_dictionary:
+        with metrics.measure('write_id_dictionary', rows=sum(len(dtype.categories) for dtype in id_dictionary.values())):
+            id_codec.write_dictionary(conn, id_dictionary)
 
     # Guardar cada DataFrame limpio como una tabla
     for table_name, df in cleaned_results.items():
         clean_table_name = f"clean_{table_name}"
         print(f"Guardando tabla limpia: {clean_table_name}")
-        df.to_sql(clean_table_name, conn, if_exists="replace", index=False)
+        db_size = sqlite_writer.database_bytes(conn)
+        with metrics.measure('write_table', table=clean_table_name, rows=len(df)) as record:
+            sqlite_writer.write_table(conn, clean_table_name, id_codec.to_codes(df, id_dictionary),
+                                      schemas.primary_key(table_name, df.columns))
+            record['bytes_written'] = sqlite_writer.database_bytes(conn) - db_size
 
+    # Índices de las columnas clave y estadísticas del planificador, después de la carga
+    with metrics.measure('finish_database'):
+        sqlite_writer.finish(conn, [f"clean_{table_name}" for table_name in cleaned_results])
     conn.close()
     print(f"Base de datos con datos limpios generada en: {db_path}")
+
+    # Copia columnar para la etapa de enriquecimiento
+    if columnar.is_enabled():
+        columnar.remove_stage('cleaned')
+        for table_name, df in cleaned_results.items():
+            columnar.write_table(df, 'cleaned', f"clean_{table_name}")
+        print(f"Copia columnar de los datos limpios generada en: {columnar.COLUMNAR_DIR}/cleaned")
     return db_path
 
-def main():
+def write_audit(analysis_results, cleaning_operations, cleaned_db_path):
+    """
+    Genera el reporte de auditoría de la limpieza a partir de la base de datos limpia ya guardada.
+    """
+    # Registros, nulos y perfil de las tablas limpias, calculados en SQL
+    cleaned_summary = summarize_cleaned(cleaned_db_path, list(analysis_results))
+
+    # Generar reporte de auditoría
+    audit_path = generate_audit_report(analysis_results, cleaned_summary, cleaning_operations)
+
+    # Actualizar el reporte de auditoría con información sobre la base de datos
+    with open(audit_path, 'a', encoding='utf-8') as f:
+        f.write(f"\n\nDATOS LIMPIOS GUARDADOS EN BASE DE DATOS:")
+        f.write(f"\n- Ruta: {cleaned_db_path}")
+        f.write(f"\n- Tablas generadas: {', '.join([f'clean_{table}' for table in cleaned_summary.keys()])}")
+    return audit_path
+
+def persist_cleaned_data(analysis_results, cleaned_results, cleaning_operations):
+    """
+    Tarea del hilo en segundo plano de pipeline.py: guarda la base de datos limpia y genera el reporte
+    de auditoría. Devuelve la ruta de la base de datos y las mediciones de la tarea, que el proceso
+    principal añade a las métricas de la etapa.
+    """
+    metrics.start_stage('cleaning', profile='')
+    try:
+        cleaned_db_path = save_cleaned_data_to_db(cleaned_results)
+        write_audit(analysis_results, cleaning_operations, cleaned_db_path)
+    finally:
+        stage = metrics.detach_stage()
+    return cleaned_db_path, stage.records
+
+def _finish_background_stage(stage, pending):
+    """
+    Cierra las métricas de la etapa cuando termina la persistencia en segundo plano, con sus mediciones.
+    """
+    if pending.exception() is not None:
+        print(f"Error en el proceso de limpieza: {pending.exception()}")
+    else:
+        stage.records.extend(pending.result()[1])
+        print("Proceso de limpieza completado exitosamente (base de datos guardada en segundo plano).")
+    stage.finish()
+
+def main(background=None):
+    """
+    Función principal que ejecuta el proceso de limpieza. Devuelve el catálogo de las tablas limpias
+    (`catalog.TableCatalog`), con las tablas en memoria si se limpiaron completas.
+    Con `background` (el ThreadPoolExecutor de pipeline.py) la base de datos limpia y el reporte de
+    auditoría se escriben en un hilo en segundo plano: el catálogo se devuelve en cuanto termina la limpieza y
+    la etapa siguiente puede empezar mientras tanto.
+    """
+    metrics.start_stage('cleaning')
     try:
 
         # Limpiar archivos anteriores
@@ -282,35 +1010,60 @@ def main():
         # Obtener nombres de tablas
         tables = get_table_names(conn)
 
-        # Análisis exploratorio
-        analysis_results = exploratory_analysis(conn, tables)
+        cleaned_frames = None
+        if CHUNKED or SKETCHES:
+            # Análisis exploratorio y limpieza por bloques, escribiendo directamente en la base de datos
+            analysis_results = exploratory_analysis_chunked(conn, tables)
+            cleaning_operations, cleaned_samples, cleaned_db_path = clean_data_chunked(conn, analysis_results)
 
-        # Limpieza de datos
-        cleaned_results, cleaning_operations = clean_data(analysis_results)
+            # Exportar una muestra de los datos limpios
+            export_cleaned_data(cleaned_samples)
+        else:
+            if WORKERS != 1:
+                # Análisis exploratorio y limpieza de las tablas en varios procesos
+                analysis_results, cleaned_results, cleaning_operations = clean_data_parallel(conn, tables)
+            else:
+                # Análisis exploratorio
+                analysis_results = exploratory_analysis(conn, tables)
 
-        # Exportar datos limpios a Excel
-        export_cleaned_data(cleaned_results)
+                # Limpieza de datos
+                cleaned_results, cleaning_operations = clean_data(analysis_results)
+            cleaned_frames = {f"clean_{table}": df for table, df in cleaned_results.items()}
 
-        # Guardar datos limpios en base de datos
-        cleaned_db_path = save_cleaned_data_to_db(cleaned_results)
+            # Exportar datos limpios a Excel
+            export_cleaned_data(cleaned_results)
+
+            if background is not None:
+                # La base de datos y el reporte se escriben en otro hilo, con las mismas tablas en memoria (sin
+                # copiarlas); al reporte no se le pasan las tablas originales ni las máscaras de duplicados
+                conn.close()
+                audit_results = {table: audit_entry(data) for table, data in analysis_results.items()}
+                stage = metrics.detach_stage()
+                pending = background.submit(persist_cleaned_data, audit_results, cleaned_results, cleaning_operations)
+                pending.add_done_callback(functools.partial(_finish_background_stage, stage))
+                print("Guardando la base de datos limpia en segundo plano...")
+                return catalog.TableCatalog('src/static/db/cleaned_data.db', 'cleaned',
+                                            frames=cleaned_frames, pending=pending)
 
-        # Generar reporte de auditoría
-        audit_path = generate_audit_report(analysis_results, cleaned_results, cleaning_operations)
+            # Guardar datos limpios en base de datos
+            cleaned_db_path = save_cleaned_data_to_db(cleaned_results)
 
-        # Actualizar el reporte de auditoría con información sobre la base de datos
-        with open(audit_path, 'a', encoding='utf-8') as f:
-            f.write(f"\n\nDATOS LIMPIOS GUARDADOS EN BASE DE DATOS:")
-            f.write(f"\n- Ruta: {cleaned_db_path}")
-            f.write(f"\n- Tablas generadas: {', '.join([f'clean_{table}' for table in cleaned_results.keys()])}")
+        # Reporte de auditoría con los registros, nulos y perfil de las tablas limpias
+        write_audit(analysis_results, cleaning_operations, cleaned_db_path)
 
         # Cerrar conexión
         conn.close()
 
         print("Proceso de limpieza completado exitosamente.")
+        return catalog.TableCatalog(cleaned_db_path, 'cleaned', frames=cleaned_frames)
 
     except Exception as e:
         print(f"Error en el proceso de limpieza: {e}")
         raise
+    finally:
+        # Métricas de tiempo, CPU, memoria, filas y bytes de la etapa (con la persistencia en segundo
+        # plano las escribe `_finish_background_stage`)
+        metrics.finish_stage()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
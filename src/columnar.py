@@ -0,0 +1,174 @@
+import os
+import numpy as np
+import pandas as pd
+import schemas
+
+# Almacenamiento columnar intermedio (Parquet, un archivo por tabla) entre las etapas del pipeline.
+# Es opcional: requiere pyarrow (pip install -e .[columnar]) y se activa con BIGDATA_COLUMNAR=1.
+# Las bases de datos SQLite siguen siendo los artefactos publicados de cada etapa.
+COLUMNAR_DIR = 'src/static/parquet'
+ENABLED = os.environ.get('BIGDATA_COLUMNAR', '0') == '1'
+
+# pyarrow.parquet tarda en importarse, así que se importa la primera vez que se usa (ver `pyarrow`)
+_pyarrow = None
+_pyarrow_checked = False
+
+def pyarrow():
+    """
+    Devuelve el módulo pyarrow (con pyarrow.parquet cargado), importándolo la primera vez que se llama,
+    o None si no está instalado.
+    """
+    global _pyarrow, _pyarrow_checked
+    if not _pyarrow_checked:
+        _pyarrow_checked = True
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet  # deja disponible pa.parquet
+            _pyarrow = pa
+        except ImportError:
+            _pyarrow = None
+    return _pyarrow
+
+def is_enabled():
+    """
+    Indica si el almacenamiento columnar está activado y pyarrow está disponible.
+    """
+    if ENABLED and pyarrow() is None:
+        print("BIGDATA_COLUMNAR=1 pero pyarrow no está instalado; se usará solo SQLite.")
+    return ENABLED and pyarrow() is not None
+
+def table_path(stage, table_name):
+    """
+    Devuelve la ruta del archivo Parquet de una tabla en una etapa ('ingestion', 'cleaned', ...).
+    """
+    return os.path.join(COLUMNAR_DIR, stage, f"{table_name}.parquet")
+
+def exists(stage, table_name):
+    """
+    Indica si existe la copia columnar de una tabla en la etapa indicada.
+    """
+    return os.path.exists(table_path(stage, table_name))
+
+def list_tables(stage):
+    """
+    Devuelve los nombres de las tablas con copia columnar en la etapa indicada.
+    """
+    stage_dir = os.path.join(COLUMNAR_DIR, stage)
+    if not os.path.isdir(stage_dir):
+        return []
+    return sorted(os.path.splitext(f)[0] for f in os.listdir(stage_dir) if f.endswith('.parquet'))
+
+def remove_stage(stage):
+    """
+    Elimina todas las tablas columnares de una etapa.
+    """
+    for table_name in list_tables(stage):
+        os.remove(table_path(stage, table_name))
+
+def remove_table(stage, table_name):
+    """
+    Elimina la copia columnar de una tabla si existe.
+    """
+    if exists(stage, table_name):
+        os.remove(table_path(stage, table_name))
+
+def write_table(df, stage, table_name):
+    """
+    Guarda un DataFrame completo como Parquet, conservando sus tipos (categorías, fechas, enteros).
+    """
+    path = table_path(stage, table_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_parquet(path, engine='pyarrow', index=False)
+    return path
+
+def read_table(stage, table_name, columns=None, memory_map=True):
+    """
+    Lee una tabla columnar leyendo solo las columnas indicadas (todas si `columns` es None).
+    La conversión a pandas se hace por columnas, sin pasar por filas de Python.
+    """
+    table = pyarrow().parquet.read_table(table_path(stage, table_name), columns=columns, memory_map=memory_map)
+    return table.to_pandas()
+
+def iter_table(stage, table_name, batch_size, columns=None):
+    """
+    Recorre una tabla columnar por bloques de `batch_size` filas, devolviendo DataFrames de pandas.
+    """
+    parquet_file = pyarrow().parquet.ParquetFile(table_path(stage, table_name), memory_map=True)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
+
+def registry_type(table_name, column):
+    """
+    Devuelve el tipo Arrow de una columna según el registro de esquemas (`schemas.SCHEMAS`),
+    o None si la columna no está registrada.
+    """
+    pa = pyarrow()
+    schema = schemas.get_schema(table_name)
+    if schema is None:
+        return None
+    if column in schema['datetimes']:
+        return pa.timestamp('ns')
+    dtype = schema['dtypes'].get(column)
+    if dtype is None:
+        return None
+    if dtype == 'category':
+        return pa.dictionary(pa.int32(), pa.string())
+    if dtype == 'str':
+        return pa.string()
+    return pa.from_numpy_dtype(np.dtype(dtype.lower()))
+
+class TableWriter:
+    """
+    Escribe una tabla Parquet por bloques: cada bloque de pandas se añade como un row group,
+    de modo que la tabla completa nunca tiene que estar en memoria.
+    """
+
+    def __init__(self, stage, table_name):
+        self.table_name = table_name
+        self.path = table_path(stage, table_name)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._tmp_path = self.path + '.tmp'
+        self._writer = None
+        self._schema = None
+
+    def write(self, chunk):
+        pa = pyarrow()
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._writer is None:
+            fields = [self._field(field, chunk[field.name]) for field in table.schema]
+            self._schema = pa.schema(fields, metadata=table.schema.metadata)
+            self._writer = pa.parquet.ParquetWriter(self._tmp_path, self._schema)
+        table = table.cast(self._schema)
+        self._writer.write_table(table)
+
+    def _field(self, field, series):
+        """
+        Devuelve el campo del esquema Parquet para una columna del primer bloque. Si la columna no tiene
+        ningún valor en ese bloque, pyarrow no puede deducir su tipo (una columna de texto vacía queda como
+        `null`), así que se toma del registro de esquemas o, si no está registrada, se guarda como texto.
+        """
+        pa = pyarrow()
+        field_type = field.type
+        if series.isna().all():
+            field_type = registry_type(self.table_name, field.name)
+            if field_type is None and pa.types.is_null(field.type):
+                field_type = pa.string()
+            elif field_type is None:
+                field_type = pa.dictionary(pa.int32(), pa.string()) if pa.types.is_dictionary(field.type) \
+                    else field.type
+        # Los índices de las columnas categóricas se fijan en int32 porque cada bloque
+        # puede tener un número distinto de categorías
+        if pa.types.is_dictionary(field_type):
+            field_type = pa.dictionary(pa.int32(), field_type.value_type)
+        return pa.field(field.name, field_type)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
@@ -0,0 +1,168 @@
+import os
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Detección de duplicados por huellas (hashes) de fila en lugar de comparar filas completas de texto.
+# Las huellas se calculan vectorizadas con `pd.util.hash_pandas_object` (64 bits) y, para tablas que se
+# procesan por bloques, con una segunda semilla (128 bits). Cuando las huellas no caben en memoria
+# (más de BIGDATA_DEDUP_MEMORY_ROWS filas) se reparten en archivos temporales por cubeta.
+MEMORY_ROWS = int(os.environ.get('BIGDATA_DEDUP_MEMORY_ROWS', 10000000))
+SPILL_BUCKETS = 16
+# Semilla de la segunda mitad de las huellas de 128 bits (hash_pandas_object requiere 16 caracteres)
+SECOND_HASH_KEY = 'olist_dedup_salt'
+
+FINGERPRINT_DTYPE = np.dtype([('high', '<u8'), ('low', '<u8'), ('position', '<i8')])
+
+def fingerprint(df, subset=None, bits=64):
+    """
+    Calcula la huella de cada fila del DataFrame (o de las columnas `subset`) sin comparar valores.
+    Devuelve un array uint64 con una columna por cada 64 bits (forma (filas, bits // 64)).
+    """
+    data = df[list(subset)] if subset is not None else df
+    hashes = [pd.util.hash_pandas_object(data, index=False).to_numpy()]
+    if bits == 128:
+        hashes.append(pd.util.hash_pandas_object(data, index=False, hash_key=SECOND_HASH_KEY).to_numpy())
+    return np.column_stack(hashes)
+
+def find_duplicates(df, subset=None, hashes=None):
+    """
+    Equivalente a `df.duplicated(subset=subset)` usando huellas de 64 bits. Las filas candidatas a
+    duplicado se comparan con la primera fila de su misma huella; si algún valor difiere (colisión),
+    las filas de esa huella se resuelven comparando valores, de modo que el resultado es exacto.
+    `hashes` son las huellas de 64 bits ya calculadas (por ejemplo, por particiones de filas en otros procesos).
+    Devuelve la máscara de filas duplicadas y las estadísticas de la deduplicación.
+    """
+    start_time = time.perf_counter()
+    columns = list(subset) if subset is not None else list(df.columns)
+    if hashes is None:
+        hashes = fingerprint(df, columns)[:, 0]
+    codes, _ = pd.factorize(hashes)
+    # Copia escribible: con copy-on-write (pandas 3) el array de la Serie es de solo lectura
+    duplicated = pd.Series(codes).duplicated().to_numpy(copy=True)
+
+    # Verificación de colisiones: cada candidata contra la primera fila con su huella
+    candidates = np.flatnonzero(duplicated)
+    _, first_rows = np.unique(codes, return_index=True)
+    references = first_rows[codes[candidates]]
+    candidate_values = df[columns].iloc[candidates].reset_index(drop=True)
+    reference_values = df[columns].iloc[references].reset_index(drop=True)
+    different = np.zeros(len(candidates), dtype=bool)
+    for column in columns:
+        left = candidate_values[column]
+        right = reference_values[column]
+        different |= ~((left == right).to_numpy(dtype=bool, na_value=False) | (left.isna() & right.isna()).to_numpy())
+    collided_codes = np.unique(codes[candidates[different]])
+    if len(collided_codes):
+        rows = np.flatnonzero(np.isin(codes, collided_codes))
+        duplicated[rows] = df[columns].iloc[rows].duplicated().to_numpy()
+
+    stats = {
+        'rows': len(df),
+        'duplicates': int(duplicated.sum()),
+        'bits': 64,
+        'collisions': len(collided_codes),
+        'spilled': False,
+        'seconds': time.perf_counter() - start_time,
+    }
+    return duplicated, stats
+
+class StreamingDeduplicator:
+    """
+    Deduplicación por bloques con huellas de 128 bits: cada bloque se añade con `add` y al final
+    `finish` devuelve qué filas (por su posición global) repiten una huella anterior.
+    Si se acumulan más de `memory_rows` huellas, se vuelcan a disco repartidas en cubetas por los primeros
+    bits de la huella, y cada cubeta se resuelve por separado. Se cuentan como colisiones candidatas
+    las huellas que coinciden en los primeros 64 bits y difieren en los 128.
+    """
+
+    def __init__(self, subset=None, memory_rows=MEMORY_ROWS):
+        self.subset = subset
+        self.memory_rows = memory_rows
+        self.rows = 0
+        self.seconds = 0.0
+        self._buffer = []
+        self._buffered_rows = 0
+        self._spill_dir = None
+
+    def add(self, chunk):
+        start_time = time.perf_counter()
+        hashes = fingerprint(chunk, self.subset, bits=128)
+        entries = np.empty(len(chunk), dtype=FINGERPRINT_DTYPE)
+        entries['high'] = hashes[:, 0]
+        entries['low'] = hashes[:, 1]
+        entries['position'] = np.arange(self.rows, self.rows + len(chunk))
+        self.rows += len(chunk)
+        self._buffer.append(entries)
+        self._buffered_rows += len(entries)
+        if self._buffered_rows > self.memory_rows:
+            self._spill()
+        self.seconds += time.perf_counter() - start_time
+
+    def _spill(self):
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix='dedup_')
+        entries = np.concatenate(self._buffer)
+        buckets = (entries['high'] >> np.uint64(60)).astype(np.intp)
+        for bucket in range(SPILL_BUCKETS):
+            with open(os.path.join(self._spill_dir, f'{bucket}.bin'), 'ab') as f:
+                entries[buckets == bucket].tofile(f)
+        self._buffer = []
+        self._buffered_rows = 0
+
+    def _buckets(self):
+        if self._spill_dir is None:
+            yield np.concatenate(self._buffer) if self._buffer else np.empty(0, dtype=FINGERPRINT_DTYPE)
+            return
+        if self._buffer:
+            self._spill()
+        for bucket in range(SPILL_BUCKETS):
+            path = os.path.join(self._spill_dir, f'{bucket}.bin')
+            if os.path.exists(path):
+                yield np.fromfile(path, dtype=FINGERPRINT_DTYPE)
+
+    def finish(self, keep=None):
+        """
+        Devuelve la máscara de filas duplicadas y las estadísticas. Si se indica `keep`, solo se
+        consideran las filas marcadas en esa máscara (por ejemplo, las que quedan tras quitar filas repetidas).
+        """
+        start_time = time.perf_counter()
+        duplicated = np.zeros(self.rows, dtype=bool)
+        collisions = 0
+        spilled = self._spill_dir is not None
+        try:
+            for entries in self._buckets():
+                # Dentro de cada cubeta las huellas están en el orden original de las filas
+                if keep is not None:
+                    entries = entries[keep[entries['position']]]
+                hashes = pd.DataFrame({'high': entries['high'], 'low': entries['low']})
+                bucket_duplicated = hashes.duplicated().to_numpy()
+                duplicated[entries['position'][bucket_duplicated]] = True
+                unique_hashes = hashes[~bucket_duplicated]
+                collisions += len(unique_hashes) - unique_hashes['high'].nunique()
+        finally:
+            if spilled:
+                shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+            self._buffer = []
+        self.seconds += time.perf_counter() - start_time
+        stats = {
+            'rows': self.rows,
+            'duplicates': int(duplicated.sum()),
+            'bits': 128,
+            'collisions': collisions,
+            'spilled': spilled,
+            'seconds': self.seconds,
+        }
+        return duplicated, stats
+
+def describe(stats, label):
+    """
+    Describe en una línea el resultado de una deduplicación para el reporte de auditoría.
+    """
+    spilled = ", con volcado a disco" if stats['spilled'] else ""
+    return (f"Deduplicación {label}: {stats['duplicates']} duplicados de {stats['rows']} filas en "
+            f"{stats['seconds']:.3f} s (huellas de {stats['bits']} bits, "
+            f"{stats['collisions']} colisiones candidatas{spilled})")
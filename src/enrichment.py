@@ -1,205 +1,199 @@
+import re
+import numpy as np
 import pandas as pd
-import sqlite3
 import os
+import time
 from datetime import datetime
-import json
-import xml.etree.ElementTree as ET
-
+import schemas
+import metrics
+import sqlite_writer
+import xlsx_export
+import joins
+import catalog
+import reference_data
+import id_codec
+
+# Motor de la exportación a enriched_data.xlsx: 'stream' (xlsx_export.py: hojas generadas en streaming,
+# en paralelo con BIGDATA_WORKERS) u 'openpyxl' (pandas.ExcelWriter, que arma el libro completo en memoria).
+EXCEL_ENGINE = os.environ.get('BIGDATA_EXCEL_ENGINE', 'stream').lower()
+
+@metrics.timed
 def load_cleaned_data():
     """
-    Carga los datos limpios desde la base de datos SQLite.
+    Abre el catálogo de los datos limpios (`catalog.TableCatalog`). Las tablas no se leen aquí: cada una
+    se carga la primera vez que se usa, solo con las columnas que se piden, desde su copia columnar si
+    está activada, desde la caché Arrow (BIGDATA_TABLE_CACHE=1) o desde SQLite, con los tipos del
+    registro de esquemas.
     """
     print("Cargando datos limpios...")
     db_path = 'src/static/db/cleaned_data.db'
-    conn = sqlite3.connect(db_path)
-
-    # Obtener todas las tablas
-    tables = pd.read_sql_query("SELECT name FROM sqlite_master WHERE type='table'", conn)
-    dataframes = {}
-
-    for table in tables['name']:
-        dataframes[table] = pd.read_sql_query(f"SELECT * FROM {table}", conn)
-        print(f"Tabla {table} cargada: {len(dataframes[table])} registros")
+    cleaned_data = catalog.TableCatalog(db_path, 'cleaned')
+    print(f"Catálogo de datos limpios: {len(cleaned_data)} tablas disponibles")
+    return cleaned_data
 
-    conn.close()
-    return dataframes
-
-def create_additional_data():
+def _table_columns(tables, table, columns):
     """
-    Crea archivos de datos adicionales en diferentes formatos.
+    Devuelve solo las columnas indicadas de una tabla, leyendo únicamente esas columnas si `tables`
+    es un catálogo perezoso.
     """
-    print("Creando archivos de datos adicionales...")
+    if isinstance(tables, catalog.TableCatalog):
+        return tables.table(table, columns)
+    return tables[table][columns]
 
-    # Crear directorios si no existen
-    os.makedirs('src/static/json', exist_ok=True)
-    os.makedirs('src/static/xlsx', exist_ok=True)
-    os.makedirs('src/static/csv', exist_ok=True)
-    os.makedirs('src/static/xml', exist_ok=True)
-    os.makedirs('src/static/html', exist_ok=True)
-    os.makedirs('src/static/txt', exist_ok=True)
-
-    # 1. Crear datos adicionales en JSON
-    product_categories = {
-        "additional_categories": [
-            {"category_id": "CAT001", "category_name": "Electronics", "tax_rate": 0.19},
-            {"category_id": "CAT002", "category_name": "Home & Garden", "tax_rate": 0.16},
-            {"category_id": "CAT003", "category_name": "Fashion", "tax_rate": 0.12}
-        ]
-    }
-
-    with open('src/static/json/additional_data.json', 'w') as f:
-        json.dump(product_categories, f, indent=4)
-
-    # 2. Crear datos adicionales en XLSX
-    shipping_rates = pd.DataFrame({
-        'weight_range': ['0-1kg', '1-2kg', '2-5kg', '5-10kg', '>10kg'],
-        'base_rate': [10.0, 15.0, 25.0, 40.0, 60.0],
-        'express_rate': [20.0, 30.0, 45.0, 70.0, 100.0]
-    })
-    shipping_rates.to_excel('src/static/xlsx/additional_data.xlsx', index=False)
-
-    # 3. Crear datos adicionales en CSV
-    customer_segments = pd.DataFrame({
-        'segment_id': ['S1', 'S2', 'S3', 'S4'],
-        'segment_name': ['Bronze', 'Silver', 'Gold', 'Platinum'],
-        'min_purchase': [0, 1000, 5000, 10000],
-        'discount_rate': [0.00, 0.05, 0.10, 0.15]
-    })
-    customer_segments.to_csv('src/static/csv/additional_data.csv', index=False)
-
-    # 4. Crear datos adicionales en XML
-    root = ET.Element("payment_methods")
-    methods = [
-        {"id": "PM001", "name": "Credit Card", "processing_fee": "2.5"},
-        {"id": "PM002", "name": "Debit Card", "processing_fee": "1.5"},
-        {"id": "PM003", "name": "Bank Transfer", "processing_fee": "0.5"}
-    ]
-
-    for method in methods:
-        elem = ET.SubElement(root, "payment_method")
-        for key, value in method.items():
-            ET.SubElement(elem, key).text = value
-
-    tree = ET.ElementTree(root)
-    tree.write('src/static/xml/additional_data.xml')
-
-    # 5. Crear datos adicionales en HTML
-    html_content = """
-    <table>
-        <tr><th>Delivery Service</th><th>Delivery Time</th><th>Cost Factor</th></tr>
-        <tr><td>Standard</td><td>3-5 days</td><td>1.0</td></tr>
-        <tr><td>Express</td><td>1-2 days</td><td>1.5</td></tr>
-        <tr><td>Same Day</td><td>24 hours</td><td>2.0</td></tr>
-    </table>
+@metrics.timed
+def create_additional_data():
     """
-
-    with open('src/static/html/additional_data.html', 'w') as f:
-        f.write(html_content)
-
-    # 6. Crear datos adicionales en TXT
-    txt_content = """
-    Supplier Ratings:
-    A - Premium Supplier (Discount: 15%)
-    B - Standard Supplier (Discount: 10%)
-    C - Basic Supplier (Discount: 5%)
+    Crea archivos de datos adicionales en diferentes formatos (JSON, XLSX, CSV, XML, HTML y TXT).
+    Las fuentes están registradas en `reference_data.py`; solo se escriben los archivos que faltan o cambiaron.
     """
+    print("Creando archivos de datos adicionales...")
+    return reference_data.create_sources()
 
-    with open('src/static/txt/additional_data.txt', 'w') as f:
-        f.write(txt_content)
-
+@metrics.timed
 def read_additional_sources():
     """
-    Lee las fuentes adicionales en diferentes formatos.
+    Lee las fuentes adicionales en diferentes formatos. Cada fuente solo se interpreta cuando cambia
+    el contenido de su archivo; si no, su tabla se lee de la caché de `reference_data.py`.
     """
     print("Leyendo fuentes adicionales...")
-    additional_data = {}
-
-    # 1. Leer JSON
-    with open('src/static/json/additional_data.json', 'r') as f:
-        additional_data['json_data'] = pd.DataFrame(json.load(f)['additional_categories'])
-
-    # 2. Leer XLSX
-    additional_data['xlsx_data'] = pd.read_excel('src/static/xlsx/additional_data.xlsx')
-
-    # 3. Leer CSV
-    additional_data['csv_data'] = pd.read_csv('src/static/csv/additional_data.csv')
-
-    # 4. Leer XML
-    tree = ET.parse('src/static/xml/additional_data.xml')
-    root = tree.getroot()
-    xml_data = []
-    for method in root.findall('payment_method'):
-        xml_data.append({
-            'id': method.find('id').text,
-            'name': method.find('name').text,
-            'processing_fee': float(method.find('processing_fee').text)
-        })
-    additional_data['xml_data'] = pd.DataFrame(xml_data)
+    return reference_data.load_sources()
 
-    # 5. Leer HTML
-    additional_data['html_data'] = pd.read_html('src/static/html/additional_data.html')[0]
-
-    # 6. Leer TXT
-    with open('src/static/txt/additional_data.txt', 'r') as f:
-        additional_data['txt_data'] = f.read()
+def weight_range_bounds(labels):
+    """
+    Interpreta las etiquetas de rango de peso de las tarifas de envío ('0-1kg', '1-2kg', ..., '>10kg') y
+    devuelve el límite superior de cada rango en gramos (infinito para el último), en el mismo orden.
+    """
+    bounds = []
+    for label in labels:
+        match = re.fullmatch(r'\s*(?:(\d+(?:\.\d+)?)\s*-\s*(\d+(?:\.\d+)?)|>\s*(\d+(?:\.\d+)?))\s*kg\s*', str(label))
+        if match is None:
+            raise ValueError(f"Rango de peso no reconocido: {label!r}")
+        bounds.append(float(match.group(2)) * 1000 if match.group(2) else np.inf)
+    return np.array(bounds)
+
+def order_weights(order_items, products):
+    """
+    Calcula el peso total en gramos de cada orden sumando `product_weight_g` de sus ítems.
+    El peso de cada ítem se toma de productos por índice de `product_id` y se agrega con groupby.
+    Devuelve una Serie indexada por `order_id`.
+    """
+    product_weights = products.set_index('product_id')['product_weight_g']
+    item_weights = pd.Series(joins.lookup_values(order_items['product_id'], product_weights),
+                             index=order_items.index)
+    return item_weights.groupby(order_items['order_id'], observed=True).sum(min_count=1)
 
-    return additional_data
+def weight_ranges(weights, shipping_rates):
+    """
+    Asigna a cada peso (en gramos) la etiqueta de su rango de las tarifas de envío con searchsorted
+    sobre los límites superiores ordenados (cada rango incluye su límite superior). Los pesos
+    desconocidos quedan sin rango.
+    """
+    labels = shipping_rates['weight_range'].to_numpy()
+    bounds = weight_range_bounds(labels)
+    order = np.argsort(bounds, kind='mergesort')
+    weights = np.asarray(weights, dtype='float64')
+    positions = np.searchsorted(bounds[order], weights, side='left')
+    positions = np.where(np.isnan(weights), -1, positions)
+    return pd.api.extensions.take(labels[order], positions, allow_fill=True)
+
+def customer_spend(payments, orders, customers):
+    """
+    Calcula el gasto total de cada cliente (`customer_unique_id`) sumando los pagos de todas sus órdenes.
+    Los pagos se agregan por orden, cada orden toma su cliente por índice de `customer_id` y los
+    importes se agregan por `customer_unique_id`. Devuelve una Serie indexada por `customer_unique_id`.
+    """
+    order_payments = payments.groupby('order_id', observed=True)['payment_value'].sum()
+    order_customers = orders.set_index('order_id')['customer_id']
+    unique_ids = customers.set_index('customer_id')['customer_unique_id']
+    order_unique_ids = joins.lookup_values(joins.lookup_values(order_payments.index.to_series(), order_customers),
+                                           unique_ids)
+    return order_payments.groupby(order_unique_ids, observed=True).sum()
+
+def segment_thresholds(spend, segments):
+    """
+    Asigna a cada gasto el umbral `min_purchase` del segmento que le corresponde (el mayor umbral que no
+    supera el gasto) con searchsorted sobre los umbrales ordenados.
+    """
+    thresholds = np.sort(segments['min_purchase'].to_numpy())
+    positions = np.searchsorted(thresholds, np.asarray(spend, dtype='float64'), side='right') - 1
+    return pd.api.extensions.take(thresholds, positions, allow_fill=True)
 
+@metrics.timed
 def enrich_data(cleaned_data, additional_data):
     """
     Integra los datos limpios con las fuentes adicionales.
+    Las fuentes adicionales tienen una fila por clave, así que cada cruce se resuelve como una búsqueda
+    por índice (`joins.broadcast_lookup`) que añade sus columnas sin copiar la tabla limpia.
+    Las claves de las tarifas de envío y de los segmentos se calculan con agregaciones vectorizadas:
+    el peso total de cada orden a partir de sus ítems y el gasto total de cada cliente a partir de sus pagos.
     """
     print("Enriqueciendo datos...")
     enriched_data = {}
 
     # 1. Enriquecer productos con categorías adicionales
-    products_df = cleaned_data['clean_olist_products_dataset'].copy()
+    products_df = cleaned_data['clean_olist_products_dataset']
     categories_df = additional_data['json_data']
-    enriched_data['products'] = products_df.merge(
-        categories_df,
+    enriched_data['products'] = joins.broadcast_lookup(
+        products_df, categories_df,
         left_on='product_category_name',
-        right_on='category_name',
-        how='left'
+        right_on='category_name'
     )
 
-    # 2. Enriquecer órdenes con información de envío
-    orders_df = cleaned_data['clean_olist_orders_dataset'].copy()
+    # 2. Enriquecer órdenes con información de envío según el peso total de sus productos
+    orders_df = cleaned_data['clean_olist_orders_dataset'].copy(deep=False)
     shipping_df = additional_data['xlsx_data']
-    # Aquí agregarías la lógica para determinar el weight_range
-    orders_df['weight_range'] = '0-1kg'  # Ejemplo simplificado
-    enriched_data['orders'] = orders_df.merge(
-        shipping_df,
-        on='weight_range',
-        how='left'
-    )
-
-    # 3. Enriquecer clientes con segmentos
-    customers_df = cleaned_data['clean_olist_customers_dataset'].copy()
+    weights = order_weights(_table_columns(cleaned_data, 'clean_olist_order_items_dataset', ['order_id', 'product_id']),
+                            enriched_data['products'])
+    orders_df['order_weight_g'] = joins.lookup_values(orders_df['order_id'], weights)
+    orders_df['weight_range'] = weight_ranges(orders_df['order_weight_g'], shipping_df)
+    enriched_data['orders'] = joins.broadcast_lookup(orders_df, shipping_df, left_on='weight_range')
+
+    # 3. Enriquecer clientes con el segmento que corresponde a su gasto total
+    customers_df = cleaned_data['clean_olist_customers_dataset'].copy(deep=False)
     segments_df = additional_data['csv_data']
-    # Aquí agregarías la lógica para calcular min_purchase
-    customers_df['min_purchase'] = 0  # Ejemplo simplificado
-    enriched_data['customers'] = customers_df.merge(
-        segments_df,
-        on='min_purchase',
-        how='left'
-    )
+    spend = customer_spend(_table_columns(cleaned_data, 'clean_olist_order_payments_dataset',
+                                          ['order_id', 'payment_value']), orders_df, customers_df)
+    # Los clientes sin pagos tienen gasto 0 y quedan en el segmento de menor umbral
+    customers_df['total_purchase'] = np.nan_to_num(joins.lookup_values(customers_df['customer_unique_id'], spend))
+    customers_df['min_purchase'] = segment_thresholds(customers_df['total_purchase'], segments_df)
+    enriched_data['customers'] = joins.broadcast_lookup(customers_df, segments_df, left_on='min_purchase')
 
     return enriched_data
 
+@metrics.timed
 def save_results(enriched_data):
     """
     Guarda los resultados del enriquecimiento.
     """
     print("Guardando resultados...")
 
-    # 1. Guardar datos enriquecidos en Excel
+    # 1. Guardar datos enriquecidos en Excel (las tablas que superan el límite de filas de una hoja
+    # se reparten en varias hojas)
     os.makedirs('src/static/xlsx', exist_ok=True)
-    writer = pd.ExcelWriter('src/static/xlsx/enriched_data.xlsx', engine='openpyxl')
-
-    for name, df in enriched_data.items():
-        df.to_excel(writer, sheet_name=name, index=False)
-
-    writer.close()
+    xlsx_path = 'src/static/xlsx/enriched_data.xlsx'
+    if EXCEL_ENGINE == 'openpyxl':
+        sheet_stats = []
+        writer = pd.ExcelWriter(xlsx_path, engine='openpyxl')
+        for sheet_name, name, df in xlsx_export.split_sheets(enriched_data):
+            start_time = time.perf_counter()
+            with metrics.measure('to_excel', table=sheet_name, rows=len(df)):
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+            seconds = time.perf_counter() - start_time
+            sheet_stats.append({'sheet': sheet_name, 'table': name, 'rows': len(df), 'seconds': seconds,
+                                'rows_per_second': len(df) / seconds if seconds > 0 else 0.0})
+        with metrics.measure('excel_close') as record:
+            writer.close()
+            record['bytes_written'] = metrics.file_size(xlsx_path)
+    else:
+        with metrics.measure('export_workbook', rows=sum(len(df) for df in enriched_data.values())) as record:
+            sheet_stats = xlsx_export.export_workbook(enriched_data, xlsx_path)
+            record['bytes_written'] = metrics.file_size(xlsx_path)
+        for stats in sheet_stats:
+            metrics.record('write_sheet_xml', table=stats['sheet'], rows=stats['rows'],
+                           wall_seconds=stats['seconds'])
+    for stats in sheet_stats:
+        print(f"  - Hoja '{stats['sheet']}': {stats['rows']} filas en {stats['seconds']:.2f} s "
+              f"({stats['rows_per_second']:.0f} filas/s)")
 
     # 2. Crear reporte de auditoría
     os.makedirs('src/static/auditoria', exist_ok=True)
@@ -213,15 +207,34 @@ def save_results(enriched_data):
         audit_content += f"\n{name.upper()}:"
         audit_content += f"\n- Registros: {len(df)}"
         audit_content += f"\n- Columnas: {', '.join(df.columns)}"
+        # Distribución de las claves calculadas para los cruces con tarifas de envío y segmentos
+        for column in ('weight_range', 'segment_name'):
+            if column in df.columns:
+                counts = df[column].value_counts(dropna=False)
+                audit_content += f"\n- Registros por {column}: " + ", ".join(
+                    f"{'sin dato' if pd.isna(value) else value} ({count})" for value, count in counts.items())
         audit_content += "\n"
 
+    audit_content += f"\n2. Exportación a Excel ({EXCEL_ENGINE}):\n"
+    for stats in sheet_stats:
+        audit_content += (f"\n- Hoja '{stats['sheet']}': {stats['rows']} filas en {stats['seconds']:.2f} s "
+                          f"({stats['rows_per_second']:.0f} filas/s)")
+    audit_content += "\n"
+
     with open('src/static/auditoria/enriched_report.txt', 'w') as f:
         f.write(audit_content)
 
+@metrics.timed
 def save_final_db(cleaned_data, enriched_data):
     """
     Guarda en una única base de datos las tablas con los nombres finales deseados,
     combinando datos limpios y enriquecidos, y genera el archivo "enriched_data.db".
+    `cleaned_data` es el catálogo de `load_cleaned_data` o un diccionario {tabla: DataFrame}. Con el
+    catálogo solo las tablas enriquecidas se escriben desde pandas y las tablas limpias que no cambian se
+    copian directamente desde su base de datos; con un diccionario, las tablas limpias también se
+    escriben desde sus DataFrames.
+    Si los identificadores de los datos limpios están codificados, las tablas se guardan con los códigos
+    del mismo diccionario, que se guarda junto con las tablas.
     """
     print("Generando la base de datos final con tablas limpias y enriquecidas...")
 
@@ -234,43 +247,83 @@ def save_final_db(cleaned_data, enriched_data):
         print(f"Eliminando base de datos existente en {db_path}...")
         os.remove(db_path)
 
-    # Crear conexión a la base de datos
-    conn = sqlite3.connect(db_path)
+    # Crear conexión a la base de datos con la configuración de carga masiva
+    conn = sqlite_writer.connect(db_path)
+    from_catalog = isinstance(cleaned_data, catalog.TableCatalog)
+    id_dictionary = (cleaned_data.id_dictionary if from_catalog else id_codec.frames_dictionary(cleaned_data)) or {}
 
-    # Mapeo de nombre de tabla final -> DataFrame de origen
-    # En este mapeo se indica qué tablas se guardan enriquecidas y cuáles se mantienen limpias
-    final_tables = {
-        # Tablas enriquecidas
+    # Tablas enriquecidas: se escriben desde sus DataFrames
+    enriched_tables = {
         "enriched_olist_customers_dataset": enriched_data["customers"],
         "enriched_olist_orders_dataset": enriched_data["orders"],
         "enriched_olist_products_dataset": enriched_data["products"],
-
-        # Tablas limpias (ya reprocesadas en otro .py)
-        "clean_olist_geolocation_dataset": cleaned_data["clean_olist_geolocation_dataset"],
-        "clean_olist_order_items_dataset": cleaned_data["clean_olist_order_items_dataset"],
-        "clean_olist_order_payments_dataset": cleaned_data["clean_olist_order_payments_dataset"],
-        "clean_olist_order_reviews_dataset": cleaned_data["clean_olist_order_reviews_dataset"],
-        "clean_olist_sellers_dataset": cleaned_data["clean_olist_sellers_dataset"],
-        "clean_product_category_name_translation": cleaned_data["clean_product_category_name_translation"]
     }
+    # Tablas limpias sin cambios: se copian desde cleaned_data.db dentro de SQLite, sin cargarlas en pandas
+    # (o, si los datos limpios son un diccionario de DataFrames, se escriben desde ellos)
+    clean_tables = [
+        "clean_olist_geolocation_dataset",
+        "clean_olist_order_items_dataset",
+        "clean_olist_order_payments_dataset",
+        "clean_olist_order_reviews_dataset",
+        "clean_olist_sellers_dataset",
+        "clean_product_category_name_translation",
+    ]
 
-    # Guardar cada tabla en la base de datos con su nombre final
-    for final_name, df in final_tables.items():
+    # Guardar cada tabla enriquecida en la base de datos con su nombre final
+    for final_name, df in enriched_tables.items():
         print(f"Guardando tabla '{final_name}' con {len(df)} registros.")
-        df.to_sql(final_name, conn, if_exists="replace", index=False)
-
+        db_size = sqlite_writer.database_bytes(conn)
+        with metrics.measure('write_table', table=final_name, rows=len(df)) as record:
+            sqlite_writer.write_table(conn, final_name, id_codec.to_codes(df, id_dictionary),
+                                      schemas.primary_key(final_name, df.columns))
+            record['bytes_written'] = sqlite_writer.database_bytes(conn) - db_size
+
+    if from_catalog:
+        # Copiar las tablas limpias adjuntando la base de datos de la limpieza (si la limpieza se ejecutó en
+        # el mismo proceso con pipeline.py, primero se espera a que termine de escribirla en segundo plano)
+        with sqlite_writer.attached(conn, cleaned_data.wait()) as source:
+            for final_name in clean_tables:
+                db_size = sqlite_writer.database_bytes(conn)
+                with metrics.measure('copy_table', table=final_name) as record:
+                    record['rows'] = sqlite_writer.copy_table(conn, final_name, source)
+                    record['bytes_written'] = sqlite_writer.database_bytes(conn) - db_size
+                print(f"Tabla '{final_name}' copiada desde {cleaned_data.db_path} con {record['rows']} registros.")
+            if id_dictionary:
+                with metrics.measure('copy_table', table=id_codec.DICTIONARY_TABLE) as record:
+                    record['rows'] = sqlite_writer.copy_table(conn, id_codec.DICTIONARY_TABLE, source)
+    else:
+        for final_name in clean_tables:
+            df = cleaned_data[final_name]
+            print(f"Guardando tabla '{final_name}' con {len(df)} registros.")
+            db_size = sqlite_writer.database_bytes(conn)
+            with metrics.measure('write_table', table=final_name, rows=len(df)) as record:
+                sqlite_writer.write_table(conn, final_name, id_codec.to_codes(df, id_dictionary),
+                                          schemas.primary_key(final_name, df.columns))
+                record['bytes_written'] = sqlite_writer.database_bytes(conn) - db_size
+        if id_dictionary:
+            id_codec.write_dictionary(conn, id_dictionary)
+
+    # Índices de las columnas clave y estadísticas del planificador, después de la carga
+    with metrics.measure('finish_database'):
+        sqlite_writer.finish(conn, list(enriched_tables) + clean_tables)
     conn.close()
     print(f"Base de datos final generada en: {db_path}")
     return db_path
 
 
-def main():
+def main(cleaned_data=None):
     """
     Función principal que ejecuta el proceso de enriquecimiento.
+    `cleaned_data` es el catálogo de tablas limpias que entrega `cleaning.main` cuando las etapas se
+    ejecutan en el mismo proceso (pipeline.py); si no se indica, se abre cleaned_data.db.
     """
+    metrics.start_stage('enrichment')
     try:
         # 1. Cargar datos limpios
-        cleaned_data = load_cleaned_data()
+        if cleaned_data is None:
+            cleaned_data = load_cleaned_data()
+        else:
+            print(f"Usando el catálogo de datos limpios de la etapa de limpieza: {len(cleaned_data)} tablas")
 
         # 2. Crear archivos de datos adicionales
         create_additional_data()
@@ -285,13 +338,17 @@ def main():
         save_results(enriched_data)
 
         # 6. Guardar la base de datos final (archivo: enriched_data.db)
-        save_final_db(cleaned_data, enriched_data)
+        db_path = save_final_db(cleaned_data, enriched_data)
 
         print("Proceso de enriquecimiento completado exitosamente.")
+        return db_path
 
     except Exception as e:
         print(f"Error en el proceso de enriquecimiento: {e}")
         raise
+    finally:
+        # Métricas de tiempo, CPU, memoria, filas y bytes de la etapa
+        metrics.finish_stage()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,160 @@
+import os
+import functools
+import sqlite3
+import numpy as np
+import pandas as pd
+import schemas
+import sqlite_writer
+
+# Codificación de los identificadores del dataset Olist (BIGDATA_ID_ENCODING=1). Los identificadores son
+# textos hexadecimales de 32 caracteres que se repiten en varias tablas (order_id en órdenes, ítems, pagos y
+# reseñas, por ejemplo). Con la codificación activa, cada columna de identificadores usa un diccionario
+# compartido por todas las tablas: en memoria es una columna categórica con las mismas categorías en todas
+# las tablas (códigos enteros sobre un único índice de textos), de modo que los cruces y la deduplicación
+# trabajan con los códigos, y en SQLite se guarda el código entero junto con la tabla del diccionario
+# (id_dictionary), de la que se recupera el identificador original al leer las tablas o al exportarlas.
+# Los códigos siguen el orden de los identificadores, así que el mínimo y el máximo de los códigos
+# corresponden al mínimo y al máximo de los identificadores.
+ENABLED = os.environ.get('BIGDATA_ID_ENCODING', '0') == '1'
+
+ID_COLUMNS = ['order_id', 'customer_id', 'customer_unique_id', 'product_id', 'seller_id']
+DICTIONARY_TABLE = 'id_dictionary'
+
+def build_dictionary(conn, tables=None):
+    """
+    Construye el diccionario de cada columna de identificadores con los valores distintos de todas las
+    tablas indicadas (todas las de datos si `tables` es None), ordenados. Devuelve un diccionario
+    {columna: CategoricalDtype}.
+    """
+    tables = sqlite_writer.list_tables(conn) if tables is None else tables
+    dictionary = {}
+    for column in ID_COLUMNS:
+        selects = [
+            f"SELECT {schemas.quote_identifier(column)} AS value FROM {schemas.quote_identifier(table)}"
+            for table in tables
+            if column in [row[1] for row in conn.execute(f"PRAGMA table_info({schemas.quote_identifier(table)})")]
+        ]
+        if not selects:
+            continue
+        values = [row[0] for row in conn.execute(
+            f"SELECT DISTINCT value FROM ({' UNION '.join(selects)}) WHERE value IS NOT NULL ORDER BY value"
+        )]
+        dictionary[column] = pd.CategoricalDtype(pd.Index(values, dtype=object))
+    return dictionary
+
+@functools.lru_cache(maxsize=None)
+def _cached_dictionary(db_path, size, mtime):
+    conn = sqlite3.connect(db_path)
+    try:
+        return build_dictionary(conn)
+    finally:
+        conn.close()
+
+def source_dictionary(db_path):
+    """
+    Devuelve el diccionario de los identificadores de una base de datos (ver `build_dictionary`),
+    construido una sola vez por proceso mientras la base de datos no cambie. Los procesos de trabajo
+    obtienen así el mismo diccionario que el proceso principal.
+    """
+    return _cached_dictionary(db_path, os.path.getsize(db_path), os.path.getmtime(db_path))
+
+def encode(df, dictionary):
+    """
+    Convierte las columnas de identificadores de texto del DataFrame en categóricas con el tipo compartido
+    del diccionario. Lanza ValueError si algún identificador no está en el diccionario.
+    """
+    for column, dtype in dictionary.items():
+        if column not in df.columns or isinstance(df[column].dtype, pd.CategoricalDtype):
+            continue
+        codes = dtype.categories.get_indexer(df[column].astype(object))
+        missing = int(((codes == -1) & df[column].notna().to_numpy()).sum())
+        if missing:
+            raise ValueError(f"{missing} valores de '{column}' no están en el diccionario de identificadores")
+        df[column] = pd.Categorical.from_codes(codes, dtype=dtype)
+    return df
+
+def frames_dictionary(frames):
+    """
+    Devuelve el diccionario de las columnas de identificadores codificadas de un conjunto de tablas:
+    el tipo compartido si todas usan el mismo o, si alguna añadió valores (por ejemplo, al imputar nulos
+    con 'DESCONOCIDO'), la unión ordenada de sus categorías.
+    """
+    dictionary = {}
+    for column in ID_COLUMNS:
+        dtypes = [df[column].dtype for df in frames.values()
+                  if column in df.columns and isinstance(df[column].dtype, pd.CategoricalDtype)]
+        if not dtypes:
+            continue
+        categories = dtypes[0].categories
+        for dtype in dtypes[1:]:
+            if not dtype.categories.equals(categories):
+                categories = categories.union(dtype.categories)
+        if categories is dtypes[0].categories and categories.is_monotonic_increasing:
+            dictionary[column] = dtypes[0]
+        else:
+            dictionary[column] = pd.CategoricalDtype(categories.sort_values())
+    return dictionary
+
+def to_codes(df, dictionary):
+    """
+    Devuelve una copia superficial del DataFrame con cada columna de identificadores sustituida por su
+    código entero en el diccionario (nulo si el identificador es nulo), lista para escribirse en SQLite.
+    """
+    columns = [column for column in dictionary if column in df.columns]
+    if not columns:
+        return df
+    result = df.copy(deep=False)
+    for column in columns:
+        categories = dictionary[column].categories
+        if isinstance(df[column].dtype, pd.CategoricalDtype) and df[column].cat.categories.equals(categories):
+            codes = df[column].cat.codes.to_numpy()
+        else:
+            codes = categories.get_indexer(df[column].astype(object))
+            if (codes[df[column].notna().to_numpy()] == -1).any():
+                raise ValueError(f"Hay valores de '{column}' que no están en el diccionario de identificadores")
+        result[column] = pd.arrays.IntegerArray(codes.astype('int32'), codes == -1)
+    return result
+
+def write_dictionary(conn, dictionary):
+    """
+    Recrea la tabla del diccionario (columna, código, identificador original) en la base de datos.
+    """
+    with sqlite_writer.transaction(conn):
+        conn.execute(f"DROP TABLE IF EXISTS {DICTIONARY_TABLE}")
+        conn.execute(f"CREATE TABLE {DICTIONARY_TABLE} (id_column TEXT, code INTEGER, value TEXT, "
+                     f"PRIMARY KEY (id_column, code))")
+        for column, dtype in dictionary.items():
+            conn.executemany(f"INSERT INTO {DICTIONARY_TABLE} VALUES (?, ?, ?)",
+                             ((column, code, value) for code, value in enumerate(dtype.categories)))
+
+def read_dictionary(conn):
+    """
+    Lee el diccionario de identificadores de la base de datos. Devuelve None si la base de datos no
+    tiene identificadores codificados.
+    """
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+                          (DICTIONARY_TABLE,)).fetchone()
+    if exists is None:
+        return None
+    values = {}
+    for column, value in conn.execute(f"SELECT id_column, value FROM {DICTIONARY_TABLE} ORDER BY id_column, code"):
+        values.setdefault(column, []).append(value)
+    return {column: pd.CategoricalDtype(pd.Index(column_values, dtype=object))
+            for column, column_values in values.items()}
+
+def decode(df, dictionary):
+    """
+    Convierte las columnas de códigos leídas de SQLite en columnas categóricas con los identificadores
+    originales (el tipo compartido del diccionario). Las columnas que no son enteras se dejan como están.
+    """
+    for column, dtype in dictionary.items():
+        if column in df.columns and pd.api.types.is_numeric_dtype(df[column]):
+            codes = df[column].fillna(-1).to_numpy(dtype=np.int64)
+            df[column] = pd.Categorical.from_codes(codes, dtype=dtype)
+    return df
+
+def decode_value(dictionary, column, code):
+    """
+    Devuelve el identificador original de un código (por ejemplo, el mínimo o el máximo de una columna).
+    """
+    return code if code is None else dictionary[column].categories[int(code)]
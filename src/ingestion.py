@@ -1,9 +1,41 @@
+import io
 import os
+import json
+import time
+import hashlib
 import zipfile
 import sqlite3
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import kagglehub
 from datetime import datetime
+import schemas
+import columnar
+import metrics
+import sqlite_writer
+import audit
+
+# Número de filas que se leen de cada CSV por bloque durante la carga en streaming.
+# Se puede ajustar con la variable de entorno BIGDATA_CHUNK_SIZE.
+CHUNK_SIZE = int(os.environ.get('BIGDATA_CHUNK_SIZE', 100000))
+
+# Número de procesos que leen los CSV en paralelo (1 = secuencial, 0 = todos los núcleos).
+# Se puede ajustar con la variable de entorno BIGDATA_WORKERS.
+WORKERS = int(os.environ.get('BIGDATA_WORKERS', 1))
+
+# Si está activo, solo se recargan los CSV nuevos o modificados según el manifiesto de ingesta.
+# Se puede desactivar con BIGDATA_INCREMENTAL=0 para reconstruir la base de datos completa.
+INCREMENTAL = os.environ.get('BIGDATA_INCREMENTAL', '1') != '0'
+
+# Manifiesto con el tamaño, fecha de modificación, hash, filas y esquema de cada CSV cargado, junto con
+# la huella de su entrada en el registro de esquemas (si el registro cambia, el CSV se vuelve a cargar).
+MANIFEST_PATH = 'src/static/db/ingestion_manifest.json'
+
+# Número de filas de cada CSV que se guardan como muestra en src/static/csv/ingestion.csv.
+SAMPLE_ROWS = 10
+
+# Directorio (o ZIP) local con los CSV del dataset. Si se indica con BIGDATA_DATASET_PATH no se descarga
+# el dataset de Kaggle; se usa, por ejemplo, con los datos de synthetic_data.py en los benchmarks.
+DATASET_PATH = os.environ.get('BIGDATA_DATASET_PATH')
 
 def clean_previous_files():
     """
@@ -22,12 +54,16 @@ def clean_previous_files():
             except Exception as e:
                 print(f"No se pudo eliminar {file_path}: {e}")
 
+@metrics.timed
 def download_dataset_zip():
     """
     Descarga el dataset desde Kaggle.
     Este método utiliza kagglehub.dataset_download, que descarga el dataset y devuelve la ruta donde se encuentra.
     """
     print("Descargando dataset desde Kaggle...")
+    # kagglehub se importa solo aquí: tarda en importarse y no se usa con BIGDATA_DATASET_PATH
+    import kagglehub
+
     # Descarga el dataset; esto crea un directorio con los archivos descargados (puede incluir el .zip o los CSV)
     dataset_path = kagglehub.dataset_download("olistbr/brazilian-ecommerce")
     print("Ruta al dataset:", dataset_path)
@@ -37,6 +73,7 @@ def extract_zip_files(dataset_path):
     """
     Busca un archivo .zip en la ruta del dataset y, si lo encuentra, lo extrae en una carpeta 'extracted'
     dentro de esa ruta. Si no hay archivos .zip, verifica si ya existen archivos CSV, asumiendo que el dataset ya está extraído.
+    La ingesta ya no la utiliza (ver `find_csv_sources`); se mantiene para quien necesite los CSV extraídos en disco.
     """
     zip_files = [f for f in os.listdir(dataset_path) if f.endswith('.zip')]
     if zip_files:
@@ -56,56 +93,495 @@ def extract_zip_files(dataset_path):
         else:
             raise FileNotFoundError("No se encontró ningún archivo .zip ni archivos .csv en la ruta del dataset")
 
-def create_database_from_csvs(csv_dir):
+def find_csv_sources(dataset_path):
+    """
+    Localiza los CSV del dataset sin extraer nada a disco. Si la ruta contiene un archivo .zip,
+    cada CSV del ZIP se devuelve como una fuente que se lee directamente desde el archivo comprimido;
+    si no, se usan los CSV ya extraídos en la ruta.
+    Cada fuente es un diccionario con el nombre del archivo ('file'), la ruta en disco ('path') y,
+    para los CSV dentro de un ZIP, el nombre del miembro ('member').
+    """
+    zip_files = sorted(f for f in os.listdir(dataset_path) if f.endswith('.zip'))
+    if zip_files:
+        zip_path = os.path.join(dataset_path, zip_files[0])
+        print(f"Leyendo los CSV directamente desde {zip_path}, sin extraerlos...")
+        with zipfile.ZipFile(zip_path, "r") as z:
+            members = [info.filename for info in z.infolist()
+                       if info.filename.endswith('.csv') and not info.is_dir()]
+        if not members:
+            raise FileNotFoundError(f"No se encontraron archivos CSV dentro de {zip_path}")
+        return [{'file': os.path.basename(member), 'path': zip_path, 'member': member} for member in members]
+
+    # Si no se encuentra un ZIP, se usan los archivos CSV de la ruta
+    csv_files = [f for f in os.listdir(dataset_path) if f.endswith('.csv')]
+    if not csv_files:
+        raise FileNotFoundError("No se encontró ningún archivo .zip ni archivos .csv en la ruta del dataset")
+    return [{'file': f, 'path': os.path.join(dataset_path, f), 'member': None} for f in csv_files]
+
+def _as_source(source):
+    """
+    Normaliza una fuente: acepta la ruta de un CSV en disco o un diccionario de `find_csv_sources`.
+    """
+    if isinstance(source, dict):
+        return source
+    return {'file': os.path.basename(source), 'path': source, 'member': None}
+
+def _open_source(source):
+    """
+    Abre una fuente CSV en modo binario. Los miembros de un ZIP se descomprimen en streaming.
+    """
+    source = _as_source(source)
+    if source['member'] is None:
+        return open(source['path'], 'rb')
+    # El miembro abierto mantiene abierto el archivo ZIP hasta que se cierra
+    with zipfile.ZipFile(source['path'], 'r') as z:
+        return z.open(source['member'], 'r')
+
+def _source_stat(source):
+    """
+    Devuelve el tamaño (sin comprimir) y la fecha de modificación de una fuente CSV.
+    """
+    source = _as_source(source)
+    if source['member'] is None:
+        return os.path.getsize(source['path']), os.path.getmtime(source['path'])
+    with zipfile.ZipFile(source['path'], 'r') as z:
+        info = z.getinfo(source['member'])
+    return info.file_size, time.mktime(info.date_time + (0, 0, -1))
+
+class _ChecksumReader(io.RawIOBase):
+    """
+    Envuelve un archivo binario y calcula el hash SHA-256 y el número de bytes a medida que
+    pandas consume su contenido, evitando una segunda lectura del archivo.
+    """
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.sha256 = hashlib.sha256()
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._raw.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        self.sha256.update(data)
+        self.bytes_read += size
+        return size
+
+    def close(self):
+        self._raw.close()
+        super().close()
+
+def load_csv_in_chunks(conn, source, table_name, chunk_size=CHUNK_SIZE):
+    """
+    Carga un CSV (ruta en disco o fuente de `find_csv_sources`, incluidos miembros de un ZIP
+    que se descomprimen en streaming) en la tabla indicada leyéndolo una sola vez por bloques de `chunk_size` filas
+    (si `chunk_size` es None el archivo completo se procesa como un único bloque).
+    La tabla se recrea a partir de las columnas del primer bloque y todos los bloques se insertan
+    con INSERT de varias filas (`sqlite_writer`) dentro de una única transacción, de modo que la memoria
+    utilizada depende del tamaño del bloque y no del tamaño del archivo. La transacción incluye la
+    eliminación de la tabla anterior: si el archivo falla a mitad de la carga, la tabla queda como estaba.
+    Mientras los datos fluyen hacia la base de datos se recogen la muestra, el número de filas y
+    el hash SHA-256 del archivo, que luego reutilizan la muestra y la auditoría.
+    Si la tabla está en el registro de esquemas, las columnas se leen con sus dtypes y formatos de
+    fecha explícitos y la tabla se crea con los tipos SQLite correspondientes.
+    Con el almacenamiento columnar activado, cada bloque también se añade a la copia Parquet de la tabla.
+    """
+    start = time.perf_counter()
+    quoted_table = schemas.quote_identifier(table_name)
+    dtypes = schemas.read_csv_dtypes(table_name)
+    total_rows = 0
+    table_created = False
+    sample = None
+
+    source = _as_source(source)
+    reader = _ChecksumReader(_open_source(source))
+    columnar_writer = columnar.TableWriter('ingestion', table_name) if columnar.is_enabled() else None
+    try:
+        with io.BufferedReader(reader, buffer_size=1024 * 1024) as stream, sqlite_writer.transaction(conn):
+            conn.execute(f"DROP TABLE IF EXISTS {quoted_table}")
+            if chunk_size is None:
+                chunks = [pd.read_csv(stream, encoding="latin1", dtype=dtypes)]
+            else:
+                chunks = pd.read_csv(stream, encoding="latin1", dtype=dtypes, chunksize=chunk_size)
+            for chunk in chunks:
+                chunk = schemas.parse_datetimes(chunk, table_name)
+                if not table_created:
+                    # La tabla de ingesta no declara clave primaria: conserva los registros tal cual llegan
+                    sqlite_writer.create_table(conn, table_name, chunk)
+                    table_created = True
+                if sample is None:
+                    sample = chunk.head(SAMPLE_ROWS)
+                elif len(sample) < SAMPLE_ROWS:
+                    sample = pd.concat([sample, chunk.head(SAMPLE_ROWS - len(sample))])
+                sqlite_writer.insert_dataframe(conn, table_name, chunk)
+                if columnar_writer is not None:
+                    columnar_writer.write(chunk)
+                total_rows += len(chunk)
+            # Consumir lo que el parser no haya leído para que el hash cubra el archivo completo
+            while stream.read(1024 * 1024):
+                pass
+    except Exception:
+        if columnar_writer is not None:
+            columnar_writer.abort()
+        raise
+    if columnar_writer is not None:
+        columnar_writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'file': source['file'],
+        'table': table_name,
+        'rows': total_rows,
+        'bytes': reader.bytes_read,
+        'sha256': reader.sha256.hexdigest(),
+        'sample': sample,
+        'seconds': elapsed,
+        'rows_per_second': total_rows / elapsed if elapsed > 0 else 0.0,
+        'bytes_per_second': reader.bytes_read / elapsed if elapsed > 0 else 0.0,
+    }
+
+def _load_csv_to_staging(source, staging_path, table_name, chunk_size):
+    """
+    Tarea de un proceso trabajador: carga un CSV en su propia base de datos SQLite de staging,
+    ya que SQLite solo admite un escritor a la vez sobre la base de datos principal.
+    Cada proceso abre su propia copia del ZIP cuando la fuente es un miembro comprimido.
+    """
+    conn = sqlite_writer.connect(staging_path)
+    try:
+        return load_csv_in_chunks(conn, source, table_name, chunk_size)
+    finally:
+        conn.close()
+
+def _merge_staging_table(conn, staging_path, table_name):
+    """
+    Adjunta la base de datos de staging con ATTACH y copia su tabla a la base de datos principal
+    con INSERT INTO ... SELECT, conservando la definición de la tabla. Luego elimina el archivo de staging.
+    """
+    quoted_table = schemas.quote_identifier(table_name)
+    conn.execute("ATTACH DATABASE ? AS staging", (staging_path,))
+    try:
+        create_sql = conn.execute(
+            "SELECT sql FROM staging.sqlite_master WHERE type='table' AND name=?", (table_name,)
+        ).fetchone()
+        with sqlite_writer.transaction(conn):
+            conn.execute(f"DROP TABLE IF EXISTS main.{quoted_table}")
+            if create_sql is not None:
+                conn.execute(create_sql[0])
+                conn.execute(f"INSERT INTO main.{quoted_table} SELECT * FROM staging.{quoted_table}")
+    finally:
+        conn.execute("DETACH DATABASE staging")
+    os.remove(staging_path)
+
+def _print_load_stats(stats):
+    """
+    Muestra el rendimiento de carga de un archivo.
+    """
+    print(f"  - Tabla '{stats['table']}': {stats['rows']} filas en {stats['seconds']:.2f} s "
+          f"({stats['rows_per_second']:.0f} filas/s, "
+          f"{stats['bytes_per_second'] / 1024 / 1024:.2f} MB/s)")
+
+def _source_sha256(source):
+    """
+    Calcula el hash SHA-256 del contenido de una fuente CSV leyéndola por bloques.
+    """
+    sha256 = hashlib.sha256()
+    with _open_source(source) as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+def _read_sample(source):
+    """
+    Lee solo las primeras filas de una fuente CSV para la muestra.
+    """
+    table_name = os.path.splitext(_as_source(source)['file'])[0]
+    with _open_source(source) as f:
+        sample = pd.read_csv(f, encoding="latin1", nrows=SAMPLE_ROWS, dtype=schemas.read_csv_dtypes(table_name))
+    return schemas.parse_datetimes(sample, table_name)
+
+def load_manifest():
+    """
+    Lee el manifiesto de la última ingesta. Devuelve un diccionario vacío si no existe o no se puede leer.
     """
-    Recorre el directorio donde están los CSV y, para cada uno, crea una tabla en la base de datos SQLite.
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"No se pudo leer el manifiesto {MANIFEST_PATH}: {e}")
+        return {}
+
+def save_manifest(manifest):
+    """
+    Guarda el manifiesto de ingesta junto a la base de datos.
+    """
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=4, ensure_ascii=False)
+
+def _table_schema(conn, table_name):
+    """
+    Devuelve el esquema de una tabla como una lista de pares [columna, tipo].
+    """
+    rows = conn.execute(f"PRAGMA table_info({schemas.quote_identifier(table_name)})").fetchall()
+    return [[row[1], row[2]] for row in rows]
+
+def _registry_hash(table_name):
+    """
+    Devuelve la huella SHA-256 de la entrada de una tabla en el registro de esquemas (tipos con los que
+    se lee el CSV y formatos de sus fechas), o None si la tabla no está registrada.
+    """
+    schema = schemas.get_schema(table_name)
+    if schema is None:
+        return None
+    payload = json.dumps(schema, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def sources_fingerprint(sources):
+    """
+    Devuelve la huella SHA-256 de las fuentes del dataset: nombre, tamaño y fecha de modificación de cada
+    CSV y la huella de su entrada en el registro de esquemas. pipeline.py la guarda en el punto de control
+    de la ingesta, de modo que `--resume` no omite la etapa si el dataset o el registro cambiaron.
+    """
+    entries = []
+    for source in sorted(sources, key=lambda source: source['file']):
+        size, mtime = _source_stat(source)
+        entries.append([source['file'], size, mtime, _registry_hash(os.path.splitext(source['file'])[0])])
+    return hashlib.sha256(json.dumps(entries).encode('utf-8')).hexdigest()
+
+def _unchanged_file_stats(source, table_name, entry, existing_tables):
+    """
+    Compara un CSV con su entrada del manifiesto. Si el archivo no ha cambiado, su entrada del registro
+    de esquemas es la misma con la que se cargó y su tabla sigue en la base de datos devuelve sus
+    estadísticas (tomadas del manifiesto); en caso contrario devuelve None.
+    El hash solo se recalcula cuando el tamaño coincide pero la fecha de modificación no.
+    """
+    if not entry or table_name not in existing_tables:
+        return None
+    if entry.get('registry') != _registry_hash(table_name):
+        return None
+    if columnar.is_enabled() and not columnar.exists('ingestion', table_name):
+        return None
+    size, mtime = _source_stat(source)
+    if size != entry.get('size'):
+        return None
+    if mtime != entry.get('mtime'):
+        if _source_sha256(source) != entry.get('sha256'):
+            return None
+        entry['mtime'] = mtime
+
+    return {
+        'file': source['file'],
+        'table': table_name,
+        'rows': entry['rows'],
+        'bytes': size,
+        'sha256': entry['sha256'],
+        'sample': _read_sample(source),
+        'seconds': 0.0,
+        'rows_per_second': 0.0,
+        'bytes_per_second': 0.0,
+        'skipped': True,
+        'profile': entry.get('profile'),
+    }
+
+@metrics.timed
+def create_database_from_csvs(csv_dir, chunk_size=CHUNK_SIZE, workers=WORKERS, incremental=INCREMENTAL):
+    """
+    Recorre los CSV del dataset y, para cada uno, crea una tabla en la base de datos SQLite.
     El nombre de la tabla se toma del nombre del archivo (sin extensión).
+    `csv_dir` puede ser un directorio (con los CSV o con el ZIP del dataset, que se lee sin extraer)
+    o la lista de fuentes devuelta por `find_csv_sources`.
+    Cada CSV se lee una única vez por bloques de `chunk_size` filas (None para leerlo completo).
+    Con `workers` mayor que 1 (0 = todos los núcleos) los CSV se procesan en paralelo: cada proceso
+    carga su archivo en una base de datos de staging y el proceso principal, único escritor de
+    `ingestion.db`, las adjunta y copia en el orden de los archivos.
+    Con `incremental` activo la base de datos no se elimina: los CSV cuyo tamaño, fecha de
+    modificación o hash coinciden con el manifiesto de la ingesta anterior se omiten y solo se
+    recargan los archivos nuevos o modificados.
+    Devuelve una lista con las estadísticas de carga de cada archivo (filas, bytes, hash, muestra
+    y rendimiento), o con el error si el archivo no se pudo cargar.
     """
     os.makedirs('src/static/db', exist_ok=True)
     db_path = 'src/static/db/ingestion.db'
 
     # Eliminar el archivo de base de datos si ya existe
-    if os.path.exists(db_path):
+    if os.path.exists(db_path) and not incremental:
         print(f"Eliminando base de datos existente en {db_path}...")
         os.remove(db_path)
+        columnar.remove_stage('ingestion')
 
-    conn = sqlite3.connect(db_path)
-    csv_files = [f for f in os.listdir(csv_dir) if f.endswith('.csv')]
-    if not csv_files:
+    sources = find_csv_sources(csv_dir) if isinstance(csv_dir, str) else [_as_source(s) for s in csv_dir]
+    if not sources:
         raise FileNotFoundError("No se encontraron archivos CSV en el directorio extraído")
+    csv_files = [source['file'] for source in sources]
+    sources_by_file = {source['file']: source for source in sources}
 
-    for file in csv_files:
-        file_path = os.path.join(csv_dir, file)
-        print(f"Leyendo {file_path}...")
+    # Conexión de solo lectura para comparar con el manifiesto: la configuración de carga masiva
+    # modifica el archivo (y sqlite3.connect lo crearía si no existe), y si nada ha cambiado
+    # ingestion.db debe quedar intacta
+    existing_tables = set()
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
         try:
-            df = pd.read_csv(file_path, encoding="latin1")
-        except Exception as e:
-            print(f"Error al leer {file}: {e}")
-            continue
+            existing_tables = set(sqlite_writer.list_tables(conn))
+        finally:
+            conn.close()
+    manifest = load_manifest() if incremental else {}
+
+    start = time.perf_counter()
+    load_stats = []
+    files_to_load = []
+    for file in csv_files:
         table_name = os.path.splitext(file)[0]
-        print(f"Creando/actualizando tabla '{table_name}' en la base de datos...")
-        df.to_sql(table_name, conn, if_exists="replace", index=False)
+        stats = _unchanged_file_stats(sources_by_file[file], table_name,
+                                      manifest.get(table_name), existing_tables)
+        if stats is not None:
+            print(f"Sin cambios en {file}; se conserva la tabla '{table_name}' ({stats['rows']} filas).")
+            load_stats.append(stats)
+        else:
+            files_to_load.append(file)
+
+    current_tables = {os.path.splitext(file)[0] for file in csv_files}
+    removed_tables = [table_name for table_name in manifest if table_name not in current_tables]
+    if not files_to_load and not removed_tables:
+        # Sin cambios no se reescribe ingestion.db (ni su fecha de modificación), de modo que siguen
+        # siendo válidos los puntos de control de `pipeline.py --resume` y la caché del catálogo
+        save_manifest(manifest)
+        print("Ningún archivo ha cambiado; la base de datos se conserva sin modificar en:", db_path)
+        return load_stats
+
+    conn = sqlite_writer.connect(db_path)
+
+    # Eliminar las tablas de archivos que ya no forman parte del dataset
+    for table_name in removed_tables:
+        print(f"Eliminando tabla '{table_name}': su archivo ya no existe en el dataset.")
+        with conn:
+            conn.execute(f"DROP TABLE IF EXISTS {schemas.quote_identifier(table_name)}")
+        columnar.remove_table('ingestion', table_name)
+        del manifest[table_name]
+
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(files_to_load))
+
+    if workers <= 1:
+        for file in files_to_load:
+            source = sources_by_file[file]
+            table_name = os.path.splitext(file)[0]
+            print(f"Leyendo {source['path']}" + (f" ({source['member']})" if source['member'] else "") + "...")
+            try:
+                db_size = sqlite_writer.database_bytes(conn)
+                with metrics.measure('load_csv_in_chunks', table=table_name) as record:
+                    stats = load_csv_in_chunks(conn, source, table_name, chunk_size)
+                    record.update(rows=stats['rows'], bytes_read=stats['bytes'],
+                                  bytes_written=sqlite_writer.database_bytes(conn) - db_size)
+            except Exception as e:
+                print(f"Error al cargar {file}: {e}")
+                load_stats.append({'file': file, 'error': str(e)})
+                continue
+            _print_load_stats(stats)
+            load_stats.append(stats)
+    else:
+        staging_dir = 'src/static/db/staging'
+        os.makedirs(staging_dir, exist_ok=True)
+        print(f"Leyendo {len(files_to_load)} archivos CSV con {workers} procesos en paralelo...")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for file in files_to_load:
+                table_name = os.path.splitext(file)[0]
+                staging_path = os.path.join(staging_dir, f"{table_name}.db")
+                if os.path.exists(staging_path):
+                    os.remove(staging_path)
+                future = executor.submit(_load_csv_to_staging, sources_by_file[file],
+                                         staging_path, table_name, chunk_size)
+                futures[future] = (file, table_name, staging_path)
+
+            # Las tablas se copian en el orden de los archivos (no en el que terminan los procesos),
+            # para que el orden de las tablas en ingestion.db sea el mismo en cada ejecución
+            for future, (file, table_name, staging_path) in futures.items():
+                try:
+                    stats = future.result()
+                    metrics.record('load_csv_to_staging', table=table_name, rows=stats['rows'],
+                                   bytes_read=stats['bytes'], wall_seconds=stats['seconds'])
+                    db_size = sqlite_writer.database_bytes(conn)
+                    with metrics.measure('merge_staging_table', table=table_name, rows=stats['rows'],
+                                         bytes_read=metrics.file_size(staging_path)) as record:
+                        _merge_staging_table(conn, staging_path, table_name)
+                        record['bytes_written'] = sqlite_writer.database_bytes(conn) - db_size
+                except Exception as e:
+                    print(f"Error al cargar {file}: {e}")
+                    load_stats.append({'file': file, 'error': str(e)})
+                    continue
+                _print_load_stats(stats)
+                load_stats.append(stats)
+        if not os.listdir(staging_dir):
+            os.rmdir(staging_dir)
+
+    # Mantener el orden de los archivos para que la muestra y la auditoría sean estables
+    load_stats.sort(key=lambda stats: csv_files.index(stats['file']))
+
+    # Registrar en el manifiesto los archivos cargados en esta ejecución
+    for stats in load_stats:
+        if 'error' in stats:
+            manifest.pop(os.path.splitext(stats['file'])[0], None)
+            continue
+        if stats.get('skipped'):
+            continue
+        size, mtime = _source_stat(sources_by_file[stats['file']])
+        # Perfil de la tabla para la auditoría, calculado en SQL mientras la tabla está recién escrita
+        with metrics.measure('table_profile', table=stats['table'], rows=stats['rows']):
+            stats['profile'] = audit.table_profile(conn, stats['table'])
+        manifest[stats['table']] = {
+            'file': stats['file'],
+            'size': size,
+            'mtime': mtime,
+            'sha256': stats['sha256'],
+            'rows': stats['rows'],
+            'schema': _table_schema(conn, stats['table']),
+            'registry': _registry_hash(stats['table']),
+            'profile': stats['profile'],
+            'loaded_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+    # Los índices de las columnas clave se crean después de la carga (los existentes se conservan)
+    with metrics.measure('finish_database'):
+        sqlite_writer.finish(conn, sqlite_writer.list_tables(conn))
     conn.close()
+    save_manifest(manifest)
+    elapsed = time.perf_counter() - start
+
+    loaded = [s for s in load_stats if 'error' not in s and not s.get('skipped')]
+    if loaded and elapsed > 0:
+        total_rows = sum(s['rows'] for s in loaded)
+        total_bytes = sum(s['bytes'] for s in loaded)
+        print(f"Carga total: {total_rows} filas, {total_bytes / 1024 / 1024:.2f} MB en {elapsed:.2f} s "
+              f"({total_rows / elapsed:.0f} filas/s, "
+              f"{total_bytes / elapsed / 1024 / 1024:.2f} MB/s)")
     print("Base de datos creada correctamente en:", db_path)
+    return load_stats
 
-def generate_sample_file(csv_dir):
+@metrics.timed
+def generate_sample_file(load_stats):
     """
-    Para la evidencia complementaria, genera un archivo Excel que combine una muestra representativa de cada CSV.
-    Se crea un DataFrame concatenando las primeras 10 filas de cada archivo y luego se exporta a Excel.
+    Para la evidencia complementaria, genera un archivo CSV que combine una muestra representativa de cada CSV.
+    Se concatenan las primeras filas de cada archivo, recogidas durante la carga en la base de datos,
+    por lo que no es necesario volver a leer los archivos.
     """
     os.makedirs('src/static/csv', exist_ok=True)
     samples = []
-    csv_files = [f for f in os.listdir(csv_dir) if f.endswith('.csv')]
-    for file in csv_files:
-        file_path = os.path.join(csv_dir, file)
-        try:
-            df = pd.read_csv(file_path, encoding="latin1")
-            sample = df.head(10)
-            sample['origen'] = file  # Añadimos columna para identificar el origen de la muestra
-            samples.append(sample)
-        except Exception as e:
-            print(f"Error al leer {file} para la muestra: {e}")
+    for stats in load_stats:
+        if 'error' in stats:
+            print(f"No hay muestra para {stats['file']}: {stats['error']}")
+            continue
+        if stats['sample'] is None:
             continue
+        sample = stats['sample'].copy()
+        sample['origen'] = stats['file']  # Añadimos columna para identificar el origen de la muestra
+        samples.append(sample)
     if samples:
         final_sample = pd.concat(samples)
         csv_path = 'src/static/csv/ingestion.csv'
@@ -114,37 +590,37 @@ def generate_sample_file(csv_dir):
     else:
         print("No se generó archivo de muestra porque no se pudo leer ningún CSV.")
 
-def generate_audit_file(dataset_path, csv_dir):
+@metrics.timed
+def generate_audit_file(load_stats):
     """
     Genera un archivo de auditoría que compara el número total de registros extraídos de todos los CSV
     con la suma de registros insertados en las tablas de la base de datos.
+    Los registros de cada CSV y su hash se toman de las estadísticas recogidas durante la carga.
+    El perfil de cada tabla (registros y, por columna, nulos, rango y opcionalmente valores distintos) se reutiliza del
+    calculado en la carga o guardado en el manifiesto; si no existe, se calcula con una consulta SQL
+    de agregados (`audit.table_profile`), sin cargar la tabla en memoria.
     """
     audit_lines = []
     total_csv_records = 0
-    csv_files = [f for f in os.listdir(csv_dir) if f.endswith('.csv')]
-    for file in csv_files:
-        file_path = os.path.join(csv_dir, file)
-        try:
-            df = pd.read_csv(file_path, encoding="latin1")
-            count = len(df)
-            total_csv_records += count
-            audit_lines.append(f"{file}: {count} registros")
-        except Exception as e:
-            audit_lines.append(f"{file}: error al leer ({e})")
-
-    # Leer la base de datos y sumar registros de todas las tablas
+    for stats in load_stats:
+        if 'error' in stats:
+            audit_lines.append(f"{stats['file']}: error al leer ({stats['error']})")
+            continue
+        total_csv_records += stats['rows']
+        status = ", sin cambios" if stats.get('skipped') else ""
+        audit_lines.append(f"{stats['file']}: {stats['rows']} registros (sha256: {stats['sha256']}{status})")
+
+    # Registros y perfil de columnas de cada tabla de la base de datos
+    profiles = {stats['table']: stats['profile'] for stats in load_stats if stats.get('profile')}
     db_path = 'src/static/db/ingestion.db'
     conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tables = cursor.fetchall()
+    tables = sqlite_writer.list_tables(conn)
     total_db_records = 0
-    for table in tables:
-        tname = table[0]
-        df_db = pd.read_sql_query(f"SELECT * FROM {tname}", conn)
-        count_db = len(df_db)
-        total_db_records += count_db
-        audit_lines.append(f"Tabla '{tname}': {count_db} registros")
+    for tname in tables:
+        profile = profiles.get(tname) or audit.table_profile(conn, tname)
+        total_db_records += profile['rows']
+        audit_lines.append(f"Tabla '{tname}': {profile['rows']} registros, {profile['null_values']} valores nulos")
+        audit_lines.extend(f"  * {line}" for line in audit.describe_columns(profile))
     conn.close()
 
     audit_text = f"""Reporte de Auditoría - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
@@ -161,26 +637,38 @@ Detalle por archivo/tabla:
         f.write(audit_text)
     print("Archivo de auditoría generado en:", audit_path)
 
-def main():
+def main(dataset_path=DATASET_PATH):
+    """
+    Ejecuta la ingesta completa. Devuelve la ruta del dataset utilizado (local o descargado de Kaggle).
+    """
+    metrics.start_stage('ingestion')
     try:
 
         # Limpiar archivos anteriores
         clean_previous_files()
 
-        # Descarga y extracción
-        dataset_path = download_dataset_zip()
-        csv_dir = extract_zip_files(dataset_path)
+        # Descarga y localización de los CSV (si el dataset viene en un ZIP se lee sin extraerlo)
+        if dataset_path is None:
+            dataset_path = download_dataset_zip()
+        else:
+            print("Usando el dataset local:", dataset_path)
+        sources = find_csv_sources(dataset_path)
 
         # Procesamiento: creación de base de datos, generación de muestra y auditoría
-        create_database_from_csvs(csv_dir)
-        generate_sample_file(csv_dir)
-        generate_audit_file(dataset_path, csv_dir)
+        # Cada CSV se lee una sola vez; la muestra y la auditoría reutilizan lo recogido en la carga
+        load_stats = create_database_from_csvs(sources)
+        generate_sample_file(load_stats)
+        generate_audit_file(load_stats)
 
         print("Proceso completado exitosamente.")
+        return dataset_path
 
     except Exception as e:
         print("Error en el proceso:", e)
         raise
+    finally:
+        # Métricas de tiempo, CPU, memoria, filas y bytes de la etapa
+        metrics.finish_stage()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
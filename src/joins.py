@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+# Cruces del enriquecimiento por índice de clave. Cuando la tabla de la derecha tiene una fila por clave
+# (tablas de referencia pequeñas como categorías, tarifas o segmentos, pero también tablas grandes como
+# productos u órdenes vistas desde order_items), cada fila de la izquierda solo necesita la posición de su
+# clave en la derecha: se calcula una vez con un índice hash (una vez por categoría si la clave es
+# categórica) y las columnas nuevas se toman por posición, sin copiar la tabla base. Si la clave de la
+# derecha se repite, se usa `DataFrame.merge`.
+
+def key_positions(keys, index):
+    """
+    Devuelve la posición de cada clave de `keys` en `index` (-1 si no está). Con claves categóricas
+    se buscan solo las categorías y cada fila toma la posición de su código.
+    """
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        keys = pd.Series(keys, copy=False)
+        if isinstance(index, pd.CategoricalIndex) and index.categories.equals(keys.cat.categories):
+            # Mismo diccionario a ambos lados (identificadores codificados, ver id_codec.py): la posición
+            # de cada código se toma directamente de los códigos del índice, sin buscar los textos
+            category_positions = np.full(len(index.categories) + 1, -1, dtype=np.intp)
+            category_positions[index.codes] = np.arange(len(index))
+            return category_positions[keys.cat.codes.to_numpy()]
+        category_positions = index.get_indexer(keys.cat.categories)
+        missing_position = index.get_indexer([np.nan])[0] if index.hasnans else -1
+        # La posición de los nulos (código -1) va al final para indexar con los códigos directamente
+        category_positions = np.append(category_positions, missing_position)
+        return category_positions[keys.cat.codes.to_numpy()]
+    return index.get_indexer(keys)
+
+def take_column(values, positions):
+    """
+    Toma los valores de `values` en las posiciones indicadas; las posiciones -1 quedan nulas
+    (los enteros pasan a float, igual que en un cruce izquierdo sin coincidencia).
+    """
+    values = pd.Series(values)
+    array = values.array if isinstance(values.dtype, pd.api.extensions.ExtensionDtype) else values.to_numpy()
+    return pd.api.extensions.take(array, positions, allow_fill=True)
+
+def broadcast_lookup(base, lookup, left_on, right_on=None, columns=None):
+    """
+    Equivale a `base.merge(lookup, left_on=left_on, right_on=right_on, how='left')` cuando la clave de
+    `lookup` es única: añade a una copia superficial de `base` (sin copiar sus datos) las columnas de
+    `lookup`, tomadas por la posición de cada clave. `columns` limita las columnas añadidas.
+    Si la clave de `lookup` se repite o alguna columna ya existe en `base`, se usa `merge`.
+    """
+    right_on = right_on or left_on
+    # Mismo orden de columnas que `merge`: la clave de la derecha solo se añade si tiene otro nombre
+    selected = set(lookup.columns if columns is None else columns) | {right_on}
+    if right_on == left_on:
+        selected.discard(right_on)
+    columns = [column for column in lookup.columns if column in selected]
+
+    index = pd.Index(lookup[right_on])
+    if not index.is_unique or set(columns) & set(base.columns):
+        right = lookup[[column for column in lookup.columns if column in selected or column == right_on]]
+        return base.merge(right, left_on=left_on, right_on=right_on, how='left')
+
+    positions = key_positions(base[left_on], index)
+    result = base.copy(deep=False)
+    for column in columns:
+        result[column] = take_column(lookup[column], positions)
+    return result
+
+def lookup_values(keys, values):
+    """
+    Devuelve, para cada clave de `keys`, el valor de la Serie `values` (indexada por clave única)
+    o nulo si la clave no está. Es el equivalente vectorizado de `keys.map(values)`.
+    """
+    return take_column(values, key_positions(keys, values.index))
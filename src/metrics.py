@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import time
+import cProfile
+import pstats
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Métricas de ejecución de cada etapa (tiempo real, tiempo de CPU, memoria máxima, filas y bytes)
+# por función y por tabla. Se guardan en src/static/auditoria/<etapa>_metrics.json, junto a los reportes.
+# BIGDATA_PROFILE activa además el perfilado: 'cprofile' (perfil de funciones en <etapa>_profile.prof
+# y .txt), 'tracemalloc' (memoria asignada por sección) o 'all' (ambos).
+METRICS_DIR = 'src/static/auditoria'
+PROFILE = os.environ.get('BIGDATA_PROFILE', '').lower()
+
+# Etapa en curso de cada hilo: con pipeline.py la base de datos limpia se guarda en un hilo en segundo
+# plano, que mide su trabajo en su propia etapa mientras el hilo principal avanza con la siguiente
+_local = threading.local()
+
+def _current_stage():
+    return getattr(_local, 'stage', None)
+
+def peak_rss_bytes():
+    """
+    Devuelve la memoria residente máxima del proceso en bytes (None si el sistema no la informa).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux la informa en KiB y macOS en bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def file_size(path):
+    """
+    Devuelve el tamaño de un archivo en bytes, o 0 si no existe.
+    """
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+class StageMetrics:
+    """
+    Acumula las mediciones de una etapa del pipeline. Cada sección medida con `measure` registra su
+    tiempo real y de CPU, la memoria residente máxima del proceso al terminar y los contadores que
+    indique el código medido (filas, bytes leídos y escritos).
+    """
+
+    def __init__(self, stage, profile=PROFILE):
+        self.stage = stage
+        self.profile = profile
+        self.records = []
+        self.started_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+        self._open_records = []
+        self._profiler = cProfile.Profile() if profile in ('cprofile', 'all') else None
+        self._trace_memory = profile in ('tracemalloc', 'all')
+        if self._trace_memory:
+            tracemalloc.start()
+        if self._profiler is not None:
+            self._profiler.enable()
+
+    @contextmanager
+    def measure(self, name, table=None, **counters):
+        """
+        Mide el bloque de código. Devuelve el registro de la sección para que el código medido
+        complete sus contadores (por ejemplo, `record['rows'] = len(df)`).
+        """
+        record = {'name': name, 'table': table, 'depth': len(self._open_records),
+                  'rows': None, 'bytes_read': None, 'bytes_written': None}
+        record.update(counters)
+        if self._trace_memory:
+            record['_child_peak'] = 0
+            tracemalloc.reset_peak()
+        self._open_records.append(record)
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_seconds'] = round(time.perf_counter() - start_wall, 6)
+            record['cpu_seconds'] = round(time.process_time() - start_cpu, 6)
+            record['peak_rss_bytes'] = peak_rss_bytes()
+            if self._trace_memory:
+                # reset_peak de las secciones internas no debe ocultar su pico a la sección que las contiene
+                peak = max(tracemalloc.get_traced_memory()[1], record.pop('_child_peak'))
+                record['tracemalloc_peak_bytes'] = peak
+            self._open_records.pop()
+            if self._trace_memory and self._open_records:
+                parent = self._open_records[-1]
+                parent['_child_peak'] = max(parent['_child_peak'], record['tracemalloc_peak_bytes'])
+            self.records.append(record)
+
+    def record(self, name, table=None, **values):
+        """
+        Registra una sección medida fuera de este proceso (por ejemplo, en un proceso de trabajo).
+        """
+        record = {'name': name, 'table': table, 'depth': len(self._open_records),
+                  'rows': None, 'bytes_read': None, 'bytes_written': None}
+        record.update(values)
+        self.records.append(record)
+        return record
+
+    def summary(self):
+        """
+        Agrupa las secciones por nombre (tiempos, filas y bytes sumados) para ver qué domina la etapa.
+        """
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record['name'], {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0,
+                                                       'rows': 0, 'bytes_read': 0, 'bytes_written': 0})
+            total['calls'] += 1
+            for field in ('wall_seconds', 'cpu_seconds', 'rows', 'bytes_read', 'bytes_written'):
+                total[field] += record.get(field) or 0
+        return dict(sorted(totals.items(), key=lambda item: item[1]['wall_seconds'], reverse=True))
+
+    def finish(self, metrics_dir=METRICS_DIR):
+        """
+        Detiene el perfilado y escribe el archivo JSON de métricas de la etapa. Devuelve su ruta.
+        """
+        os.makedirs(metrics_dir, exist_ok=True)
+        result = {
+            'stage': self.stage,
+            'started_at': self.started_at,
+            'wall_seconds': round(time.perf_counter() - self._start_wall, 6),
+            'cpu_seconds': round(time.process_time() - self._start_cpu, 6),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'profile': self.profile or None,
+            'summary': self.summary(),
+            'sections': self.records,
+        }
+
+        if self._profiler is not None:
+            self._profiler.disable()
+            profile_path = os.path.join(metrics_dir, f"{self.stage}_profile.prof")
+            self._profiler.dump_stats(profile_path)
+            with open(os.path.join(metrics_dir, f"{self.stage}_profile.txt"), 'w', encoding='utf-8') as f:
+                pstats.Stats(self._profiler, stream=f).sort_stats('cumulative').print_stats(30)
+            result['cprofile_path'] = profile_path
+
+        if self._trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            result['tracemalloc_top'] = [
+                {'location': str(stat.traceback), 'size_bytes': stat.size, 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:15]
+            ]
+            tracemalloc.stop()
+
+        metrics_path = os.path.join(metrics_dir, f"{self.stage}_metrics.json")
+        with open(metrics_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False, default=str)
+        print(f"Métricas de la etapa '{self.stage}' guardadas en: {metrics_path}")
+        return metrics_path
+
+def start_stage(stage, profile=PROFILE):
+    """
+    Inicia la medición de una etapa; las llamadas posteriores a `measure` se registran en ella.
+    """
+    _local.stage = StageMetrics(stage, profile)
+    return _local.stage
+
+def detach_stage():
+    """
+    Quita la etapa en curso sin cerrarla (se cierra más tarde con `StageMetrics.finish`), de modo que se
+    pueda iniciar la etapa siguiente mientras termina su trabajo en segundo plano. El perfil de funciones
+    de la etapa se detiene aquí.
+    """
+    stage, _local.stage = _current_stage(), None
+    if stage is not None and stage._profiler is not None:
+        stage._profiler.disable()
+    return stage
+
+def finish_stage():
+    """
+    Escribe las métricas de la etapa en curso y la cierra. No hace nada si no hay etapa iniciada.
+    """
+    stage, _local.stage = _current_stage(), None
+    if stage is None:
+        return None
+    return stage.finish()
+
+@contextmanager
+def measure(name, table=None, **counters):
+    """
+    Mide un bloque de código en la etapa en curso. Si no hay etapa iniciada (por ejemplo, cuando las
+    funciones se usan desde otro script) el bloque se ejecuta sin registrar nada.
+    """
+    stage = _current_stage()
+    if stage is None:
+        yield {}
+        return
+    with stage.measure(name, table, **counters) as record:
+        yield record
+
+def record(name, table=None, **values):
+    """
+    Registra en la etapa en curso una sección medida en otro proceso.
+    """
+    stage = _current_stage()
+    if stage is None:
+        return {}
+    return stage.record(name, table, **values)
+
+def timed(func):
+    """
+    Decorador que mide cada llamada a la función con su nombre.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with measure(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,191 @@
+import os
+import json
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+import ingestion
+import cleaning
+import enrichment
+
+# Ejecuta las etapas del pipeline en un único proceso, como un grafo de dependencias (DAG). La ingesta
+# escribe ingestion.db mientras lee los CSV por bloques y la limpieza la lee de ahí; la limpieza entrega
+# a la etapa de enriquecimiento las tablas limpias en memoria (sin volver a leerlas de cleaned_data.db)
+# y guarda la base de datos y su reporte en un hilo en segundo plano mientras el enriquecimiento avanza
+# (un hilo y no un proceso, para no enviar una segunda copia de las tablas limpias a otro proceso; la
+# escritura de sqlite3 libera el GIL mientras SQLite trabaja).
+# Cada base de datos es el punto de control de su etapa: con --resume se omiten las etapas cuyo punto de
+# control sigue vigente según el manifiesto de puntos de control, y con --stages se ejecutan solo las
+# etapas indicadas, leyendo de disco las salidas de las que no se ejecutan.
+# La persistencia en segundo plano se desactiva con BIGDATA_PIPELINE_BACKGROUND=0 (y con
+# BIGDATA_PROFILE=tracemalloc o all, porque tracemalloc es global al proceso y no se puede repartir entre etapas).
+BACKGROUND = os.environ.get('BIGDATA_PIPELINE_BACKGROUND', '1') != '0'
+
+STAGES = ['ingestion', 'cleaning', 'enrichment']
+DEPENDENCIES = {'ingestion': [], 'cleaning': ['ingestion'], 'enrichment': ['cleaning']}
+CHECKPOINTS = {
+    'ingestion': 'src/static/db/ingestion.db',
+    'cleaning': 'src/static/db/cleaned_data.db',
+    'enrichment': 'src/static/db/enriched_data.db',
+}
+CHECKPOINTS_PATH = 'src/static/db/pipeline_checkpoints.json'
+
+def execution_order(stages):
+    """
+    Ordena las etapas indicadas de modo que cada una se ejecute después de sus dependencias.
+    """
+    order = []
+    visiting = set()
+
+    def visit(stage):
+        if stage in order:
+            return
+        if stage in visiting:
+            raise ValueError(f"Dependencia circular en la etapa '{stage}'")
+        visiting.add(stage)
+        for dependency in DEPENDENCIES[stage]:
+            if dependency in stages:
+                visit(dependency)
+        visiting.discard(stage)
+        order.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return order
+
+def load_checkpoints():
+    """
+    Carga el manifiesto de puntos de control, o un diccionario vacío si no existe.
+    """
+    if not os.path.exists(CHECKPOINTS_PATH):
+        return {}
+    with open(CHECKPOINTS_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_checkpoints(checkpoints):
+    """
+    Guarda el manifiesto de puntos de control.
+    """
+    os.makedirs(os.path.dirname(CHECKPOINTS_PATH), exist_ok=True)
+    with open(CHECKPOINTS_PATH, 'w', encoding='utf-8') as f:
+        json.dump(checkpoints, f, indent=2, ensure_ascii=False)
+
+def _checkpoint_entry(stage, output=None):
+    path = CHECKPOINTS[stage]
+    entry = {'path': path, 'size': os.path.getsize(path), 'mtime': os.path.getmtime(path),
+             'completed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+    if stage == 'ingestion' and output is not None:
+        # La ingesta también depende de sus fuentes: se guarda la ruta del dataset y la huella de sus CSV
+        entry['sources'] = {'dataset_path': output,
+                            'fingerprint': ingestion.sources_fingerprint(ingestion.find_csv_sources(output))}
+    return entry
+
+def _sources_unchanged(sources):
+    """
+    Indica si los CSV del dataset (y sus entradas en el registro de esquemas) son los mismos con los que
+    se completó la ingesta. El dataset es el de BIGDATA_DATASET_PATH o, si no se indica, el descargado
+    de Kaggle en la ejecución anterior (no se vuelve a descargar para comprobarlo).
+    """
+    if not sources:
+        return False
+    dataset_path = ingestion.DATASET_PATH or sources['dataset_path']
+    if dataset_path != sources['dataset_path'] or not os.path.isdir(dataset_path):
+        return False
+    try:
+        return ingestion.sources_fingerprint(ingestion.find_csv_sources(dataset_path)) == sources['fingerprint']
+    except FileNotFoundError:
+        return False
+
+def checkpoint_is_valid(stage, checkpoints):
+    """
+    Indica si la base de datos de la etapa es la que dejó la última ejecución completa de la etapa
+    en el pipeline (mismo tamaño y fecha de modificación) y, para la ingesta, si sus fuentes no cambiaron.
+    """
+    entry = checkpoints.get(stage)
+    path = CHECKPOINTS[stage]
+    valid = (entry is not None and os.path.exists(path) and entry['size'] == os.path.getsize(path)
+             and entry['mtime'] == os.path.getmtime(path))
+    if valid and stage == 'ingestion':
+        valid = _sources_unchanged(entry.get('sources'))
+    return valid
+
+def _run_ingestion(outputs, background):
+    return ingestion.main(ingestion.DATASET_PATH)
+
+def _run_cleaning(outputs, background):
+    return cleaning.main(background=background)
+
+def _run_enrichment(outputs, background):
+    return enrichment.main(cleaned_data=outputs.get('cleaning'))
+
+RUNNERS = {'ingestion': _run_ingestion, 'cleaning': _run_cleaning, 'enrichment': _run_enrichment}
+
+def _persisted(output):
+    """
+    Indica si terminó sin errores la escritura en segundo plano de la salida de una etapa (si la tiene).
+    """
+    pending = getattr(output, 'pending', None)
+    return pending is None or pending.exception() is None
+
+def run_pipeline(stages=None, resume=False, background=BACKGROUND):
+    """
+    Ejecuta las etapas indicadas (todas si `stages` es None) en orden de dependencias, pasando la salida
+    en memoria de cada etapa a las siguientes. Con `resume` se omiten las etapas cuyo punto de control
+    es válido, siempre que no se haya vuelto a ejecutar ninguna de sus dependencias.
+    Devuelve las etapas ejecutadas.
+    """
+    stages = STAGES if stages is None else stages
+    if background and metrics.PROFILE in ('tracemalloc', 'all'):
+        print("BIGDATA_PROFILE incluye tracemalloc: la base de datos limpia se guardará sin segundo plano.")
+        background = False
+
+    checkpoints = load_checkpoints()
+    outputs = {}
+    executed = []
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        try:
+            for stage in execution_order(stages):
+                if resume and checkpoint_is_valid(stage, checkpoints) and \
+                        not any(dependency in executed for dependency in DEPENDENCIES[stage]):
+                    print(f"Etapa '{stage}' omitida: punto de control vigente en {CHECKPOINTS[stage]}")
+                    continue
+                for dependency in DEPENDENCIES[stage]:
+                    if dependency not in outputs and not os.path.exists(CHECKPOINTS[dependency]):
+                        raise FileNotFoundError(f"La etapa '{stage}' necesita {CHECKPOINTS[dependency]}; "
+                                                f"ejecute antes la etapa '{dependency}'")
+                print(f"\n===== Etapa: {stage} =====")
+                outputs[stage] = RUNNERS[stage](outputs, executor if background else None)
+                executed.append(stage)
+        finally:
+            # Esperar las escrituras en segundo plano y registrar los puntos de control completos
+            executor.shutdown(wait=True)
+            for stage in executed:
+                if _persisted(outputs[stage]):
+                    checkpoints[stage] = _checkpoint_entry(stage, outputs[stage])
+                else:
+                    checkpoints.pop(stage, None)
+            save_checkpoints(checkpoints)
+
+    # Propagar el error de una escritura en segundo plano que ninguna etapa posterior haya esperado
+    for stage in executed:
+        pending = getattr(outputs[stage], 'pending', None)
+        if pending is not None:
+            pending.result()
+    return executed
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecuta las etapas del pipeline en un único proceso.")
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help="Etapas a ejecutar, separadas por comas (por defecto todas)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Omitir las etapas cuyo punto de control sigue vigente")
+    args = parser.parse_args()
+
+    stages = [stage for stage in STAGES if stage in args.stages.split(',')]
+    if not stages:
+        parser.error(f"Etapas válidas: {', '.join(STAGES)}")
+    executed = run_pipeline(stages, resume=args.resume)
+    print(f"Pipeline completado. Etapas ejecutadas: {', '.join(executed) or 'ninguna'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import os
+import json
+import pickle
+import hashlib
+import pandas as pd
+import metrics
+
+# Fuentes adicionales (de referencia) del enriquecimiento: un registro de fuentes, cada una con su archivo,
+# la función que lo interpreta y, si el pipeline lo genera, los datos y la función que lo escribe.
+# Las tablas interpretadas se guardan en una caché binaria (pickle) con el hash SHA-256 del archivo en el
+# nombre, así que un archivo solo se vuelve a interpretar cuando cambia su contenido. Los archivos generados
+# solo se vuelven a escribir si faltan, si cambiaron desde que se generaron o si cambian sus datos.
+# Para añadir una fuente basta con registrarla con `register_source`; su tabla queda en el resultado de
+# `load_sources` con el nombre registrado.
+CACHE_DIR = 'src/static/cache/reference'
+MANIFEST_PATH = os.path.join(CACHE_DIR, 'reference_manifest.json')
+
+SOURCES = {}
+
+def register_source(name, path, parse, create=None, definition=None, version=1):
+    """
+    Registra una fuente adicional. `parse(path)` devuelve su tabla (o valor) ya normalizado y, si la fuente
+    la genera el pipeline, `create(path, definition)` escribe el archivo a partir de `definition`, que debe
+    poder serializarse como JSON. `version` se incrementa cuando cambian `parse` o `create`, para invalidar
+    la caché y los archivos generados con la versión anterior.
+    """
+    SOURCES[name] = {'path': path, 'parse': parse, 'create': create, 'definition': definition,
+                     'version': version}
+
+def file_sha256(path):
+    """
+    Devuelve el hash SHA-256 del contenido de un archivo.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _definition_sha256(source):
+    payload = json.dumps({'definition': source['definition'], 'version': source['version']}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def load_manifest():
+    """
+    Carga el manifiesto de los archivos generados (hash de sus datos y de su contenido al generarlos).
+    """
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+def create_sources(sources=None):
+    """
+    Genera los archivos de las fuentes registradas con `create` que faltan, que cambiaron desde que se
+    generaron o cuyos datos cambiaron. Devuelve los nombres de las fuentes escritas.
+    """
+    manifest = load_manifest()
+    written = []
+    for name in sources or list(SOURCES):
+        source = SOURCES[name]
+        if source['create'] is None:
+            continue
+        definition_hash = _definition_sha256(source)
+        entry = manifest.get(name)
+        if (entry is not None and entry['definition'] == definition_hash and os.path.exists(source['path'])
+                and file_sha256(source['path']) == entry['sha256']):
+            continue
+        with metrics.measure('create_reference', table=name):
+            os.makedirs(os.path.dirname(source['path']), exist_ok=True)
+            source['create'](source['path'], source['definition'])
+        manifest[name] = {'path': source['path'], 'definition': definition_hash,
+                          'sha256': file_sha256(source['path'])}
+        written.append(name)
+    save_manifest(manifest)
+    print(f"Fuentes adicionales generadas: {', '.join(written) or 'ninguna (sin cambios)'}")
+    return written
+
+def _cache_path(name, source, content_hash):
+    return os.path.join(CACHE_DIR, f"{name}_v{source['version']}_{content_hash[:16]}.pkl")
+
+def load_source(name):
+    """
+    Devuelve la tabla interpretada de una fuente: de la caché si ya se interpretó un archivo con el mismo
+    contenido y, si no, interpretando el archivo y guardando el resultado en la caché.
+    """
+    source = SOURCES[name]
+    content_hash = file_sha256(source['path'])
+    cache_path = _cache_path(name, source, content_hash)
+    if os.path.exists(cache_path):
+        with metrics.measure('load_reference_cache', table=name):
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+
+    with metrics.measure('parse_reference', table=name):
+        value = source['parse'](source['path'])
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Solo se conserva la caché del contenido actual de la fuente
+    prefix = f"{name}_v"
+    for cached in os.listdir(CACHE_DIR):
+        if cached.startswith(prefix) and cached.endswith('.pkl'):
+            os.remove(os.path.join(CACHE_DIR, cached))
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+    print(f"Fuente '{name}' interpretada desde {source['path']}")
+    return value
+
+def load_sources(sources=None):
+    """
+    Devuelve un diccionario con la tabla interpretada de cada fuente registrada (o de las indicadas).
+    """
+    return {name: load_source(name) for name in sources or list(SOURCES)}
+
+# Fuentes adicionales del proyecto
+
+def _write_json(path, definition):
+    with open(path, 'w') as f:
+        json.dump(definition, f, indent=4)
+
+def _parse_json(path):
+    with open(path, 'r') as f:
+        return pd.DataFrame(json.load(f)['additional_categories'])
+
+def _write_xlsx(path, definition):
+    pd.DataFrame(definition).to_excel(path, index=False)
+
+def _write_csv(path, definition):
+    pd.DataFrame(definition).to_csv(path, index=False)
+
+def _write_xml(path, definition):
+    # ElementTree se importa solo donde se usa
+    import xml.etree.ElementTree as ET
+    root = ET.Element("payment_methods")
+    for method in definition:
+        elem = ET.SubElement(root, "payment_method")
+        for key, value in method.items():
+            ET.SubElement(elem, key).text = value
+    ET.ElementTree(root).write(path)
+
+def _parse_xml(path):
+    import xml.etree.ElementTree as ET
+    root = ET.parse(path).getroot()
+    xml_data = []
+    for method in root.findall('payment_method'):
+        xml_data.append({
+            'id': method.find('id').text,
+            'name': method.find('name').text,
+            'processing_fee': float(method.find('processing_fee').text)
+        })
+    return pd.DataFrame(xml_data)
+
+def _write_text(path, definition):
+    with open(path, 'w') as f:
+        f.write(definition)
+
+def _parse_html(path):
+    return pd.read_html(path)[0]
+
+def _parse_text(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+# 1. JSON: categorías de productos
+register_source('json_data', 'src/static/json/additional_data.json', _parse_json, _write_json, {
+    "additional_categories": [
+        {"category_id": "CAT001", "category_name": "Electronics", "tax_rate": 0.19},
+        {"category_id": "CAT002", "category_name": "Home & Garden", "tax_rate": 0.16},
+        {"category_id": "CAT003", "category_name": "Fashion", "tax_rate": 0.12}
+    ]
+})
+
+# 2. XLSX: tarifas de envío por rango de peso
+register_source('xlsx_data', 'src/static/xlsx/additional_data.xlsx', pd.read_excel, _write_xlsx, {
+    'weight_range': ['0-1kg', '1-2kg', '2-5kg', '5-10kg', '>10kg'],
+    'base_rate': [10.0, 15.0, 25.0, 40.0, 60.0],
+    'express_rate': [20.0, 30.0, 45.0, 70.0, 100.0]
+})
+
+# 3. CSV: segmentos de clientes
+register_source('csv_data', 'src/static/csv/additional_data.csv', pd.read_csv, _write_csv, {
+    'segment_id': ['S1', 'S2', 'S3', 'S4'],
+    'segment_name': ['Bronze', 'Silver', 'Gold', 'Platinum'],
+    'min_purchase': [0, 1000, 5000, 10000],
+    'discount_rate': [0.00, 0.05, 0.10, 0.15]
+})
+
+# 4. XML: métodos de pago y sus tarifas de procesamiento
+register_source('xml_data', 'src/static/xml/additional_data.xml', _parse_xml, _write_xml, [
+    {"id": "PM001", "name": "Credit Card", "processing_fee": "2.5"},
+    {"id": "PM002", "name": "Debit Card", "processing_fee": "1.5"},
+    {"id": "PM003", "name": "Bank Transfer", "processing_fee": "0.5"}
+])
+
+# 5. HTML: servicios de entrega
+register_source('html_data', 'src/static/html/additional_data.html', _parse_html, _write_text, """
+    <table>
+        <tr><th>Delivery Service</th><th>Delivery Time</th><th>Cost Factor</th></tr>
+        <tr><td>Standard</td><td>3-5 days</td><td>1.0</td></tr>
+        <tr><td>Express</td><td>1-2 days</td><td>1.5</td></tr>
+        <tr><td>Same Day</td><td>24 hours</td><td>2.0</td></tr>
+    </table>
+    """)
+
+# 6. TXT: calificaciones de proveedores
+register_source('txt_data', 'src/static/txt/additional_data.txt', _parse_text, _write_text, """
+    Supplier Ratings:
+    A - Premium Supplier (Discount: 15%)
+    B - Standard Supplier (Discount: 10%)
+    C - Basic Supplier (Discount: 5%)
+    """)
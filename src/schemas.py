@@ -0,0 +1,291 @@
+import time
+import numpy as np
+import pandas as pd
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:  # pandas < 2.2
+    guess_datetime_format = None
+
+# Formato de todas las marcas de tiempo del dataset Olist (por ejemplo, 2017-10-02 10:56:33)
+OLIST_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Prefijos que añaden las etapas de limpieza y enriquecimiento al nombre de cada tabla
+TABLE_PREFIXES = ('clean_', 'enriched_')
+
+# Registro de esquemas de las tablas del dataset Olist, indexado por el nombre de la tabla de ingesta.
+# Para cada tabla se indica:
+#   - dtypes: tipo de pandas de cada columna ('category' para columnas de baja cardinalidad). Los enteros usan
+#     el tipo nulable 'Int32' para que un valor faltante no impida leer la columna.
+#   - datetimes: columnas de fecha y el formato con el que se interpretan.
+#   - primary_key: columnas que identifican cada registro (se declaran en las tablas limpias).
+SCHEMAS = {
+    'olist_customers_dataset': {
+        'dtypes': {
+            'customer_id': 'str',
+            'customer_unique_id': 'str',
+            'customer_zip_code_prefix': 'Int32',
+            'customer_city': 'category',
+            'customer_state': 'category',
+        },
+        'datetimes': {},
+        'primary_key': ['customer_id'],
+    },
+    'olist_geolocation_dataset': {
+        'dtypes': {
+            'geolocation_zip_code_prefix': 'Int32',
+            'geolocation_lat': 'float64',
+            'geolocation_lng': 'float64',
+            'geolocation_city': 'category',
+            'geolocation_state': 'category',
+        },
+        'datetimes': {},
+        'primary_key': [],
+    },
+    'olist_order_items_dataset': {
+        'dtypes': {
+            'order_id': 'str',
+            'order_item_id': 'Int32',
+            'product_id': 'str',
+            'seller_id': 'str',
+            'price': 'float64',
+            'freight_value': 'float64',
+        },
+        'datetimes': {
+            'shipping_limit_date': OLIST_DATETIME_FORMAT,
+        },
+        'primary_key': ['order_id', 'order_item_id'],
+    },
+    'olist_order_payments_dataset': {
+        'dtypes': {
+            'order_id': 'str',
+            'payment_sequential': 'Int32',
+            'payment_type': 'category',
+            'payment_installments': 'Int32',
+            'payment_value': 'float64',
+        },
+        'datetimes': {},
+        'primary_key': ['order_id', 'payment_sequential'],
+    },
+    'olist_order_reviews_dataset': {
+        'dtypes': {
+            'review_id': 'str',
+            'order_id': 'str',
+            'review_score': 'Int32',
+            'review_comment_title': 'str',
+            'review_comment_message': 'str',
+        },
+        'datetimes': {
+            'review_creation_date': OLIST_DATETIME_FORMAT,
+            'review_answer_timestamp': OLIST_DATETIME_FORMAT,
+        },
+        # review_id se repite en algunas reseñas asociadas a varias órdenes
+        'primary_key': ['review_id', 'order_id'],
+    },
+    'olist_orders_dataset': {
+        'dtypes': {
+            'order_id': 'str',
+            'customer_id': 'str',
+            'order_status': 'category',
+        },
+        'datetimes': {
+            'order_purchase_timestamp': OLIST_DATETIME_FORMAT,
+            'order_approved_at': OLIST_DATETIME_FORMAT,
+            'order_delivered_carrier_date': OLIST_DATETIME_FORMAT,
+            'order_delivered_customer_date': OLIST_DATETIME_FORMAT,
+            'order_estimated_delivery_date': OLIST_DATETIME_FORMAT,
+        },
+        'primary_key': ['order_id'],
+    },
+    'olist_products_dataset': {
+        'dtypes': {
+            'product_id': 'str',
+            'product_category_name': 'category',
+            'product_name_lenght': 'float64',
+            'product_description_lenght': 'float64',
+            'product_photos_qty': 'float64',
+            'product_weight_g': 'float64',
+            'product_length_cm': 'float64',
+            'product_height_cm': 'float64',
+            'product_width_cm': 'float64',
+        },
+        'datetimes': {},
+        'primary_key': ['product_id'],
+    },
+    'olist_sellers_dataset': {
+        'dtypes': {
+            'seller_id': 'str',
+            'seller_zip_code_prefix': 'Int32',
+            'seller_city': 'category',
+            'seller_state': 'category',
+        },
+        'datetimes': {},
+        'primary_key': ['seller_id'],
+    },
+    'product_category_name_translation': {
+        # El CSV incluye un BOM UTF-8 que, al leerse en latin1, queda al inicio del nombre de la primera columna
+        'dtypes': {
+            'ï»¿product_category_name': 'str',
+            'product_category_name_english': 'str',
+        },
+        'datetimes': {},
+        'primary_key': ['ï»¿product_category_name'],
+    },
+}
+
+def get_schema(table_name):
+    """
+    Devuelve el esquema registrado para una tabla, aceptando también los nombres con prefijo
+    de las etapas de limpieza y enriquecimiento (clean_..., enriched_...). None si no está registrada.
+    """
+    for prefix in TABLE_PREFIXES:
+        if table_name.startswith(prefix):
+            table_name = table_name[len(prefix):]
+            break
+    return SCHEMAS.get(table_name)
+
+def read_csv_dtypes(table_name):
+    """
+    Devuelve el diccionario de dtypes para `pd.read_csv` de una tabla registrada.
+    Las columnas de fecha se leen como texto y se convierten después con `parse_datetimes`.
+    """
+    schema = get_schema(table_name)
+    if schema is None:
+        return None
+    return dict(schema['dtypes'])
+
+def datetime_format(table_name, column):
+    """
+    Devuelve el formato registrado para una columna de fecha, o None si la columna no está registrada.
+    """
+    schema = get_schema(table_name)
+    if schema is None:
+        return None
+    return schema['datetimes'].get(column)
+
+def guess_format(series):
+    """
+    Deduce el formato de fecha de una columna de texto a partir de su primer valor no nulo
+    (None si no se puede deducir; en ese caso pandas lo infiere al convertir).
+    """
+    values = series.dropna()
+    if values.empty or guess_datetime_format is None:
+        return None
+    return guess_datetime_format(str(values.iloc[0]))
+
+def to_datetime_cached(series, date_format=None, stats=None):
+    """
+    Convierte una columna de texto a datetime interpretando una sola vez cada valor distinto:
+    los valores se factorizan, se convierten los únicos con el formato indicado y el resultado se
+    reparte a todas las filas. Los valores que no cumplen el formato quedan como NaT.
+    Si se pasa `stats` (diccionario), se acumulan por columna los valores procesados, los distintos,
+    los nulos generados por valores inválidos y el tiempo de conversión.
+    """
+    start_time = time.perf_counter()
+    codes, uniques = pd.factorize(series)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format=date_format, errors='coerce')
+    # El último elemento (NaT) es el que corresponde a los nulos (código -1)
+    parsed_values = np.append(parsed.to_numpy(dtype='datetime64[ns]'), np.datetime64('NaT', 'ns'))
+    result = pd.Series(parsed_values[codes], index=series.index, name=series.name)
+    if stats is not None:
+        column_stats = stats.setdefault(series.name, {'format': date_format, 'values': 0, 'unique': 0,
+                                                      'coerced': 0, 'seconds': 0.0})
+        column_stats['values'] += len(series)
+        column_stats['unique'] += len(uniques)
+        column_stats['coerced'] += int(parsed.isna().to_numpy()[codes[codes >= 0]].sum())
+        column_stats['seconds'] += time.perf_counter() - start_time
+    return result
+
+def describe_datetime_stats(column, column_stats):
+    """
+    Describe en una línea la conversión de una columna de fecha para los reportes de auditoría.
+    """
+    seconds = column_stats['seconds']
+    throughput = column_stats['values'] / seconds if seconds > 0 else 0
+    return (f"{column}: {column_stats['values']} valores ({column_stats['unique']} distintos) con formato "
+            f"{column_stats['format'] or 'inferido'}, {column_stats['coerced']} nulos por valores inválidos, "
+            f"{throughput:.0f} valores/s")
+
+def parse_datetimes(df, table_name, stats=None):
+    """
+    Convierte las columnas de fecha registradas de la tabla usando su formato explícito,
+    sin que pandas tenga que inferirlo, e interpretando una sola vez cada valor repetido
+    (ver `to_datetime_cached`). Los valores que no cumplen el formato quedan como NaT.
+    """
+    schema = get_schema(table_name)
+    if schema is None:
+        return df
+    for column, date_format in schema['datetimes'].items():
+        if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = to_datetime_cached(df[column], date_format, stats)
+    return df
+
+def apply_schema(df, table_name, datetime_stats=None):
+    """
+    Aplica los tipos registrados a un DataFrame leído de SQLite (que devuelve texto y números genéricos):
+    categorías, enteros y fechas. Las columnas que no están en el registro se dejan como están.
+    `datetime_stats` recoge las estadísticas de conversión de las fechas (ver `to_datetime_cached`).
+    """
+    schema = get_schema(table_name)
+    if schema is None:
+        return df
+    for column, dtype in schema['dtypes'].items():
+        if column not in df.columns or dtype == 'str':
+            continue
+        try:
+            df[column] = df[column].astype(dtype)
+        except (TypeError, ValueError) as e:
+            print(f"No se pudo convertir '{column}' de '{table_name}' a {dtype}: {e}")
+    return parse_datetimes(df, table_name, datetime_stats)
+
+def primary_key(table_name, columns=None):
+    """
+    Devuelve las columnas de clave primaria registradas para la tabla. Si se indican las columnas
+    disponibles y falta alguna de la clave, devuelve una lista vacía.
+    """
+    schema = get_schema(table_name)
+    if schema is None:
+        return []
+    key = list(schema['primary_key'])
+    if columns is not None and not all(column in columns for column in key):
+        return []
+    return key
+
+def quote_identifier(name):
+    """
+    Escapa un nombre de tabla o columna para usarlo en una sentencia SQL.
+    """
+    return '"' + str(name).replace('"', '""') + '"'
+
+def sqlite_type(series):
+    """
+    Devuelve el tipo de columna SQLite equivalente al dtype de pandas de la serie.
+    Si la serie no tiene ningún valor (todo nulo) no se declara tipo para no forzar la afinidad.
+    Las fechas se declaran como `TIMESTAMP` pero se guardan como texto con el formato del dataset
+    (ver `sqlite_writer.dataframe_rows`), para que las bases de datos publicadas sigan siendo legibles;
+    al leerlas de SQLite se vuelven a convertir con `apply_schema`, una vez por valor distinto.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return sqlite_type(series.cat.categories.to_series()) if len(series.cat.categories) else "TEXT"
+    if series.isna().all():
+        return ""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(series):
+        return "REAL"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "TIMESTAMP"
+    return "TEXT"
+
+def create_table_sql(table_name, df, key=None):
+    """
+    Genera la sentencia CREATE TABLE para un DataFrame, con el tipo SQLite de cada columna y,
+    si se indica, la clave primaria.
+    """
+    columns = [
+        f"{quote_identifier(column)} {sqlite_type(df[column])}".rstrip()
+        for column in df.columns
+    ]
+    if key:
+        columns.append(f"PRIMARY KEY ({', '.join(quote_identifier(column) for column in key)})")
+    return f"CREATE TABLE {quote_identifier(table_name)} ({', '.join(columns)})"
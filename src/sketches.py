@@ -0,0 +1,180 @@
+import os
+import math
+import numpy as np
+import pandas as pd
+
+# Estructuras de resumen aproximado (sketches) para perfilar columnas en una sola pasada y con memoria
+# acotada: cuantiles con t-digest, valores más frecuentes con Misra-Gries y valores distintos con
+# HyperLogLog. Todas se actualizan por bloques (vectorizado con numpy/pandas) y se pueden combinar.
+# BIGDATA_SKETCH_ERROR fija el error relativo objetivo de las tres (1% por defecto).
+SKETCH_ERROR = float(os.environ.get('BIGDATA_SKETCH_ERROR', 0.01))
+
+def _bit_length(values):
+    """
+    Devuelve el número de bits significativos de cada entero sin signo de 64 bits (0 para el valor 0).
+    Se separa en dos mitades de 32 bits para que la conversión a float64 sea exacta.
+    """
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, np.frexp(high)[1] + 32, np.frexp(low)[1])
+
+class TDigest:
+    """
+    Resumen t-digest para estimar cuantiles (por ejemplo, la mediana) de una columna numérica.
+    Los valores se agrupan en centroides más pequeños cerca de los extremos que en el centro
+    (función de escala k1); con pocas filas cada valor es su propio centroide y el resultado es exacto.
+    """
+
+    def __init__(self, compression):
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.count = 0
+
+    def update(self, values):
+        values = pd.Series(values, dtype='float64').dropna().to_numpy()
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self._compress(np.concatenate([self.means, values]),
+                       np.concatenate([self.weights, np.ones(len(values))]))
+
+    def merge(self, other):
+        if other.count:
+            self.count += other.count
+            self._compress(np.concatenate([self.means, other.means]),
+                           np.concatenate([self.weights, other.weights]))
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind='mergesort')
+        means = means[order]
+        weights = weights[order]
+        if len(means) <= self.compression:
+            self.means, self.weights = means, weights
+            return
+        total = weights.sum()
+        # Cada punto se asigna al centroide de su posición en la escala k1; como los puntos están
+        # ordenados, los centroides son tramos contiguos que abarcan a lo sumo una unidad de k
+        quantiles = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * quantiles - 1)
+        clusters = np.floor(k - k[0]).astype(np.intp)
+        cluster_weights = np.bincount(clusters, weights=weights)
+        cluster_sums = np.bincount(clusters, weights=means * weights)
+        non_empty = cluster_weights > 0
+        self.weights = cluster_weights[non_empty]
+        self.means = cluster_sums[non_empty] / self.weights
+
+    def quantile(self, q):
+        """
+        Estima el cuantil `q` (0-1) interpolando entre los centroides. NaN si no hay valores.
+        """
+        if self.count == 0:
+            return float('nan')
+        positions = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.weights.sum(), positions, self.means))
+
+    def describe(self):
+        return f"t-digest (compresión {self.compression}, {len(self.means)} centroides)"
+
+class FrequentItems:
+    """
+    Resumen Misra-Gries de los valores más frecuentes de una columna con `capacity` contadores.
+    Cada frecuencia se subestima como mucho en n / (capacity + 1), siendo n el número de valores vistos.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype='int64')
+        self.total = 0
+        self.max_error = 0
+
+    def update(self, values):
+        counts = pd.Series(values).value_counts()
+        counts = counts[counts > 0]
+        if counts.empty:
+            return
+        counts.index = counts.index.astype(object)
+        self.total += int(counts.sum())
+        self._reduce(self.counts.add(counts, fill_value=0) if len(self.counts) else counts)
+
+    def merge(self, other):
+        self.total += other.total
+        self.max_error += other.max_error
+        self._reduce(self.counts.add(other.counts, fill_value=0) if len(self.counts) else other.counts)
+
+    def _reduce(self, counts):
+        if len(counts) > self.capacity:
+            # Se descuenta de todos los contadores la frecuencia del primer valor que no cabe
+            counts = counts.sort_values(ascending=False, kind='mergesort')
+            cut = counts.iloc[self.capacity]
+            counts = counts.iloc[:self.capacity] - cut
+            counts = counts[counts > 0]
+            self.max_error += int(cut)
+        self.counts = counts.astype('int64')
+
+    def top(self, n=3):
+        """
+        Devuelve los `n` valores más frecuentes con su frecuencia estimada, de mayor a menor.
+        """
+        counts = self.counts.sort_values(ascending=False, kind='mergesort').head(n)
+        return [(value, int(count)) for value, count in counts.items()]
+
+    def describe(self):
+        return f"Misra-Gries ({self.capacity} contadores, error máximo {self.max_error} apariciones)"
+
+class HyperLogLog:
+    """
+    Resumen HyperLogLog para estimar el número de valores distintos (no nulos) de una columna
+    con 2^precision registros de un byte. El error estándar es aproximadamente 1.04 / sqrt(2^precision).
+    """
+
+    def __init__(self, precision):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values):
+        values = pd.Series(values).dropna()
+        if values.empty:
+            return
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        # Los primeros bits eligen el registro y el resto da la posición del primer bit a 1
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        remaining = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - _bit_length(remaining) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Corrección para cardinalidades pequeñas (conteo lineal)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def describe(self):
+        standard_error = 1.04 / math.sqrt(len(self.registers))
+        return f"HyperLogLog (precisión {self.precision}, error estándar {standard_error:.2%})"
+
+def tdigest_for_error(error=SKETCH_ERROR):
+    """
+    Crea un t-digest cuya compresión corresponde aproximadamente al error relativo indicado.
+    """
+    return TDigest(max(20, math.ceil(1 / error)))
+
+def frequent_items_for_error(error=SKETCH_ERROR):
+    """
+    Crea un resumen Misra-Gries cuyas frecuencias se subestiman como mucho en `error` * n.
+    """
+    return FrequentItems(math.ceil(1 / error))
+
+def hyperloglog_for_error(error=SKETCH_ERROR):
+    """
+    Crea un HyperLogLog con el menor número de registros cuyo error estándar no supera `error`.
+    """
+    precision = math.ceil(math.log2((1.04 / error) ** 2))
+    return HyperLogLog(min(18, max(4, precision)))
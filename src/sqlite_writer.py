@@ -0,0 +1,187 @@
+import os
+import sqlite3
+import itertools
+from contextlib import contextmanager
+import pandas as pd
+import schemas
+
+# Escritura masiva en SQLite compartida por las tres etapas. Las bases de datos del pipeline se
+# reconstruyen desde sus fuentes, así que durante la carga se priorizan la velocidad y la memoria sobre
+# la durabilidad: diario WAL, synchronous desactivado, caché grande, páginas grandes y tablas temporales
+# en memoria. Al terminar se crean los índices de las columnas clave, se ejecuta ANALYZE y la base de
+# datos vuelve al diario por defecto (DELETE) para que quede en un único archivo.
+# Se puede ajustar con BIGDATA_SQLITE_JOURNAL_MODE, BIGDATA_SQLITE_SYNCHRONOUS y BIGDATA_SQLITE_CACHE_MB.
+JOURNAL_MODE = os.environ.get('BIGDATA_SQLITE_JOURNAL_MODE', 'WAL').upper()
+SYNCHRONOUS = os.environ.get('BIGDATA_SQLITE_SYNCHRONOUS', 'OFF').upper()
+CACHE_MB = int(os.environ.get('BIGDATA_SQLITE_CACHE_MB', 256))
+# Solo se aplica a bases de datos nuevas (en una existente requiere VACUUM)
+PAGE_SIZE = 65536
+
+# Número máximo de parámetros por sentencia en las versiones de SQLite anteriores a la 3.32;
+# cada INSERT agrupa tantas filas como caben en ese límite
+MAX_VARIABLES = 999
+
+# Columnas que se indexan, después de la carga, en las tablas que las contienen
+INDEX_COLUMNS = ('order_id', 'customer_id', 'product_id', 'seller_id')
+
+# Tablas auxiliares que no son tablas de datos: el diccionario de identificadores de id_codec.py
+AUXILIARY_TABLES = ('id_dictionary',)
+
+def connect(db_path):
+    """
+    Abre la base de datos con la configuración de carga masiva.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"PRAGMA page_size = {PAGE_SIZE}")
+    conn.execute(f"PRAGMA journal_mode = {JOURNAL_MODE}")
+    conn.execute(f"PRAGMA synchronous = {SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size = {-CACHE_MB * 1024}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+def database_bytes(conn):
+    """
+    Devuelve el tamaño lógico de la base de datos en bytes (páginas por tamaño de página).
+    A diferencia del tamaño del archivo, incluye las páginas que aún están en el diario WAL.
+    """
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+def dataframe_rows(df):
+    """
+    Convierte un DataFrame en una lista de tuplas con tipos nativos de Python,
+    reemplazando los valores nulos por None para que sqlite3 los inserte como NULL.
+    Las fechas se guardan como texto con el formato del dataset (AAAA-MM-DD HH:MM:SS).
+    """
+    values = df.astype(object)
+    for column in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            values[column] = df[column].dt.strftime(schemas.OLIST_DATETIME_FORMAT).astype(object)
+    values = values.where(df.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+def create_table(conn, table_name, df, key=None):
+    """
+    Recrea la tabla con las columnas y tipos del DataFrame y, si se indica, su clave primaria.
+    Para que una carga fallida no deje la tabla anterior eliminada, debe llamarse dentro de `transaction`.
+    """
+    conn.execute(f"DROP TABLE IF EXISTS {schemas.quote_identifier(table_name)}")
+    conn.execute(schemas.create_table_sql(table_name, df, key))
+
+def insert_dataframe(conn, table_name, df):
+    """
+    Inserta las filas del DataFrame con sentencias INSERT de varias filas (tantas como caben en
+    MAX_VARIABLES parámetros) dentro de la transacción en curso, sin confirmarla. Devuelve las filas insertadas.
+    """
+    if df.empty:
+        return 0
+    rows = dataframe_rows(df)
+    row_placeholder = f"({', '.join('?' for _ in df.columns)})"
+    insert_sql = f"INSERT INTO {schemas.quote_identifier(table_name)} VALUES "
+    rows_per_statement = max(1, MAX_VARIABLES // len(df.columns))
+    full_batches = len(rows) - len(rows) % rows_per_statement
+    if full_batches:
+        batch_sql = insert_sql + ", ".join([row_placeholder] * rows_per_statement)
+        for start in range(0, full_batches, rows_per_statement):
+            conn.execute(batch_sql, list(itertools.chain.from_iterable(rows[start:start + rows_per_statement])))
+    if full_batches < len(rows):
+        conn.executemany(insert_sql + row_placeholder, rows[full_batches:])
+    return len(rows)
+
+@contextmanager
+def transaction(conn):
+    """
+    Ejecuta el bloque `with` en una transacción explícita que incluye también las sentencias de
+    definición (DROP y CREATE TABLE): el módulo sqlite3 solo abre la transacción implícita antes de
+    INSERT, UPDATE o DELETE, así que con `with conn` un DROP TABLE se confirma en el acto. Si el bloque
+    falla se deshace todo y la tabla anterior queda intacta.
+    """
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+def write_table(conn, table_name, df, key=None):
+    """
+    Recrea la tabla y carga el DataFrame completo en una única transacción. Devuelve las filas insertadas.
+    """
+    with transaction(conn):
+        create_table(conn, table_name, df, key)
+        return insert_dataframe(conn, table_name, df)
+
+@contextmanager
+def attached(conn, db_path, alias='source'):
+    """
+    Adjunta otra base de datos a la conexión con el alias indicado mientras dura el bloque `with`.
+    """
+    conn.execute("ATTACH DATABASE ? AS " + schemas.quote_identifier(alias), (db_path,))
+    try:
+        yield alias
+    finally:
+        conn.execute("DETACH DATABASE " + schemas.quote_identifier(alias))
+
+def copy_table(conn, table_name, source='source'):
+    """
+    Copia una tabla de la base de datos adjunta `source` (ver `attached`) sin pasar sus filas por Python:
+    recrea la tabla con su CREATE TABLE original y la llena con INSERT INTO ... SELECT *, que SQLite
+    resuelve copiando los registros tal cual porque ambas tablas tienen la misma definición.
+    Los índices no se copian (los crea `finish`). Devuelve las filas copiadas.
+    """
+    quoted_table = schemas.quote_identifier(table_name)
+    quoted_source = schemas.quote_identifier(source)
+    row = conn.execute(f"SELECT sql FROM {quoted_source}.sqlite_master WHERE type = 'table' AND name = ?",
+                       (table_name,)).fetchone()
+    if row is None:
+        raise ValueError(f"La tabla '{table_name}' no existe en la base de datos adjunta '{source}'")
+    with transaction(conn):
+        conn.execute(f"DROP TABLE IF EXISTS main.{quoted_table}")
+        # Sin prefijo de esquema, CREATE TABLE crea la tabla en la base de datos principal
+        conn.execute(row[0])
+        conn.execute(f"INSERT INTO main.{quoted_table} SELECT * FROM {quoted_source}.{quoted_table}")
+    return conn.execute(f"SELECT COUNT(*) FROM main.{quoted_table}").fetchone()[0]
+
+def create_key_indexes(conn, table_name):
+    """
+    Crea los índices de las columnas de INDEX_COLUMNS presentes en la tabla, salvo la que encabeza
+    la clave primaria (SQLite ya la indexa). Devuelve los nombres de los índices creados.
+    """
+    table_info = conn.execute(f"PRAGMA table_info({schemas.quote_identifier(table_name)})").fetchall()
+    leading_key = [row[1] for row in table_info if row[5] == 1]
+    indexes = []
+    with conn:
+        for column in (row[1] for row in table_info):
+            if column not in INDEX_COLUMNS or column in leading_key:
+                continue
+            index_name = f"idx_{table_name}_{column}"
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {schemas.quote_identifier(index_name)} "
+                         f"ON {schemas.quote_identifier(table_name)} ({schemas.quote_identifier(column)})")
+            indexes.append(index_name)
+    return indexes
+
+def finish(conn, tables):
+    """
+    Termina la carga: indexa las columnas clave de las tablas escritas, actualiza las estadísticas del
+    planificador con ANALYZE y vuelve al diario por defecto (lo que vuelca el WAL en la base de datos).
+    No cierra la conexión. Devuelve los nombres de los índices creados.
+    """
+    indexes = []
+    for table_name in tables:
+        indexes.extend(create_key_indexes(conn, table_name))
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.execute("PRAGMA synchronous = FULL")
+    return indexes
+
+def list_tables(conn):
+    """
+    Devuelve los nombres de las tablas de datos, sin las tablas internas de SQLite (como sqlite_stat1)
+    ni las tablas auxiliares del pipeline (AUXILIARY_TABLES).
+    """
+    return [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+    ) if row[0] not in AUXILIARY_TABLES]
@@ -0,0 +1,268 @@
+import os
+import argparse
+import binascii
+import numpy as np
+import pandas as pd
+
+# Generador de datos sintéticos con el esquema del dataset Olist, para ejecutar el pipeline y los
+# benchmarks sin descargar el dataset de Kaggle. Con escala 1 se generan aproximadamente tantas filas
+# como en el dataset original; las tasas de nulos y de duplicados imitan las del dataset real.
+BASE_ROWS = {
+    'customers': 99441,
+    'products': 32951,
+    'sellers': 3095,
+    'geolocation': 738332,  # filas únicas; se añade ~35% de filas repetidas (1000163 en el original)
+}
+
+# Proporción de valores nulos por columna, según el dataset original
+NULL_RATES = {
+    'order_approved_at': 0.0016,
+    'order_delivered_carrier_date': 0.0179,
+    'order_delivered_customer_date': 0.0298,
+    'product_category_name': 0.0185,
+    'product_name_lenght': 0.0185,
+    'product_description_lenght': 0.0185,
+    'product_photos_qty': 0.0185,
+    'product_weight_g': 0.0001,
+    'product_length_cm': 0.0001,
+    'product_height_cm': 0.0001,
+    'product_width_cm': 0.0001,
+    'review_comment_title': 0.8834,
+    'review_comment_message': 0.5870,
+}
+GEOLOCATION_DUPLICATE_RATE = 0.3546
+# Proporción de reseñas cuyo review_id se repite en otra orden (como ocurre en el dataset original)
+REPEATED_REVIEW_RATE = 0.008
+GEOLOCATION_BLOCK_ROWS = 1000000
+
+CATEGORIES = {
+    'beleza_saude': 'health_beauty',
+    'informatica_acessorios': 'computers_accessories',
+    'cama_mesa_banho': 'bed_bath_table',
+    'esporte_lazer': 'sports_leisure',
+    'moveis_decoracao': 'furniture_decor',
+    'utilidades_domesticas': 'housewares',
+    'relogios_presentes': 'watches_gifts',
+    'telefonia': 'telephony',
+    'automotivo': 'auto',
+    'brinquedos': 'toys',
+}
+CITIES = {
+    'SP': ['sao paulo', 'campinas', 'guarulhos', 'santo andre', 'sorocaba'],
+    'RJ': ['rio de janeiro', 'niteroi', 'nova iguacu'],
+    'MG': ['belo horizonte', 'uberlandia', 'contagem'],
+    'RS': ['porto alegre', 'caxias do sul'],
+    'PR': ['curitiba', 'londrina'],
+}
+STATE_WEIGHTS = {'SP': 0.42, 'RJ': 0.13, 'MG': 0.12, 'RS': 0.06, 'PR': 0.05}
+ORDER_STATUSES = (['delivered', 'shipped', 'canceled', 'unavailable', 'invoiced', 'processing'],
+                  [0.970, 0.011, 0.006, 0.006, 0.004, 0.003])
+PAYMENT_TYPES = (['credit_card', 'boleto', 'voucher', 'debit_card'], [0.739, 0.190, 0.056, 0.015])
+REVIEW_TITLES = ['recomendo', 'otimo', 'bom', 'muito bom', 'ruim', 'super recomendo']
+REVIEW_MESSAGES = ['produto chegou antes do prazo', 'muito bom', 'recomendo',
+                   'nao recebi o produto', 'produto de qualidade', 'entrega rapida']
+START_DATE = pd.Timestamp('2016-09-04')
+DATE_RANGE_SECONDS = 760 * 86400
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def _ids(rng, n):
+    """
+    Genera `n` identificadores hexadecimales de 32 caracteres (como los del dataset) de forma vectorizada.
+    """
+    hex_bytes = binascii.hexlify(rng.bytes(16 * n))
+    return np.frombuffer(hex_bytes, dtype='S32').astype(str)
+
+def _with_nulls(rng, values, column):
+    """
+    Sustituye por nulos una proporción de los valores igual a la tasa registrada para la columna.
+    """
+    series = pd.Series(values)
+    return series.where(rng.random(len(series)) >= NULL_RATES.get(column, 0.0))
+
+def _format_timestamps(timestamps, column=None, rng=None):
+    """
+    Da a las marcas de tiempo el formato del dataset y, si la columna tiene tasa de nulos, la aplica.
+    """
+    formatted = pd.Series(pd.DatetimeIndex(timestamps).strftime(DATETIME_FORMAT))
+    return _with_nulls(rng, formatted, column) if column in NULL_RATES else formatted
+
+def _locations(rng, n, prefix):
+    """
+    Genera estado, ciudad y código postal coherentes entre sí.
+    """
+    states = np.array(list(STATE_WEIGHTS))
+    weights = np.array(list(STATE_WEIGHTS.values()))
+    chosen_states = rng.choice(states, n, p=weights / weights.sum())
+    cities = np.empty(n, dtype=object)
+    for state in states:
+        mask = chosen_states == state
+        cities[mask] = rng.choice(CITIES[state], mask.sum())
+    return pd.DataFrame({
+        f'{prefix}_zip_code_prefix': rng.integers(1000, 99990, n),
+        f'{prefix}_city': cities,
+        f'{prefix}_state': chosen_states,
+    })
+
+def generate_dataset(output_dir, scale=1.0, seed=42):
+    """
+    Genera los 9 CSV del dataset Olist en `output_dir` con `scale` veces el número de filas del original.
+    Las claves entre tablas son coherentes (órdenes de clientes existentes, ítems de productos y vendedores
+    existentes, etc.). Devuelve un diccionario con el número de filas de cada archivo generado.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    n_customers = max(1, int(BASE_ROWS['customers'] * scale))
+    n_products = max(1, int(BASE_ROWS['products'] * scale))
+    n_sellers = max(1, int(BASE_ROWS['sellers'] * scale))
+    n_geolocation = max(1, int(BASE_ROWS['geolocation'] * scale))
+    row_counts = {}
+
+    def write(name, df):
+        df.to_csv(os.path.join(output_dir, f"{name}.csv"), index=False)
+        row_counts[name] = len(df)
+
+    # Clientes (una orden por cliente, como en el dataset original)
+    customers = pd.DataFrame({
+        'customer_id': _ids(rng, n_customers),
+        'customer_unique_id': _ids(rng, n_customers),
+    })
+    # Algunos clientes compran más de una vez: comparten customer_unique_id
+    repeat = rng.random(n_customers) < 0.03
+    customers.loc[repeat, 'customer_unique_id'] = rng.choice(customers['customer_unique_id'], repeat.sum())
+    customers = pd.concat([customers, _locations(rng, n_customers, 'customer')], axis=1)
+    write('olist_customers_dataset', customers)
+
+    # Órdenes con fechas consecutivas (compra, aprobación, envío, entrega)
+    n_orders = n_customers
+    purchase = START_DATE + pd.to_timedelta(rng.integers(0, DATE_RANGE_SECONDS, n_orders), unit='s')
+    approved = purchase + pd.to_timedelta(rng.integers(600, 2 * 86400, n_orders), unit='s')
+    carrier = approved + pd.to_timedelta(rng.integers(3600, 5 * 86400, n_orders), unit='s')
+    delivered = carrier + pd.to_timedelta(rng.integers(86400, 20 * 86400, n_orders), unit='s')
+    estimated = purchase.normalize() + pd.to_timedelta(rng.integers(10, 40, n_orders), unit='D')
+    orders = pd.DataFrame({
+        'order_id': _ids(rng, n_orders),
+        'customer_id': customers['customer_id'],
+        'order_status': rng.choice(ORDER_STATUSES[0], n_orders, p=ORDER_STATUSES[1]),
+        'order_purchase_timestamp': _format_timestamps(purchase),
+        'order_approved_at': _format_timestamps(approved, 'order_approved_at', rng),
+        'order_delivered_carrier_date': _format_timestamps(carrier, 'order_delivered_carrier_date', rng),
+        'order_delivered_customer_date': _format_timestamps(delivered, 'order_delivered_customer_date', rng),
+        'order_estimated_delivery_date': _format_timestamps(estimated),
+    })
+    write('olist_orders_dataset', orders)
+
+    # Productos
+    categories = list(CATEGORIES)
+    products = pd.DataFrame({
+        'product_id': _ids(rng, n_products),
+        'product_category_name': _with_nulls(rng, rng.choice(categories, n_products), 'product_category_name'),
+        'product_name_lenght': _with_nulls(rng, rng.integers(5, 77, n_products).astype(float), 'product_name_lenght'),
+        'product_description_lenght': _with_nulls(rng, rng.integers(4, 3993, n_products).astype(float),
+                                                  'product_description_lenght'),
+        'product_photos_qty': _with_nulls(rng, rng.integers(1, 8, n_products).astype(float), 'product_photos_qty'),
+        'product_weight_g': _with_nulls(rng, rng.lognormal(6.5, 1.2, n_products).round().clip(0, 40425),
+                                        'product_weight_g'),
+        'product_length_cm': _with_nulls(rng, rng.integers(7, 105, n_products).astype(float), 'product_length_cm'),
+        'product_height_cm': _with_nulls(rng, rng.integers(2, 105, n_products).astype(float), 'product_height_cm'),
+        'product_width_cm': _with_nulls(rng, rng.integers(6, 118, n_products).astype(float), 'product_width_cm'),
+    })
+    write('olist_products_dataset', products)
+
+    # Vendedores
+    sellers = pd.concat([pd.DataFrame({'seller_id': _ids(rng, n_sellers)}),
+                         _locations(rng, n_sellers, 'seller')], axis=1)
+    write('olist_sellers_dataset', sellers)
+
+    # Ítems de cada orden (1 a 4 ítems, la mayoría con uno solo)
+    items_per_order = rng.choice([1, 2, 3, 4], n_orders, p=[0.90, 0.076, 0.017, 0.007])
+    item_order_ids = np.repeat(orders['order_id'].to_numpy(), items_per_order)
+    item_numbers = np.arange(len(item_order_ids)) - np.repeat(np.cumsum(items_per_order) - items_per_order,
+                                                              items_per_order) + 1
+    shipping_limit = np.repeat(purchase, items_per_order) + pd.to_timedelta(
+        rng.integers(2 * 86400, 7 * 86400, len(item_order_ids)), unit='s')
+    order_items = pd.DataFrame({
+        'order_id': item_order_ids,
+        'order_item_id': item_numbers,
+        'product_id': rng.choice(products['product_id'], len(item_order_ids)),
+        'seller_id': rng.choice(sellers['seller_id'], len(item_order_ids)),
+        'shipping_limit_date': _format_timestamps(shipping_limit),
+        'price': rng.lognormal(4.4, 1.0, len(item_order_ids)).round(2).clip(0.85, 6735),
+        'freight_value': rng.lognormal(2.8, 0.6, len(item_order_ids)).round(2).clip(0, 410),
+    })
+    write('olist_order_items_dataset', order_items)
+
+    # Pagos (algunas órdenes se pagan en varias partes)
+    payments_per_order = rng.choice([1, 2, 3], n_orders, p=[0.97, 0.025, 0.005])
+    payment_order_ids = np.repeat(orders['order_id'].to_numpy(), payments_per_order)
+    payments = pd.DataFrame({
+        'order_id': payment_order_ids,
+        'payment_sequential': np.arange(len(payment_order_ids)) - np.repeat(
+            np.cumsum(payments_per_order) - payments_per_order, payments_per_order) + 1,
+        'payment_type': rng.choice(PAYMENT_TYPES[0], len(payment_order_ids), p=PAYMENT_TYPES[1]),
+        'payment_installments': rng.integers(1, 11, len(payment_order_ids)),
+        'payment_value': rng.lognormal(4.7, 0.9, len(payment_order_ids)).round(2),
+    })
+    write('olist_order_payments_dataset', payments)
+
+    # Reseñas: una por orden; algunos review_id se repiten en otra orden
+    review_ids = _ids(rng, n_orders)
+    repeated = np.flatnonzero(rng.random(n_orders) < REPEATED_REVIEW_RATE)
+    if len(repeated):
+        review_ids[repeated] = review_ids[rng.choice(n_orders, len(repeated))]
+    creation = purchase.normalize() + pd.to_timedelta(rng.integers(3, 30, n_orders), unit='D')
+    answer = creation + pd.to_timedelta(rng.integers(3600, 5 * 86400, n_orders), unit='s')
+    reviews = pd.DataFrame({
+        'review_id': review_ids,
+        'order_id': orders['order_id'],
+        'review_score': rng.choice([1, 2, 3, 4, 5], n_orders, p=[0.115, 0.032, 0.082, 0.193, 0.578]),
+        'review_comment_title': _with_nulls(rng, rng.choice(REVIEW_TITLES, n_orders), 'review_comment_title'),
+        'review_comment_message': _with_nulls(rng, rng.choice(REVIEW_MESSAGES, n_orders), 'review_comment_message'),
+        'review_creation_date': _format_timestamps(creation),
+        'review_answer_timestamp': _format_timestamps(answer),
+    })
+    reviews = reviews.drop_duplicates(subset=['review_id', 'order_id'])
+    write('olist_order_reviews_dataset', reviews)
+
+    # Geolocalización por bloques (es la tabla más grande), con filas repetidas como en el original
+    geolocation_path = os.path.join(output_dir, 'olist_geolocation_dataset.csv')
+    geolocation_rows = 0
+    for start in range(0, n_geolocation, GEOLOCATION_BLOCK_ROWS):
+        block_rows = min(GEOLOCATION_BLOCK_ROWS, n_geolocation - start)
+        locations = _locations(rng, block_rows, 'geolocation')
+        block = pd.DataFrame({
+            'geolocation_zip_code_prefix': locations['geolocation_zip_code_prefix'],
+            'geolocation_lat': rng.uniform(-33.7, 5.3, block_rows),
+            'geolocation_lng': rng.uniform(-73.9, -34.8, block_rows),
+            'geolocation_city': locations['geolocation_city'],
+            'geolocation_state': locations['geolocation_state'],
+        })
+        duplicates = block.sample(frac=GEOLOCATION_DUPLICATE_RATE, random_state=int(rng.integers(2 ** 31)))
+        block = pd.concat([block, duplicates]).sample(frac=1, random_state=int(rng.integers(2 ** 31)))
+        block.to_csv(geolocation_path, index=False, mode='w' if start == 0 else 'a', header=start == 0)
+        geolocation_rows += len(block)
+    row_counts['olist_geolocation_dataset'] = geolocation_rows
+
+    # Traducción de categorías; el archivo original incluye un BOM UTF-8 al inicio
+    translation = pd.DataFrame({'product_category_name': list(CATEGORIES),
+                                'product_category_name_english': list(CATEGORIES.values())})
+    translation.to_csv(os.path.join(output_dir, 'product_category_name_translation.csv'),
+                       index=False, encoding='utf-8-sig')
+    row_counts['product_category_name_translation'] = len(translation)
+
+    return row_counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera CSV sintéticos con el esquema del dataset Olist.")
+    parser.add_argument('--output', default='src/static/synthetic', help="Directorio de salida de los CSV")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="Múltiplo del número de filas del dataset original (por ejemplo 0.1, 1, 10)")
+    parser.add_argument('--seed', type=int, default=42, help="Semilla para que los datos sean reproducibles")
+    args = parser.parse_args()
+
+    print(f"Generando dataset sintético (escala {args.scale}) en {args.output}...")
+    row_counts = generate_dataset(args.output, args.scale, args.seed)
+    for name, rows in row_counts.items():
+        print(f"  - {name}.csv: {rows} filas")
+
+if __name__ == "__main__":
+    main()
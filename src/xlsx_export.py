@@ -0,0 +1,232 @@
+import os
+import time
+import shutil
+import zipfile
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Exportación a Excel (.xlsx) en streaming, sin openpyxl: el XML de cada hoja se genera por bloques de
+# filas en un archivo temporal (en paralelo, una hoja por proceso) y al final se empaquetan en el ZIP del
+# libro. La memoria depende del tamaño del bloque y no del de la hoja. Las hojas que superan el límite de
+# filas de Excel se reparten en varias hojas (<nombre>, <nombre>_2, ...).
+# Número de procesos que generan las hojas (1 = secuencial, 0 = todos los núcleos), como en la ingesta.
+WORKERS = int(os.environ.get('BIGDATA_WORKERS', 1))
+
+# Límite de filas de una hoja de Excel (1048576) menos la fila de encabezado
+MAX_SHEET_ROWS = 1048575
+BLOCK_ROWS = 50000
+# Fecha base de los números de serie de fecha de Excel
+EXCEL_EPOCH = pd.Timestamp('1899-12-30')
+
+SPREADSHEET_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+RELATIONSHIPS_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PACKAGE_RELATIONSHIPS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# Estilos: 0 = general, 1 = fecha y hora (mismo formato que usa pandas), 2 = encabezado en negrita
+STYLES_XML = (
+    XML_DECLARATION +
+    f'<styleSheet xmlns="{SPREADSHEET_NS}">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm:ss"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+# Caracteres de control que no admite XML 1.0
+_ILLEGAL_XML_CHARS = r'[\x00-\x08\x0b\x0c\x0e-\x1f]'
+
+def _escape(values):
+    """
+    Escapa un Series de texto para usarlo dentro de un elemento XML.
+    """
+    return (values.str.replace(_ILLEGAL_XML_CHARS, '', regex=True)
+            .str.replace('&', '&amp;', regex=False)
+            .str.replace('<', '&lt;', regex=False)
+            .str.replace('>', '&gt;', regex=False))
+
+def _escape_text(text):
+    return _escape(pd.Series([str(text)])).iloc[0].replace('"', '&quot;')
+
+def column_letter(index):
+    """
+    Devuelve la letra de columna de Excel (A, B, ..., Z, AA, ...) de la columna `index` (desde 0).
+    """
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def _column_cells(series, references):
+    """
+    Genera el XML de las celdas de una columna (cadena vacía para los nulos, que no se escriben).
+    Los números y booleanos se escriben como valores, las fechas como número de serie con formato
+    de fecha y el resto como texto en línea.
+    """
+    series = series.reset_index(drop=True)
+    kind = series.dtype.kind
+    if kind == 'O':
+        inferred = pd.api.types.infer_dtype(series, skipna=True)
+        if inferred in ('integer', 'floating', 'mixed-integer-float', 'decimal'):
+            series = pd.to_numeric(series)
+        elif inferred == 'boolean':
+            series = series.astype('boolean')
+        elif inferred in ('datetime', 'datetime64', 'date'):
+            series = pd.to_datetime(series)
+        kind = series.dtype.kind
+
+    present = series.notna().to_numpy().copy()
+    if pd.api.types.is_bool_dtype(series.dtype):
+        text = series.map({True: '1', False: '0'})
+        prefix, suffix = '" t="b"><v>', '</v></c>'
+    elif pd.api.types.is_numeric_dtype(series.dtype):
+        numbers = series.astype('float64').to_numpy()
+        present &= np.isfinite(np.where(present, numbers, 0))
+        text = series.astype(str)
+        prefix, suffix = '"><v>', '</v></c>'
+    elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+        if series.dt.tz is not None:
+            series = series.dt.tz_localize(None)
+        text = ((series - EXCEL_EPOCH) / pd.Timedelta(days=1)).astype(str)
+        prefix, suffix = '" s="1"><v>', '</v></c>'
+    else:
+        text = _escape(series.astype(str))
+        prefix, suffix = '" t="inlineStr"><is><t xml:space="preserve">', '</t></is></c>'
+
+    cells = np.full(len(series), '', dtype=object)
+    cells[present] = '<c r="' + references[present] + prefix + text.to_numpy(dtype=object)[present] + suffix
+    return cells
+
+def _header_xml(columns):
+    cells = "".join(
+        f'<c r="{column_letter(position)}1" s="2" t="inlineStr"><is><t xml:space="preserve">'
+        f'{_escape_text(column)}</t></is></c>'
+        for position, column in enumerate(columns)
+    )
+    return f'<row r="1">{cells}</row>'
+
+def write_sheet_xml(df, path, block_rows=BLOCK_ROWS):
+    """
+    Escribe el XML de una hoja (encabezado y filas de `df`) en `path`, por bloques de `block_rows` filas.
+    Devuelve el número de filas escritas y el tiempo empleado.
+    """
+    start_time = time.perf_counter()
+    letters = [column_letter(position) for position in range(len(df.columns))]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(XML_DECLARATION)
+        f.write(f'<worksheet xmlns="{SPREADSHEET_NS}"><sheetData>')
+        f.write(_header_xml(df.columns))
+        for block_start in range(0, len(df), block_rows):
+            block = df.iloc[block_start:block_start + block_rows]
+            row_numbers = np.arange(block_start + 2, block_start + 2 + len(block)).astype(str).astype(object)
+            rows = '<row r="' + row_numbers + '">'
+            for position, letter in enumerate(letters):
+                rows = rows + _column_cells(block.iloc[:, position], letter + row_numbers)
+            f.write(''.join(rows + '</row>'))
+        f.write('</sheetData></worksheet>')
+    return len(df), time.perf_counter() - start_time
+
+def split_sheets(frames, max_rows=MAX_SHEET_ROWS):
+    """
+    Reparte los DataFrames en hojas de como máximo `max_rows` filas. Devuelve una lista de
+    (nombre de hoja, nombre original, DataFrame); las partes adicionales se llaman <nombre>_2, <nombre>_3, ...
+    Los nombres se recortan a los 31 caracteres que admite Excel.
+    """
+    sheets = []
+    for name, df in frames.items():
+        for part, start in enumerate(range(0, max(len(df), 1), max_rows)):
+            suffix = f"_{part + 1}" if part else ""
+            sheets.append((str(name)[:31 - len(suffix)] + suffix, name, df.iloc[start:start + max_rows]))
+    return sheets
+
+def _content_types_xml(sheet_count):
+    overrides = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{number}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for number in range(1, sheet_count + 1)
+    )
+    return (
+        XML_DECLARATION +
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        f'{overrides}</Types>'
+    )
+
+def _workbook_xml(sheet_names):
+    sheets = "".join(
+        f'<sheet name="{_escape_text(name)}" sheetId="{number}" r:id="rId{number}"/>'
+        for number, name in enumerate(sheet_names, start=1)
+    )
+    return (XML_DECLARATION +
+            f'<workbook xmlns="{SPREADSHEET_NS}" xmlns:r="{RELATIONSHIPS_NS}"><sheets>{sheets}</sheets></workbook>')
+
+def _workbook_rels_xml(sheet_count):
+    relationships = "".join(
+        f'<Relationship Id="rId{number}" Type="{RELATIONSHIPS_NS}/worksheet" Target="worksheets/sheet{number}.xml"/>'
+        for number in range(1, sheet_count + 1)
+    )
+    relationships += (f'<Relationship Id="rId{sheet_count + 1}" Type="{RELATIONSHIPS_NS}/styles" '
+                      'Target="styles.xml"/>')
+    return XML_DECLARATION + f'<Relationships xmlns="{PACKAGE_RELATIONSHIPS_NS}">{relationships}</Relationships>'
+
+def _package_rels_xml():
+    return (XML_DECLARATION +
+            f'<Relationships xmlns="{PACKAGE_RELATIONSHIPS_NS}">'
+            f'<Relationship Id="rId1" Type="{RELATIONSHIPS_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>')
+
+def export_workbook(frames, path, workers=WORKERS):
+    """
+    Escribe los DataFrames de `frames` (nombre de hoja -> DataFrame) en el libro de Excel `path`.
+    El XML de cada hoja se genera en un archivo temporal, en paralelo si `workers` es mayor que 1,
+    y después se copia por bloques al ZIP del libro.
+    Devuelve una lista con las filas, el tiempo y las filas/s de cada hoja escrita.
+    """
+    sheets = split_sheets(frames)
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(sheets)))
+
+    parts_dir = tempfile.mkdtemp(prefix='xlsx_')
+    try:
+        part_paths = [os.path.join(parts_dir, f"sheet{number}.xml") for number in range(1, len(sheets) + 1)]
+        if workers <= 1:
+            results = [write_sheet_xml(df, part_path) for (_, _, df), part_path in zip(sheets, part_paths)]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(write_sheet_xml, [df for _, _, df in sheets], part_paths))
+
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as workbook:
+            workbook.writestr('[Content_Types].xml', _content_types_xml(len(sheets)))
+            workbook.writestr('_rels/.rels', _package_rels_xml())
+            workbook.writestr('xl/workbook.xml', _workbook_xml([sheet_name for sheet_name, _, _ in sheets]))
+            workbook.writestr('xl/_rels/workbook.xml.rels', _workbook_rels_xml(len(sheets)))
+            workbook.writestr('xl/styles.xml', STYLES_XML)
+            for number, part_path in enumerate(part_paths, start=1):
+                with open(part_path, 'rb') as source, workbook.open(f'xl/worksheets/sheet{number}.xml', 'w') as target:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    return [
+        {'sheet': sheet_name, 'table': name, 'rows': rows, 'seconds': seconds,
+         'rows_per_second': rows / seconds if seconds > 0 else 0.0}
+        for (sheet_name, name, _), (rows, seconds) in zip(sheets, results)
+    ]
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos del proyecto son scripts planos en src/ que se importan por su nombre (`import schemas`)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
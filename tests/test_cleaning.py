@@ -0,0 +1,67 @@
+import sqlite3
+import pandas as pd
+import cleaning
+
+def _orders_database(path):
+    # Fechas repetidas en bloques distintos, un nulo y un valor que no cumple el formato
+    dates = ['2017-10-02 10:56:33', '2018-01-01 00:00:00', '2017-10-02 10:56:33', None,
+             '2018-01-01 00:00:00', 'no es una fecha', '2016-09-04 21:15:19', '2017-10-02 10:56:33']
+    df = pd.DataFrame({
+        'order_id': [f"order{i}" for i in range(len(dates))],
+        'customer_id': [f"customer{i}" for i in range(len(dates))],
+        'order_status': 'delivered',
+        'order_purchase_timestamp': dates,
+    })
+    conn = sqlite3.connect(path)
+    df.to_sql('olist_orders_dataset', conn, index=False)
+    return conn
+
+def test_chunked_datetime_stats_match_full_table(tmp_path):
+    conn = _orders_database(tmp_path / 'ingestion.db')
+    try:
+        full = cleaning.exploratory_analysis(conn, ['olist_orders_dataset'])
+        chunked = cleaning.exploratory_analysis_chunked(conn, ['olist_orders_dataset'], chunk_size=3,
+                                                        use_sketches=False)
+    finally:
+        conn.close()
+
+    full_stats = full['olist_orders_dataset']['datetime_stats']['order_purchase_timestamp']
+    chunked_stats = chunked['olist_orders_dataset']['datetime_stats']['order_purchase_timestamp']
+    assert full_stats['unique'] == 4
+    for field in ('values', 'unique', 'coerced'):
+        assert chunked_stats[field] == full_stats[field]
+
+def test_integer_column_imputed_with_fractional_median():
+    df = pd.DataFrame({'review_score': pd.array([2, None, 3], dtype='Int32')})
+    fill_values, _ = cleaning.plan_imputation(df.dtypes.to_dict(), df.isna().sum(),
+                                              lambda column: df[column].median())
+    df = cleaning.apply_imputation(df, fill_values)
+    assert df['review_score'].tolist() == [2.0, 2.5, 3.0]
+
+def _report_lines(conn, chunked):
+    tables = ['olist_orders_dataset']
+    if chunked:
+        analysis = cleaning.exploratory_analysis_chunked(conn, tables, chunk_size=3, use_sketches=False)
+        operations, _, db_path = cleaning.clean_data_chunked(conn, analysis, chunk_size=3)
+    else:
+        analysis = cleaning.exploratory_analysis(conn, tables)
+        cleaned, operations = cleaning.clean_data(analysis)
+        db_path = cleaning.save_cleaned_data_to_db(cleaned)
+    with open(cleaning.write_audit(analysis, operations, db_path), encoding='utf-8') as f:
+        return f.read().splitlines()
+
+def test_primary_key_duplicates_reported_per_table(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conn = _orders_database(tmp_path / 'ingestion.db')
+    try:
+        # Una fila repetida completa y otra que solo repite el order_id
+        conn.execute("INSERT INTO olist_orders_dataset SELECT * FROM olist_orders_dataset WHERE order_id = 'order0'")
+        conn.execute("INSERT INTO olist_orders_dataset VALUES ('order1', 'customer9', 'canceled', NULL)")
+        conn.commit()
+        for chunked in (False, True):
+            lines = _report_lines(conn, chunked)
+            assert "- Filas duplicadas eliminadas: 1" in lines
+            assert "- Filas con clave primaria (order_id) repetida eliminadas: 1" in lines
+            assert "- Filas con clave primaria repetida eliminadas: 1" in lines
+    finally:
+        conn.close()
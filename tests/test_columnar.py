@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+import columnar
+
+pytest.importorskip('pyarrow')
+
+def _write(stage, table_name, chunks):
+    writer = columnar.TableWriter(stage, table_name)
+    for chunk in chunks:
+        writer.write(chunk)
+    writer.close()
+    return columnar.read_table(stage, table_name)
+
+def test_columns_empty_in_first_chunk_take_the_type_of_later_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, 'COLUMNAR_DIR', str(tmp_path))
+    # Los títulos de reseña, el tipo de pago y las columnas sin registrar están vacíos en el primer bloque
+    first = pd.DataFrame({
+        'review_id': ['r1', 'r2'],
+        'review_comment_title': [None, None],
+        'payment_type': pd.Categorical([None, None]),
+        'note': [None, None],
+    })
+    second = pd.DataFrame({
+        'review_id': ['r3', 'r4'],
+        'review_comment_title': ['ótimo', None],
+        'payment_type': pd.Categorical(['boleto', 'voucher']),
+        'note': ['revisar', None],
+    })
+
+    df = _write('cleaned', 'clean_olist_order_reviews_dataset', [first, second])
+
+    assert df['review_comment_title'].tolist()[2] == 'ótimo'
+    assert df['payment_type'].astype(object).tolist()[2:] == ['boleto', 'voucher']
+    assert df['note'].tolist()[2] == 'revisar'
+    assert df['review_comment_title'].isna().sum() == 3
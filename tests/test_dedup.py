@@ -0,0 +1,72 @@
+import os
+import numpy as np
+import pandas as pd
+import dedup
+
+def _orders(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    # Pocos valores distintos para que haya muchas filas repetidas, con algunos nulos
+    df = pd.DataFrame({
+        'order_id': rng.integers(0, rows // 4, size=rows).astype(str),
+        'order_status': rng.choice(['delivered', 'shipped', None], size=rows),
+        'price': rng.integers(0, 3, size=rows).astype(float),
+    })
+    df.loc[df.index[::11], 'price'] = np.nan
+    return df
+
+def test_find_duplicates_matches_pandas():
+    df = _orders(2_000)
+    duplicated, stats = dedup.find_duplicates(df)
+    np.testing.assert_array_equal(duplicated, df.duplicated().to_numpy())
+    assert stats['duplicates'] == int(df.duplicated().sum())
+    assert stats['collisions'] == 0
+
+    key_duplicated, _ = dedup.find_duplicates(df, subset=['order_id'])
+    np.testing.assert_array_equal(key_duplicated, df.duplicated(subset=['order_id']).to_numpy())
+
+def test_find_duplicates_resolves_collisions():
+    df = _orders(500)
+    # Todas las filas con la misma huella: cada candidata difiere de la primera fila y se compara por valores
+    duplicated, stats = dedup.find_duplicates(df, hashes=np.zeros(len(df), dtype=np.uint64))
+    np.testing.assert_array_equal(duplicated, df.duplicated().to_numpy())
+    assert stats['collisions'] == 1
+
+def test_streaming_deduplicator_spills_to_disk():
+    df = _orders(3_000, seed=1)
+    deduplicator = dedup.StreamingDeduplicator(memory_rows=250)
+    for start in range(0, len(df), 170):
+        deduplicator.add(df.iloc[start:start + 170])
+    spill_dir = deduplicator._spill_dir
+    assert spill_dir is not None
+
+    duplicated, stats = deduplicator.finish()
+    np.testing.assert_array_equal(duplicated, df.duplicated().to_numpy())
+    assert stats['spilled'] and stats['rows'] == len(df)
+    assert not os.path.exists(spill_dir)
+
+def test_streaming_deduplicator_key_over_kept_rows():
+    df = _orders(1_000, seed=2)
+    rows = dedup.StreamingDeduplicator()
+    keys = dedup.StreamingDeduplicator(subset=['order_id'], memory_rows=100)
+    for start in range(0, len(df), 300):
+        rows.add(df.iloc[start:start + 300])
+        keys.add(df.iloc[start:start + 300])
+    row_duplicated, _ = rows.finish()
+    key_duplicated, _ = keys.finish(keep=~row_duplicated)
+
+    kept = df[~row_duplicated]
+    expected = np.zeros(len(df), dtype=bool)
+    expected[np.flatnonzero(~row_duplicated)[kept.duplicated(subset=['order_id']).to_numpy()]] = True
+    np.testing.assert_array_equal(key_duplicated, expected)
+
+def test_streaming_deduplicator_counts_64_bit_collisions(monkeypatch):
+    # Huellas que coinciden en los primeros 64 bits y difieren en los 128: no son duplicados
+    def fingerprint(df, subset=None, bits=64):
+        return np.column_stack([np.zeros(len(df), dtype=np.uint64), np.arange(len(df), dtype=np.uint64)])
+    monkeypatch.setattr(dedup, 'fingerprint', fingerprint)
+
+    deduplicator = dedup.StreamingDeduplicator()
+    deduplicator.add(pd.DataFrame({'order_id': ['a', 'b', 'c']}))
+    duplicated, stats = deduplicator.finish()
+    assert not duplicated.any()
+    assert stats['collisions'] == 2
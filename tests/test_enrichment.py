@@ -0,0 +1,46 @@
+import shutil
+import sqlite3
+import pandas as pd
+import catalog
+import enrichment
+import sqlite_writer
+
+CLEAN_TABLES = [
+    "clean_olist_geolocation_dataset",
+    "clean_olist_order_items_dataset",
+    "clean_olist_order_payments_dataset",
+    "clean_olist_order_reviews_dataset",
+    "clean_olist_sellers_dataset",
+    "clean_product_category_name_translation",
+]
+
+def _frame(name):
+    return pd.DataFrame({'order_id': ['a', 'b'], 'value': [1.5, 2.5], 'source': [name, name]})
+
+def _read_database(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {table: pd.read_sql_query(f'SELECT * FROM "{table}"', conn) for table in sqlite_writer.list_tables(conn)}
+    finally:
+        conn.close()
+
+def test_save_final_db_accepts_catalog_and_dataframes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cleaned = {name: _frame(name) for name in CLEAN_TABLES}
+    enriched = {name: _frame(name) for name in ('customers', 'orders', 'products')}
+
+    db_path = enrichment.save_final_db(cleaned, enriched)
+    from_frames = _read_database(db_path)
+    shutil.move(db_path, tmp_path / 'from_frames.db')
+
+    conn = sqlite3.connect(tmp_path / 'cleaned_data.db')
+    for name, df in cleaned.items():
+        sqlite_writer.write_table(conn, name, df)
+    conn.close()
+    enrichment.save_final_db(catalog.TableCatalog(str(tmp_path / 'cleaned_data.db'), 'cleaned', use_cache=False),
+                             enriched)
+    from_catalog = _read_database(db_path)
+
+    assert list(from_frames) == list(from_catalog)
+    for table, df in from_catalog.items():
+        pd.testing.assert_frame_equal(from_frames[table], df, obj=table)
@@ -0,0 +1,69 @@
+import sqlite3
+import pandas as pd
+import pytest
+import id_codec
+import sqlite_writer
+
+def _database(path):
+    conn = sqlite3.connect(path)
+    sqlite_writer.write_table(conn, 'olist_orders_dataset', pd.DataFrame({
+        'order_id': ['o3', 'o1', 'o2'],
+        'customer_id': ['c1', 'c2', None],
+    }))
+    sqlite_writer.write_table(conn, 'olist_order_items_dataset', pd.DataFrame({
+        'order_id': ['o1', 'o1', 'o4'],
+        'order_item_id': [1, 2, 1],
+    }))
+    return conn
+
+def _values(series):
+    return series.astype(object).where(series.notna(), None).tolist()
+
+def test_dictionary_is_shared_and_sorted(tmp_path):
+    conn = _database(tmp_path / 'ingestion.db')
+    try:
+        dictionary = id_codec.build_dictionary(conn)
+    finally:
+        conn.close()
+    assert list(dictionary) == ['order_id', 'customer_id']
+    assert list(dictionary['order_id'].categories) == ['o1', 'o2', 'o3', 'o4']
+    assert list(dictionary['customer_id'].categories) == ['c1', 'c2']
+
+def test_codes_round_trip_through_sqlite(tmp_path):
+    conn = _database(tmp_path / 'ingestion.db')
+    try:
+        dictionary = id_codec.build_dictionary(conn)
+        orders = pd.read_sql_query("SELECT * FROM olist_orders_dataset", conn)
+    finally:
+        conn.close()
+    encoded = id_codec.encode(orders.copy(), dictionary)
+    assert isinstance(encoded['order_id'].dtype, pd.CategoricalDtype)
+
+    conn = sqlite3.connect(tmp_path / 'cleaned_data.db')
+    try:
+        sqlite_writer.write_table(conn, 'clean_olist_orders_dataset', id_codec.to_codes(encoded, dictionary))
+        id_codec.write_dictionary(conn, dictionary)
+        assert conn.execute("SELECT order_id FROM clean_olist_orders_dataset").fetchall() == [(2,), (0,), (1,)]
+        stored = id_codec.read_dictionary(conn)
+        codes = pd.read_sql_query("SELECT * FROM clean_olist_orders_dataset", conn)
+    finally:
+        conn.close()
+
+    decoded = id_codec.decode(codes, stored)
+    for column in ('order_id', 'customer_id'):
+        assert _values(decoded[column]) == _values(orders[column])
+    assert id_codec.decode_value(stored, 'order_id', 3) == 'o4'
+
+def test_encode_rejects_unknown_identifiers():
+    dictionary = {'order_id': pd.CategoricalDtype(['o1', 'o2'])}
+    with pytest.raises(ValueError):
+        id_codec.encode(pd.DataFrame({'order_id': ['o1', 'o5']}), dictionary)
+
+def test_frames_dictionary_merges_added_categories():
+    dtype = pd.CategoricalDtype(['o1', 'o2'])
+    imputed = pd.Categorical(['o1', 'DESCONOCIDO'], categories=['o1', 'o2', 'DESCONOCIDO'])
+    dictionary = id_codec.frames_dictionary({
+        'orders': pd.DataFrame({'order_id': pd.Categorical(['o1', 'o2'], dtype=dtype)}),
+        'reviews': pd.DataFrame({'order_id': imputed}),
+    })
+    assert list(dictionary['order_id'].categories) == ['DESCONOCIDO', 'o1', 'o2']
@@ -0,0 +1,53 @@
+import sqlite3
+import pytest
+import ingestion
+
+HEADER = "seller_id,seller_zip_code_prefix,seller_city,seller_state\n"
+
+def _write_csv(path, zip_codes):
+    rows = [f"seller{i},{zip_code},campinas,SP\n" for i, zip_code in enumerate(zip_codes)]
+    path.write_text(HEADER + ''.join(rows), encoding='latin1')
+    return str(path)
+
+def test_failed_load_keeps_previous_table(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'ingestion.db')
+    try:
+        ingestion.load_csv_in_chunks(conn, _write_csv(tmp_path / 'old.csv', [1000, 2000, 3000]),
+                                     'olist_sellers_dataset', chunk_size=2)
+        # El tercer bloque no se puede leer como entero: la carga falla después de insertar los anteriores
+        broken = _write_csv(tmp_path / 'olist_sellers_dataset.csv', [4000, 5000, 6000, 7000, 'no es un número'])
+        with pytest.raises(ValueError):
+            ingestion.load_csv_in_chunks(conn, broken, 'olist_sellers_dataset', chunk_size=2)
+
+        rows = conn.execute("SELECT seller_zip_code_prefix FROM olist_sellers_dataset ORDER BY rowid").fetchall()
+        assert [row[0] for row in rows] == [1000, 2000, 3000]
+    finally:
+        conn.close()
+
+def test_unchanged_dataset_keeps_database_untouched(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dataset = tmp_path / 'data'
+    dataset.mkdir()
+    _write_csv(dataset / 'olist_sellers_dataset.csv', [1000, 2000])
+    db_path = tmp_path / 'src' / 'static' / 'db' / 'ingestion.db'
+
+    ingestion.create_database_from_csvs(str(dataset), workers=1, incremental=True)
+    mtime = db_path.stat().st_mtime_ns
+    stats = ingestion.create_database_from_csvs(str(dataset), workers=1, incremental=True)
+    assert [s.get('skipped') for s in stats] == [True]
+    assert db_path.stat().st_mtime_ns == mtime
+
+    # Un cambio en la entrada del registro de esquemas obliga a recargar el archivo
+    monkeypatch.setattr(ingestion, '_registry_hash', lambda table_name: 'otro registro')
+    stats = ingestion.create_database_from_csvs(str(dataset), workers=1, incremental=True)
+    assert [s.get('skipped') for s in stats] == [None]
+
+def test_missing_integer_values_load_as_null(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'ingestion.db')
+    try:
+        ingestion.load_csv_in_chunks(conn, _write_csv(tmp_path / 'olist_sellers_dataset.csv', [1000, '', 3000]),
+                                     'olist_sellers_dataset', chunk_size=2)
+        rows = conn.execute("SELECT seller_zip_code_prefix FROM olist_sellers_dataset ORDER BY rowid").fetchall()
+        assert [row[0] for row in rows] == [1000, None, 3000]
+    finally:
+        conn.close()
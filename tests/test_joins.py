@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import joins
+
+def _items():
+    return pd.DataFrame({
+        'order_id': ['o1', 'o2', 'o2', 'o3', None, 'o9'],
+        'product_id': ['p1', 'p2', None, 'p1', 'p3', 'p9'],
+        'price': [10.0, 20.0, 5.0, 7.5, 1.0, 3.0],
+    })
+
+def _products():
+    return pd.DataFrame({
+        'product_id': ['p1', 'p2', 'p3'],
+        'product_weight_g': [100, 250, 80],
+        'product_category_name': pd.Categorical(['beleza', 'esporte', 'beleza']),
+    })
+
+def test_broadcast_lookup_matches_left_merge():
+    items = _items()
+    expected = items.merge(_products(), on='product_id', how='left')
+    result = joins.broadcast_lookup(items, _products(), 'product_id')
+    pd.testing.assert_frame_equal(result, expected)
+    # La tabla base no se modifica
+    assert list(items.columns) == ['order_id', 'product_id', 'price']
+
+def test_broadcast_lookup_with_categorical_keys():
+    items = _items()
+    items['product_id'] = items['product_id'].astype('category')
+    expected = items.merge(_products(), on='product_id', how='left')
+    result = joins.broadcast_lookup(items, _products(), 'product_id')
+    # La clave conserva su tipo categórico (merge la convierte a texto); las columnas añadidas coinciden
+    assert isinstance(result['product_id'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(result.drop(columns='product_id'), expected.drop(columns='product_id'))
+
+def test_broadcast_lookup_with_other_key_name_and_columns():
+    items = _items()
+    products = _products().rename(columns={'product_id': 'id'})
+    expected = items.merge(products[['id', 'product_weight_g']], left_on='product_id', right_on='id', how='left')
+    result = joins.broadcast_lookup(items, products, 'product_id', 'id', columns=['product_weight_g'])
+    pd.testing.assert_frame_equal(result, expected)
+
+def test_broadcast_lookup_falls_back_to_merge_on_repeated_keys():
+    items = _items()
+    payments = pd.DataFrame({'order_id': ['o2', 'o2', 'o3'], 'payment_value': [1.0, 2.0, 3.0]})
+    expected = items.merge(payments, on='order_id', how='left')
+    pd.testing.assert_frame_equal(joins.broadcast_lookup(items, payments, 'order_id'), expected)
+
+def test_lookup_values_matches_map():
+    keys = _items()['product_id'].astype('category')
+    weights = _products().set_index('product_id')['product_weight_g'].astype(float)
+    result = pd.Series(joins.lookup_values(keys, weights))
+    np.testing.assert_array_equal(result.to_numpy(), keys.astype(object).map(weights).to_numpy())
+
+def test_key_positions_with_shared_categories():
+    categories = pd.CategoricalDtype(['o1', 'o2', 'o3'])
+    keys = pd.Series(pd.Categorical(['o3', None, 'o1'], dtype=categories))
+    index = pd.CategoricalIndex(['o1', 'o3'], dtype=categories)
+    np.testing.assert_array_equal(joins.key_positions(keys, index), [1, -1, 0])
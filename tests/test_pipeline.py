@@ -0,0 +1,38 @@
+import os
+import ingestion
+import pipeline
+
+HEADER = "seller_id,seller_zip_code_prefix,seller_city,seller_state\n"
+
+def _write_sellers(path, rows):
+    path.write_text(HEADER + ''.join(f"seller{i},{1000 + i},campinas,SP\n" for i in range(rows)), encoding='latin1')
+
+def test_resume_reruns_ingestion_when_sources_change(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dataset = tmp_path / 'data'
+    dataset.mkdir()
+    _write_sellers(dataset / 'olist_sellers_dataset.csv', 3)
+    monkeypatch.setattr(ingestion, 'DATASET_PATH', str(dataset))
+
+    assert pipeline.run_pipeline(['ingestion'], resume=True, background=False) == ['ingestion']
+    assert pipeline.run_pipeline(['ingestion'], resume=True, background=False) == []
+
+    # Un CSV modificado invalida el punto de control aunque ingestion.db no haya cambiado
+    _write_sellers(dataset / 'olist_sellers_dataset.csv', 4)
+    assert pipeline.run_pipeline(['ingestion'], resume=True, background=False) == ['ingestion']
+    assert pipeline.run_pipeline(['ingestion'], resume=True, background=False) == []
+
+def test_resume_reruns_stage_when_its_database_changes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dataset = tmp_path / 'data'
+    dataset.mkdir()
+    _write_sellers(dataset / 'olist_sellers_dataset.csv', 3)
+    monkeypatch.setattr(ingestion, 'DATASET_PATH', str(dataset))
+
+    assert pipeline.run_pipeline(['ingestion'], resume=True, background=False) == ['ingestion']
+    # Una base de datos modificada fuera del pipeline ya no corresponde al punto de control
+    db_path = pipeline.CHECKPOINTS['ingestion']
+    os.utime(db_path, (0, 0))
+    assert not pipeline.checkpoint_is_valid('ingestion', pipeline.load_checkpoints())
+    assert pipeline.run_pipeline(['ingestion'], resume=True, background=False) == ['ingestion']
+    assert pipeline.checkpoint_is_valid('ingestion', pipeline.load_checkpoints())
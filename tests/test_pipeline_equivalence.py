@@ -0,0 +1,106 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import pandas as pd
+import pytest
+import id_codec
+import schemas
+import sqlite_writer
+import synthetic_data
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+# Escala del dataset sintético: unas 1.000 órdenes, suficiente para que las tablas se partan en
+# varias particiones y bloques con los tamaños de abajo
+SCALE = 0.01
+
+# Ejecución de referencia: todo secuencial, en memoria, sin copia columnar ni segundo plano
+SERIAL = {'BIGDATA_WORKERS': '1', 'BIGDATA_COLUMNAR': '0', 'BIGDATA_PIPELINE_BACKGROUND': '0'}
+
+# Variantes que deben producir las mismas tablas que la ejecución de referencia
+VARIANTS = {
+    'parallel': {'BIGDATA_WORKERS': '2', 'BIGDATA_CLEANING_PARTITION_ROWS': '400',
+                 'BIGDATA_PIPELINE_BACKGROUND': '1'},
+    'chunked': {'BIGDATA_CLEANING_CHUNKED': '1', 'BIGDATA_CHUNK_SIZE': '300'},
+    'id_encoding': {'BIGDATA_ID_ENCODING': '1', 'BIGDATA_WORKERS': '2', 'BIGDATA_CLEANING_PARTITION_ROWS': '400'},
+}
+
+DATABASES = ['ingestion.db', 'cleaned_data.db', 'enriched_data.db']
+
+def _run_pipeline(directory, dataset, settings, stages=None):
+    """
+    Ejecuta pipeline.py en `directory` (las rutas src/static/... son relativas) en un proceso aparte,
+    porque la configuración de cada módulo se lee de las variables de entorno al importarlo.
+    """
+    env = {key: value for key, value in os.environ.items() if not key.startswith('BIGDATA_')}
+    env.update(SERIAL, BIGDATA_DATASET_PATH=str(dataset), **settings)
+    command = [sys.executable, os.path.join(SRC_DIR, 'pipeline.py')]
+    if stages:
+        command += ['--stages', stages]
+    result = subprocess.run(command, cwd=directory, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return directory
+
+def _read_tables(db_path):
+    """
+    Lee las tablas de una base de datos en el orden en que se crearon, con los identificadores
+    decodificados si la base de datos tiene diccionario (ver `id_codec.py`).
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        dictionary = id_codec.read_dictionary(conn)
+        tables = {}
+        for table in sqlite_writer.list_tables(conn):
+            df = pd.read_sql_query(f"SELECT * FROM {schemas.quote_identifier(table)}", conn)
+            if dictionary:
+                df = id_codec.decode(df, dictionary)
+                for column in dictionary:
+                    if column in df.columns:
+                        # Texto con el mismo tipo que devuelve read_sql_query (object, o str con pandas 3)
+                        df[column] = df[column].astype(object).where(df[column].notna(), None).infer_objects()
+            tables[table] = df
+        return tables
+    finally:
+        conn.close()
+
+def _sorted(df):
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    path = tmp_path_factory.mktemp('dataset')
+    synthetic_data.generate_dataset(str(path), scale=SCALE)
+    return path
+
+@pytest.fixture(scope='module')
+def serial_run(tmp_path_factory, dataset):
+    return _run_pipeline(tmp_path_factory.mktemp('serial'), dataset, {})
+
+@pytest.mark.parametrize('variant', list(VARIANTS))
+def test_variant_matches_serial_run(tmp_path, dataset, serial_run, variant):
+    variant_run = _run_pipeline(tmp_path, dataset, VARIANTS[variant])
+    for database in DATABASES:
+        expected = _read_tables(serial_run / 'src' / 'static' / 'db' / database)
+        result = _read_tables(variant_run / 'src' / 'static' / 'db' / database)
+        assert list(result) == list(expected), database
+        for table, df in expected.items():
+            if variant == 'id_encoding':
+                # Las tablas con clave de un solo identificador se guardan en el orden de sus códigos
+                pd.testing.assert_frame_equal(_sorted(result[table]), _sorted(df), obj=f"{database}:{table}")
+            else:
+                pd.testing.assert_frame_equal(result[table], df, obj=f"{database}:{table}")
+
+def test_stream_and_openpyxl_workbooks_match(tmp_path, dataset, serial_run):
+    openpyxl_run = tmp_path / 'openpyxl'
+    shutil.copytree(serial_run, openpyxl_run)
+    _run_pipeline(openpyxl_run, dataset, {'BIGDATA_EXCEL_ENGINE': 'openpyxl'}, stages='enrichment')
+    report = (openpyxl_run / 'src' / 'static' / 'auditoria' / 'enriched_report.txt').read_text(encoding='utf-8')
+    assert 'Exportación a Excel (openpyxl)' in report
+
+    expected = pd.read_excel(openpyxl_run / 'src' / 'static' / 'xlsx' / 'enriched_data.xlsx', sheet_name=None)
+    stream = pd.read_excel(serial_run / 'src' / 'static' / 'xlsx' / 'enriched_data.xlsx', sheet_name=None)
+    assert list(stream) == list(expected)
+    for sheet_name, df in expected.items():
+        pd.testing.assert_frame_equal(stream[sheet_name], df, obj=sheet_name)
@@ -0,0 +1,65 @@
+import os
+import json
+import pytest
+import reference_data
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    """
+    Registra una fuente JSON generada por el pipeline en un directorio temporal y cuenta cuántas veces
+    se escribe y se interpreta su archivo.
+    """
+    cache_dir = str(tmp_path / 'cache')
+    monkeypatch.setattr(reference_data, 'CACHE_DIR', cache_dir)
+    monkeypatch.setattr(reference_data, 'MANIFEST_PATH', os.path.join(cache_dir, 'reference_manifest.json'))
+    monkeypatch.setattr(reference_data, 'SOURCES', {})
+    calls = {'create': 0, 'parse': 0}
+
+    def create(path, definition):
+        calls['create'] += 1
+        with open(path, 'w') as f:
+            json.dump(definition, f)
+
+    def parse(path):
+        calls['parse'] += 1
+        with open(path) as f:
+            return json.load(f)
+
+    path = str(tmp_path / 'referencias' / 'tarifas.json')
+    reference_data.register_source('tarifas', path, parse, create, definition={'SP': 1.0})
+    return path, calls
+
+def test_generated_file_is_rewritten_only_when_it_changes(source):
+    path, calls = source
+    assert reference_data.create_sources() == ['tarifas']
+    assert reference_data.create_sources() == []
+    assert calls['create'] == 1
+
+    # Un archivo modificado fuera del pipeline se vuelve a generar
+    with open(path, 'w') as f:
+        f.write('{}')
+    assert reference_data.create_sources() == ['tarifas']
+
+    # También cuando cambian sus datos
+    reference_data.SOURCES['tarifas']['definition'] = {'SP': 2.0}
+    assert reference_data.create_sources() == ['tarifas']
+    assert calls['create'] == 3
+
+def test_parsed_source_cache_follows_file_content(source):
+    path, calls = source
+    reference_data.create_sources()
+    assert reference_data.load_source('tarifas') == {'SP': 1.0}
+    assert reference_data.load_source('tarifas') == {'SP': 1.0}
+    assert calls['parse'] == 1
+
+    with open(path, 'w') as f:
+        json.dump({'SP': 3.0}, f)
+    assert reference_data.load_source('tarifas') == {'SP': 3.0}
+    assert calls['parse'] == 2
+    # Solo queda la caché del contenido actual
+    assert len([name for name in os.listdir(reference_data.CACHE_DIR) if name.endswith('.pkl')]) == 1
+
+    # Una nueva versión del intérprete invalida la caché aunque el archivo no cambie
+    reference_data.SOURCES['tarifas']['version'] = 2
+    assert reference_data.load_source('tarifas') == {'SP': 3.0}
+    assert calls['parse'] == 3
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import sketches
+
+ERROR = 0.01
+
+def _rank(values, estimate):
+    return np.searchsorted(np.sort(values), estimate) / len(values)
+
+def test_tdigest_is_exact_with_few_values():
+    digest = sketches.tdigest_for_error(ERROR)
+    values = pd.Series([7, 1, None, 4, 3])
+    digest.update(values)
+    assert digest.count == 4
+    assert digest.quantile(0.5) == values.median()
+
+def test_tdigest_quantiles_within_rank_error():
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(size=200_000)
+    digest = sketches.tdigest_for_error(ERROR)
+    for chunk in np.array_split(values, 20):
+        digest.update(chunk)
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        assert abs(_rank(values, digest.quantile(q)) - q) <= ERROR
+
+def test_tdigest_merge_matches_single_digest():
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=100_000)
+    merged = sketches.tdigest_for_error(ERROR)
+    for chunk in np.array_split(values, 4):
+        part = sketches.tdigest_for_error(ERROR)
+        part.update(chunk)
+        merged.merge(part)
+    assert merged.count == len(values)
+    assert abs(_rank(values, merged.quantile(0.5)) - 0.5) <= ERROR
+
+def test_frequent_items_underestimate_within_bound():
+    rng = np.random.default_rng(2)
+    # Pocos valores muy frecuentes y una cola larga de valores raros
+    values = np.concatenate([rng.choice(['SP', 'RJ', 'MG'], size=30_000, p=[0.5, 0.3, 0.2]),
+                             rng.integers(0, 50_000, size=70_000).astype(str)])
+    rng.shuffle(values)
+    summary = sketches.frequent_items_for_error(ERROR)
+    for chunk in np.array_split(values, 10):
+        summary.update(chunk)
+
+    bound = len(values) / (summary.capacity + 1)
+    assert summary.total == len(values)
+    assert summary.max_error <= bound
+    true_counts = pd.Series(values).value_counts()
+    assert [value for value, _ in summary.top(3)] == ['SP', 'RJ', 'MG']
+    for value, count in summary.counts.items():
+        assert 0 <= true_counts[value] - count <= bound
+
+def test_hyperloglog_count_within_standard_errors():
+    values = pd.Series([f"order{i}" for i in range(100_000)])
+    sketch = sketches.hyperloglog_for_error(ERROR)
+    for start in range(0, len(values), 20_000):
+        chunk = values.iloc[start:start + 20_000]
+        # Los valores repetidos y los nulos no cambian la estimación
+        sketch.update(pd.concat([chunk, chunk.head(100), pd.Series([None])]))
+    standard_error = 1.04 / np.sqrt(len(sketch.registers))
+    assert abs(sketch.count() - len(values)) <= 3 * standard_error * len(values)
+
+def test_hyperloglog_small_cardinality_and_merge():
+    left = sketches.hyperloglog_for_error(ERROR)
+    right = sketches.hyperloglog_for_error(ERROR)
+    left.update(['SP', 'RJ', 'MG'])
+    right.update(['MG', 'BA'])
+    left.merge(right)
+    assert left.count() == 4
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import xlsx_export
+
+def _frame():
+    return pd.DataFrame({
+        'integer': pd.array([1, None, 3, 4], dtype='Int64'),
+        'number': [1.5, np.nan, np.inf, -np.inf],
+        'text': ['a & b', '<c>', None, 'd"e'],
+        'flag': [True, False, True, False],
+        'category': pd.Categorical(['x', 'y', None, 'x']),
+        'date': pd.to_datetime(['2017-10-02 10:56:33', None, '2018-01-01 00:00:00', '2016-09-04 21:15:19']),
+    })
+
+def test_stream_workbook_matches_openpyxl(tmp_path):
+    frames = {'first': _frame(), 'second': _frame().iloc[::-1]}
+    stream_path = tmp_path / 'stream.xlsx'
+    openpyxl_path = tmp_path / 'openpyxl.xlsx'
+
+    xlsx_export.export_workbook(frames, str(stream_path), workers=1)
+    with pd.ExcelWriter(openpyxl_path, engine='openpyxl') as writer:
+        for sheet_name, df in frames.items():
+            # El escritor en streaming deja vacías las celdas no finitas, igual que los nulos
+            df.replace([np.inf, -np.inf], np.nan).to_excel(writer, sheet_name=sheet_name, index=False)
+
+    stream = pd.read_excel(stream_path, sheet_name=None)
+    expected = pd.read_excel(openpyxl_path, sheet_name=None)
+    assert list(stream) == list(expected)
+    for sheet_name in expected:
+        pd.testing.assert_frame_equal(stream[sheet_name], expected[sheet_name])